@@ -1,10 +1,49 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from collections import Counter
-from itertools import combinations
+
+import kbli_perf as perf
+
+from kbli_charts import (
+    DEFAULT_TOP_PAIRS,
+    TOP_PAIRS_OPTIONS,
+    cluster_heatmap_figure,
+    cluster_pair_figure,
+    multi_cluster_distribution_figure,
+    multi_cluster_pie_figure,
+    single_cluster_distribution_figure,
+    single_cluster_pie_figure,
+)
+from kbli_data import DATA_DIR, dated_workbooks, data_version, source_workbooks
+from kbli_diff import diff_snapshots
+from kbli_export import FORMAT_EKSPOR, dashboard_sheets
+from kbli_fuzzy import best_matches
+from kbli_index import KATEGORI_KBLI, TINGKAT_HIERARKI
+from kbli_reload import DataWatcher, SnapshotStore
+from kbli_snapshot import DatasetSnapshot
+from kbli_sql import (
+    CONTOH_QUERY,
+    DEFAULT_LIMIT as SQL_DEFAULT_LIMIT,
+    DEFAULT_TIMEOUT as SQL_DEFAULT_TIMEOUT,
+    MAX_LIMIT as SQL_MAX_LIMIT,
+    QueryError,
+    run_query,
+)
+from kbli_ui import (
+    PROFILE_PENDING_KEY,
+    chart_selection,
+    export_button,
+    keep_widget_state,
+    paginated_list,
+    perf_panel,
+    perf_session_id,
+)
+
+# Timer rerun: load data, cache hit/miss, pembangunan tabel turunan dan render view
+timer = perf.start_rerun(session=perf_session_id())
+if st.session_state.pop(PROFILE_PENDING_KEY, False):
+    timer.start_profile()
 
 # Set page config
 st.set_page_config(
@@ -18,107 +57,165 @@ st.title("📊 Dashboard Klasifikasi KBLI Berdasarkan Cluster")
 st.markdown("---")
 
 # Load data
-@st.cache_data
-def load_data():
-    try:
-        # Load data KBLI dari file utama
-        df_kbli_cluster = pd.read_excel('20251022.xlsx', sheet_name='KBLI berdasarkan Cluster')
-        
-        # Load data KBLI lengkap untuk referensi deskripsi
-        df_kbli_full = pd.read_excel('20251022.xlsx', sheet_name='KBLI')
-        
-        # Load data tidak terklasifikasi
-        df_tidak_terklasifikasi = pd.read_excel('hasil_klasifikasi_kbli.xlsx', sheet_name='Hasil Klasifikasi')
-        
-        # Load data Cluster Pekerjaan
-        df_cluster_pekerjaan = pd.read_excel('20251022.xlsx', sheet_name='Cluster Pekerjaan')
-        
-        return df_kbli_cluster, df_kbli_full, df_tidak_terklasifikasi, df_cluster_pekerjaan
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return None, None, None, None
+@perf.timed_cache
+@st.cache_resource
+def get_snapshot_store():
+    """Snapshot data aktif, dibagikan read-only ke semua sesi dan dimuat ulang otomatis"""
+    perf.mark_miss()
+    # Sheet dibaca dari cache Parquet, workbook hanya di-parse ulang jika isinya berubah.
+    # Tabel turunan (indeks, analisis cluster, rekap) baru dihitung saat pertama diakses
+    # dan disimpan di snapshot, jadi setiap tabel dihitung paling banyak sekali per versi.
+    # Workbook baru/berubah di DATA_DIR memicu reload di latar belakang; sesi memakai
+    # snapshot lama sampai pertukaran selesai.
+    store = SnapshotStore()
+    DataWatcher(store).start()
+    return store
 
-# Fungsi bantuan
-def convert_df_to_csv(df):
-    """Convert dataframe to CSV for download"""
-    return df.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
+# Jumlah figure yang disimpan per jenis chart; entri yang paling lama
+# tidak dipakai dibuang lebih dulu
+FIGURE_CACHE_ENTRIES = 32
 
-# Load data
-df_kbli_cluster, df_kbli_full, df_tidak_terklasifikasi, df_cluster_pekerjaan = load_data()
+@perf.timed_cache
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def get_multi_cluster_figures(versi_data, _snapshot):
+    """Chart distribusi dan persentase KBLI multi-cluster"""
+    perf.mark_miss()
+    dist = _snapshot.multi_cluster_distribution
+    return multi_cluster_distribution_figure(dist), multi_cluster_pie_figure(dist)
+
+@perf.timed_cache
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def get_cluster_pair_figure(versi_data, top_n, _snapshot):
+    """Chart kombinasi cluster: top_n pasangan teratas ditambah 'Lainnya'"""
+    perf.mark_miss()
+    cooccurrence = _snapshot.cooccurrence
+    pairs = cooccurrence.top_pairs_with_others(top_n)
+    return cluster_pair_figure(pairs, len(cooccurrence), top_n)
+
+@perf.timed_cache
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def get_cluster_heatmap_figure(versi_data, _snapshot):
+    perf.mark_miss()
+    return cluster_heatmap_figure(_snapshot.cooccurrence.matrix_frame())
+
+@perf.timed_cache
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def get_single_cluster_figures(versi_data, search, cluster, _index, _bits):
+    """Chart KBLI single cluster untuk satu kombinasi filter (pencarian, cluster)"""
+    perf.mark_miss()
+    # Jumlah per cluster langsung dari bitset, tanpa membentuk DataFrame hasil filter
+    jumlah = _index.counts('cluster', _bits)
+    dist = pd.DataFrame({'CLUSTER': jumlah.index.to_numpy(dtype=object), 'JUMLAH_KBLI': jumlah.to_numpy()})
+    if len(dist) == 0:
+        return None, None
+    return single_cluster_distribution_figure(dist), single_cluster_pie_figure(dist)
+
+@perf.timed_cache
+@st.cache_resource(max_entries=8)
+def get_version_diff(versi_lama, versi_baru, _workbooks_lama, _workbooks_baru):
+    """Perbandingan dua versi workbook, dihitung sekali per pasangan versi"""
+    perf.mark_miss()
+    return diff_snapshots(
+        DatasetSnapshot.from_workbooks(*_workbooks_lama),
+        DatasetSnapshot.from_workbooks(*_workbooks_baru),
+    )
+
+# Jumlah hasil pencarian pekerjaan (kombinasi kueri) yang disimpan
+FUZZY_CACHE_ENTRIES = 64
+
+@perf.timed_cache
+@st.cache_resource(max_entries=FUZZY_CACHE_ENTRIES)
+def get_job_matches(versi_data, queries, top_k, terklasifikasi, _snapshot):
+    """Pekerjaan terdekat untuk tuple kueri, dihitung sekali per (versi, kueri, top_k)"""
+    perf.mark_miss()
+    return _snapshot.job_matcher.lookup(list(queries), top_k, terklasifikasi)
 
-if df_kbli_cluster is None:
+# Kunci session state untuk view yang aktif
+VIEW_KEY = "view_aktif"
+
+# Batas jumlah hasil pencarian yang ditampilkan
+MAX_HASIL_PENCARIAN = 200
+
+# Key chart yang bisa diklik untuk menyaring detail (awalan 'chart_', lihat kbli_ui)
+CHART_MULTI_DIST = "chart_multi_dist"
+CHART_SINGLE_DIST = "chart_single_dist"
+
+# Load data
+try:
+    with perf.span("Muat snapshot", perf.KIND_LOAD):
+        store = get_snapshot_store()
+        snapshot = store.current()
+        versi_data = snapshot.version
+except Exception as e:
+    st.error(f"Error loading data: {e}")
     st.stop()
 
-# DEBUG: Tampilkan informasi detail tentang data dalam expander yang collapsed
-with st.sidebar.expander("🔍 Debug Info", expanded=False):
-    st.write("**Data Overview:**")
-    st.write(f"Total rows in df_kbli_cluster: {len(df_kbli_cluster)}")
-    st.write(f"Unique KBLI codes: {df_kbli_cluster['KODE_KBLI'].nunique()}")
-    st.write(f"Null values in KODE_KBLI: {df_kbli_cluster['KODE_KBLI'].isnull().sum()}")
-    
-    # Tampilkan duplikat KBLI jika ada
-    kbli_counts = df_kbli_cluster['KODE_KBLI'].value_counts()
-    duplicates = kbli_counts[kbli_counts > 1]
-    if len(duplicates) > 0:
-        st.write(f"**KBLI dengan duplikat:** {len(duplicates)}")
-        for kbli, count in duplicates.head(10).items():  # Tampilkan max 10 duplikat
-            st.write(f"  - {kbli}: {count} kali")
-    
-    # Info kolom
-    st.write("**Columns in df_kbli_cluster:**")
-    st.write(list(df_kbli_cluster.columns))
-    
-    # Sample data
-    st.write("**Sample Data (first 5 rows):**")
-    st.write(df_kbli_cluster[['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']].head())
+# Panel performa diisi di akhir skrip, setelah semua span rerun ini tercatat
+panel_performa = st.sidebar.container()
+
+# Status data dan reload otomatis
+with st.sidebar.expander("🔄 Versi Data", expanded=False):
+    st.write(f"**Versi aktif:** `{versi_data}`")
+    if store.last_reload:
+        reload_info = store.last_reload
+        st.write(f"**Reload terakhir:** {pd.Timestamp(reload_info['at'], unit='s'):%Y-%m-%d %H:%M:%S} "
+                 f"({reload_info['seconds']:.2f} detik)")
+        st.write(f"**Sheet berubah:** {', '.join(reload_info['changed_tables']) or '-'}")
+        st.write(f"**Tabel dipakai ulang:** {len(reload_info['reused'])}")
+        if reload_info['changed_codes'] is not None:
+            st.write(f"**KBLI dengan assignment berubah:** {reload_info['changed_codes']}")
+    if store.last_error is not None:
+        st.warning(f"Reload gagal, data lama tetap dipakai: {store.last_error}")
+    if st.button("Periksa ulang workbook", key="button_reload_data"):
+        if store.reload():
+            st.rerun()
+        else:
+            st.info("Tidak ada perubahan data")
+
+# Workbook gabungan: single, multi, tidak terklasifikasi dan pasangan cluster
+with st.sidebar.expander("📥 Export Workbook", expanded=False):
+    st.caption("Semua tabel utama dalam satu file XLSX")
+    export_button(
+        label="Download Workbook (XLSX)",
+        name="kbli_dashboard",
+        build=lambda: dashboard_sheets(snapshot),
+        fmt='XLSX',
+        version=versi_data,
+        key="download_workbook"
+    )
 
 # Info Data di kanan atas - DIPERBAIKI dengan tambahan KBLI Multi Cluster
+ringkasan = snapshot.summary
 col_info1, col_info2, col_info3, col_info4, col_info5 = st.columns(5)
 
 with col_info1:
-    # Bersihkan data sebelum menghitung
-    df_clean = df_kbli_cluster.dropna(subset=['KODE_KBLI']).copy()
-    df_clean['KODE_KBLI'] = df_clean['KODE_KBLI'].astype(str).str.strip()
-    
     # Hitung unique KBLI setelah cleaning
-    unique_kbli_count = df_clean['KODE_KBLI'].nunique()
-    st.metric("Total KBLI dalam cluster", unique_kbli_count)
+    st.metric("Total KBLI dalam cluster", ringkasan['total_kbli_cluster'])
 
 with col_info2:
-    st.metric("Total KBLI lengkap", len(df_kbli_full))
+    st.metric("Total KBLI lengkap", ringkasan['total_kbli_lengkap'])
 
 with col_info3:
-    if df_cluster_pekerjaan is not None:
-        st.metric("Total Pekerjaan UMKM", len(df_cluster_pekerjaan))
+    st.metric("Total Pekerjaan UMKM", ringkasan['total_pekerjaan'])
 
 with col_info4:
     # Hitung KBLI yang hanya ada di 1 cluster
-    kbli_counts = df_clean['KODE_KBLI'].value_counts()
-    single_cluster_kbli = len(kbli_counts[kbli_counts == 1])
-    st.metric("KBLI Single Cluster", single_cluster_kbli)
+    st.metric("KBLI Single Cluster", ringkasan['single_cluster'])
 
 with col_info5:
     # Hitung KBLI Multi Cluster - DITAMBAHKAN
-    multi_cluster_kbli = len(kbli_counts[kbli_counts > 1])
-    st.metric("KBLI Multi Cluster", multi_cluster_kbli)
+    st.metric("KBLI Multi Cluster", ringkasan['multi_cluster'])
 
 st.markdown("---")
 
-# Tab untuk berbagai jenis data
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "📈 KBLI Berdasarkan Cluster", 
-    "📋 List Pekerjaan UMKM",
-    "❓ Tidak Terklasifikasi", 
-    "🔍 Pencarian KBLI",
-    "🔄 KBLI Multi-Cluster",
-    "✅ KBLI Single Cluster"
-])
-
-with tab1:
+# Setiap view dirender oleh satu fungsi; hanya view yang dipilih di navigasi
+# yang dijalankan pada setiap rerun (berbeda dengan st.tabs yang menjalankan semuanya)
+def view_kbli_cluster():
     st.header("KBLI Berdasarkan Cluster")
     
     # Gunakan data yang sudah dibersihkan
-    available_clusters = df_clean['CLUSTER'].unique()
+    df_clean = snapshot.clean
+    available_clusters = snapshot.clusters
     
     # Filter Pilih Cluster
     col_filter1, col_filter2 = st.columns([1, 3])
@@ -133,23 +230,29 @@ with tab1:
     
     st.subheader(f"KBLI - Cluster: {selected_cluster}")
     
-    # Filter data berdasarkan cluster yang dipilih
-    filtered_data = df_clean[df_clean['CLUSTER'] == selected_cluster]
+    # Filter data berdasarkan cluster yang dipilih (bitset cluster yang sudah dihitung)
+    index_cluster = snapshot.clean_filters
+    filtered_data = index_cluster.take(df_clean, index_cluster.bitmap('cluster', selected_cluster))
     
     if len(filtered_data) > 0:
-        # Tampilkan data dalam bentuk tabel
-        for idx, row in filtered_data.iterrows():
+        def render_kbli_cluster(row):
             with st.expander(f"**{row['KODE_KBLI']}** - {row['JUDUL_KBLI']}", expanded=False):
-                # Cari deskripsi lengkap dari data KBLI
-                deskripsi = df_kbli_full[
-                    df_kbli_full['KODE KBLI'] == row['KODE_KBLI']
-                ]['DESKRIPSI KBLI'].values
+                # Cari deskripsi lengkap dari indeks KBLI
+                deskripsi = snapshot.kbli_index.deskripsi(row['KODE_KBLI'])
                 
-                if len(deskripsi) > 0 and pd.notna(deskripsi[0]):
-                    st.write(f"**Deskripsi:** {deskripsi[0]}")
+                if deskripsi:
+                    st.write(f"**Deskripsi:** {deskripsi}")
                 else:
                     st.write("**Deskripsi:** Tidak tersedia")
         
+        # Tampilkan data per halaman
+        paginated_list(
+            filtered_data,
+            key="list_tab1",
+            render_item=render_kbli_cluster,
+            compact_columns=['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']
+        )
+        
         # Tampilkan summary
         col1, col2 = st.columns(2)
         with col1:
@@ -159,15 +262,17 @@ with tab1:
     else:
         st.info("Tidak ada data untuk cluster yang dipilih")
 
-with tab2:
+def view_pekerjaan_umkm():
     st.header("📋 List Pekerjaan UMKM dan Cluster")
     
+    df_cluster_pekerjaan = snapshot.cluster_pekerjaan
+    
     if df_cluster_pekerjaan is not None:
         # Filter Pilih Cluster untuk tab ini
         col_filter1, col_filter2 = st.columns([1, 3])
         
         with col_filter1:
-            available_clusters_pekerjaan = df_cluster_pekerjaan['CLUSTER'].unique()
+            available_clusters_pekerjaan = snapshot.pekerjaan_clusters
             selected_cluster_pekerjaan = st.selectbox(
                 "Pilih Cluster:",
                 options=available_clusters_pekerjaan,
@@ -178,15 +283,18 @@ with tab2:
         st.subheader(f"Pekerjaan UMKM - Cluster: {selected_cluster_pekerjaan}")
         
         # Filter data berdasarkan cluster yang dipilih
-        filtered_pekerjaan = df_cluster_pekerjaan[df_cluster_pekerjaan['CLUSTER'] == selected_cluster_pekerjaan]
+        filtered_pekerjaan = snapshot.pekerjaan_by_cluster(selected_cluster_pekerjaan)
         
         if len(filtered_pekerjaan) > 0:
             # Tampilkan dalam bentuk list sederhana
             st.write(f"**Jumlah Pekerjaan:** {len(filtered_pekerjaan)}")
             
-            # Tampilkan dalam bentuk bullet list
-            for idx, row in filtered_pekerjaan.iterrows():
-                st.write(f"• {row['List Pekerjaan UMKM']}")
+            # Tampilkan dalam bentuk bullet list per halaman
+            paginated_list(
+                filtered_pekerjaan,
+                key="list_tab2",
+                render_item=lambda row: st.write(f"• {row['List Pekerjaan UMKM']}")
+            )
             
             # Tampilkan summary
             st.markdown("---")
@@ -211,6 +319,40 @@ with tab2:
         else:
             st.info("Tidak ada data pekerjaan untuk cluster yang dipilih")
         
+        # Pencarian nama pekerjaan yang toleran salah ketik
+        st.markdown("---")
+        st.subheader("🔎 Cari Pekerjaan Terdekat")
+        st.caption("Nama pekerjaan boleh salah ketik, mis. 'bengkel motr'; "
+                   "hasil berisi pekerjaan yang sudah dikenal beserta cluster dan KBLI-nya")
+        col_cari, col_k = st.columns([3, 1])
+        with col_cari:
+            kueri_pekerjaan = st.text_input("Nama pekerjaan:", key="fuzzy_pekerjaan")
+        with col_k:
+            top_k_pekerjaan = st.selectbox("Jumlah hasil:", options=[3, 5, 10],
+                                           index=1, key="fuzzy_top_k")
+        if kueri_pekerjaan:
+            hasil_pekerjaan = get_job_matches(versi_data, (kueri_pekerjaan,), top_k_pekerjaan, False, snapshot)
+            if len(hasil_pekerjaan) > 0:
+                st.dataframe(hasil_pekerjaan.drop(columns=['KUERI']), use_container_width=True)
+            else:
+                st.info("Tidak ada pekerjaan yang cukup mirip")
+        
+        with st.expander("📑 Cocokkan daftar pekerjaan"):
+            daftar = st.text_area("Satu nama pekerjaan per baris:", height=150, key="fuzzy_batch")
+            kueri_batch = [baris.strip() for baris in daftar.splitlines() if baris.strip()]
+            if kueri_batch:
+                hasil_batch = get_job_matches(versi_data, tuple(kueri_batch), 1, False, snapshot)
+                st.dataframe(hasil_batch.drop(columns=['PERINGKAT']), use_container_width=True, height=300)
+                export_button(
+                    label="Download Hasil Pencocokan (CSV)",
+                    name="kbli_pencocokan_pekerjaan",
+                    build=lambda: hasil_batch,
+                    fmt='CSV',
+                    version=versi_data,
+                    filter_key=tuple(kueri_batch),
+                    key="download_pencocokan_pekerjaan"
+                )
+        
         # Statistik overall
         st.markdown("---")
         st.subheader("📊 Statistik Keseluruhan")
@@ -222,7 +364,7 @@ with tab2:
             st.metric("Total Cluster", len(available_clusters_pekerjaan))
         with col3:
             # Hitung pekerjaan tidak terklasifikasi
-            tidak_terklasifikasi = len(df_cluster_pekerjaan[df_cluster_pekerjaan['CLUSTER'] == 'Tidak Terklasifikasi'])
+            tidak_terklasifikasi = snapshot.jumlah_pekerjaan_tidak_terklasifikasi
             st.metric("Tidak Terklasifikasi", tidak_terklasifikasi)
         with col4:
             # Hitung persentase terklasifikasi
@@ -233,35 +375,64 @@ with tab2:
     else:
         st.error("Data Cluster Pekerjaan tidak dapat dimuat")
 
-with tab3:
+def view_tidak_terklasifikasi():
     st.header("Pekerjaan Tidak Terklasifikasi")
     
+    df_tidak_terklasifikasi = snapshot.tidak_terklasifikasi
+    
     if df_tidak_terklasifikasi is not None:
-        # Pisahkan data yang ditemukan dan tidak ditemukan
-        df_ditemukan = df_tidak_terklasifikasi[df_tidak_terklasifikasi['KODE KBLI'] != 'Tidak Ditemukan']
-        df_tidak_ditemukan = df_tidak_terklasifikasi[df_tidak_terklasifikasi['KODE KBLI'] == 'Tidak Ditemukan']
+        # Pisahkan data yang ditemukan dan tidak ditemukan (dihitung sekali per versi data)
+        df_ditemukan = snapshot.hasil_ditemukan
+        df_tidak_ditemukan = snapshot.hasil_tidak_ditemukan
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("✅ Berhasil Ditemukan")
             if len(df_ditemukan) > 0:
-                for idx, row in df_ditemukan.iterrows():
+                def render_ditemukan(row):
                     with st.expander(f"**{row['KODE KBLI']}** - {row['JUDUL KBLI']}", expanded=False):
                         # HANYA TAMPILKAN PEKERJAAN UMKM DAN DESKRIPSI KBLI
                         st.write(f"**Pekerjaan UMKM:** {row['List Pekerjaan UMKM']}")
                         st.write(f"**Deskripsi KBLI:** {row['DESKRIPSI KBLI']}")
+                
+                paginated_list(
+                    df_ditemukan,
+                    key="list_tab3_ditemukan",
+                    render_item=render_ditemukan,
+                    compact_columns=['List Pekerjaan UMKM', 'KODE KBLI', 'JUDUL KBLI']
+                )
             else:
                 st.info("Tidak ada data yang berhasil ditemukan")
         
         with col2:
             st.subheader("❌ Tidak Ditemukan")
             if len(df_tidak_ditemukan) > 0:
-                for idx, row in df_tidak_ditemukan.iterrows():
+                # Pekerjaan terklasifikasi terdekat sebagai saran, satu batch untuk semua baris
+                saran = best_matches(get_job_matches(
+                    versi_data,
+                    tuple(df_tidak_ditemukan['List Pekerjaan UMKM'].dropna().unique().tolist()),
+                    1,
+                    True,
+                    snapshot
+                )).set_index('KUERI')
+                
+                def render_tidak_ditemukan(row):
                     st.write(f"• **{row['List Pekerjaan UMKM']}**")
                     st.write(f"  Status: {row['KODE KBLI']} | Cluster: {row['CLUSTER']}")
                     st.write("  *Perlu klasifikasi manual*")
+                    if row['List Pekerjaan UMKM'] in saran.index:
+                        terdekat = saran.loc[row['List Pekerjaan UMKM']]
+                        st.write(f"  Pekerjaan terdekat: {terdekat['PEKERJAAN']} "
+                                 f"(Cluster: {terdekat['CLUSTER']}, skor {terdekat['SKOR']:.2f})")
                     st.write("---")
+                
+                paginated_list(
+                    df_tidak_ditemukan,
+                    key="list_tab3_tidak_ditemukan",
+                    render_item=render_tidak_ditemukan,
+                    compact_columns=['List Pekerjaan UMKM', 'KODE KBLI', 'CLUSTER']
+                )
             else:
                 st.info("Tidak ada data yang tidak ditemukan")
         
@@ -280,69 +451,45 @@ with tab3:
     else:
         st.error("Data tidak terklasifikasi tidak dapat dimuat")
 
-with tab4:
+def view_pencarian():
     st.header("🔍 Pencarian KBLI")
     
     # Pencarian berdasarkan keyword
-    search_term = st.text_input("Masukkan kata kunci pencarian (Kode KBLI atau Judul):")
+    search_term = st.text_input("Masukkan kata kunci pencarian (Kode KBLI atau Judul):", key="search_kbli")
     
     if search_term:
-        # Search in KBLI full data
-        search_results = df_kbli_full[
-            df_kbli_full['KODE KBLI'].astype(str).str.contains(search_term, case=False, na=False) |
-            df_kbli_full['JUDUL KBLI'].str.contains(search_term, case=False, na=False) |
-            df_kbli_full['DESKRIPSI KBLI'].str.contains(search_term, case=False, na=False)
-        ]
+        # Cari lewat inverted index (kode, judul, deskripsi), hasil sudah diranking
+        hasil = snapshot.search_index.search(search_term)
+        search_results = snapshot.katalog.iloc[hasil.positions[:MAX_HASIL_PENCARIAN]]
         
-        if len(search_results) > 0:
-            st.success(f"Ditemukan {len(search_results)} hasil pencarian untuk '{search_term}'")
+        if hasil.total > 0:
+            st.success(f"Ditemukan {hasil.total} hasil pencarian untuk '{search_term}'")
+            if hasil.total > MAX_HASIL_PENCARIAN:
+                st.caption(f"Menampilkan {len(search_results)} dari {hasil.total} hasil teratas")
             
-            for idx, row in search_results.iterrows():
+            def render_hasil_pencarian(row):
                 with st.expander(f"**{row['KODE KBLI']}** - {row['JUDUL KBLI']}", expanded=False):
                     st.write(f"**Deskripsi:** {row['DESKRIPSI KBLI']}")
                     
-                    # Cari cluster dari data cluster
-                    cluster_info = df_clean[
-                        df_clean['KODE_KBLI'] == row['KODE KBLI']
-                    ]['CLUSTER'].values
+                    # Cari cluster dari indeks KBLI
+                    cluster_info = snapshot.kbli_index.clusters(row['KODE KBLI'])
                     
                     if len(cluster_info) > 0:
-                        st.write(f"**Cluster:** {cluster_info[0]}")
+                        st.write(f"**Cluster:** {', '.join(cluster_info)}")
                     else:
                         st.write("**Cluster:** Tidak terkategorisasi")
+            
+            paginated_list(
+                search_results,
+                key="list_tab4",
+                render_item=render_hasil_pencarian,
+                compact_columns=['KODE KBLI', 'JUDUL KBLI']
+            )
         else:
             st.warning(f"Tidak ditemukan hasil untuk '{search_term}'")
 
-with tab5:
-    # Analisis data untuk menemukan KBLI multi-cluster
-    @st.cache_data
-    def find_multi_cluster_kbli(df_clean):
-        """Mencari KBLI yang muncul di lebih dari 1 cluster"""
-        # Hitung frekuensi setiap KBLI
-        kbli_counts = df_clean['KODE_KBLI'].value_counts()
-        
-        # Ambil KBLI yang muncul lebih dari 1 kali
-        multi_cluster_kbli = kbli_counts[kbli_counts > 1].index.tolist()
-        
-        # Kumpulkan data detail
-        multi_cluster_data = []
-        for kbli in multi_cluster_kbli:
-            clusters = df_clean[df_clean['KODE_KBLI'] == kbli]['CLUSTER'].tolist()
-            judul = df_clean[df_clean['KODE_KBLI'] == kbli]['JUDUL_KBLI'].iloc[0]
-            
-            multi_cluster_data.append({
-                'KODE_KBLI': kbli,
-                'JUDUL_KBLI': judul,
-                'CLUSTERS': clusters,
-                'JUMLAH_CLUSTER': len(clusters),
-                'DETAIL_CLUSTER': ', '.join(clusters)
-            })
-        
-        return pd.DataFrame(multi_cluster_data)
-    
-    # Cari data multi-cluster
-    df_multi_cluster = find_multi_cluster_kbli(df_clean)
-    
+def view_multi_cluster():
+    df_multi_cluster = snapshot.multi_cluster
     st.header(f"🔄 KBLI Multi-Cluster ({len(df_multi_cluster)} KBLI)")
     
     if len(df_multi_cluster) > 0:
@@ -375,111 +522,65 @@ with tab5:
                                               options=["Semua", "2 Cluster", "3 Cluster", "4+ Cluster"],
                                               key="cluster_count_filter")
         
-        # Filter data
-        filtered_multi = df_multi_cluster.copy()
-        
-        if search_multi:
-            filtered_multi = filtered_multi[
-                filtered_multi['KODE_KBLI'].str.contains(search_multi, case=False, na=False) |
-                filtered_multi['JUDUL_KBLI'].str.contains(search_multi, case=False, na=False)
-            ]
-        
-        if cluster_count_filter != "Semua":
-            if cluster_count_filter == "2 Cluster":
-                filtered_multi = filtered_multi[filtered_multi['JUMLAH_CLUSTER'] == 2]
-            elif cluster_count_filter == "3 Cluster":
-                filtered_multi = filtered_multi[filtered_multi['JUMLAH_CLUSTER'] == 3]
-            else:  # 4+ Cluster
-                filtered_multi = filtered_multi[filtered_multi['JUMLAH_CLUSTER'] >= 4]
+        # Filter data: AND bitset pencarian, kelompok jumlah cluster dan batang
+        # yang diklik di chart distribusi (jumlah cluster persis)
+        index_multi = snapshot.multi_cluster_filters
+        jumlah_diklik = sorted(int(x) for x in chart_selection(CHART_MULTI_DIST))
+        bitsets = [snapshot.search_bitmap(index_multi, search_multi)] if search_multi else []
+        bits_multi = index_multi.select(
+            *bitsets,
+            bucket=None if cluster_count_filter == "Semua" else cluster_count_filter,
+            jumlah=jumlah_diklik
+        )
+        filtered_multi = index_multi.take(df_multi_cluster, bits_multi)
         
         # VISUALISASI 1: Distribusi Jumlah Cluster - DIPERBAIKI
         st.subheader("📊 Distribusi KBLI Multi-Cluster")
         
         viz_col1, viz_col2 = st.columns(2)
         
+        # Figure dibangun sekali per versi data dari agregat yang sudah dihitung
+        fig_dist, fig_pie = get_multi_cluster_figures(versi_data, snapshot)
+        
         with viz_col1:
-            # Chart batang untuk distribusi jumlah cluster
-            cluster_dist = df_multi_cluster['JUMLAH_CLUSTER'].value_counts().sort_index()
-            
-            fig_dist = px.bar(
-                x=cluster_dist.index,
-                y=cluster_dist.values,
-                title="Distribusi Jumlah Cluster per KBLI",
-                labels={'x': 'Jumlah Cluster', 'y': 'Jumlah KBLI'},
-                color=cluster_dist.values,
-                color_continuous_scale='viridis'
-            )
-            # HILANGKAN SKALA DESIMAL - DIPERBAIKI
-            fig_dist.update_layout(
-                showlegend=False,
-                xaxis=dict(tickmode='linear', dtick=1),  # Pastikan angka bulat
-                yaxis=dict(tickformat='d')  # Format integer untuk y-axis
-            )
-            # Tambahkan annotation untuk setiap bar
-            fig_dist.update_traces(
-                text=cluster_dist.values,
-                textposition='outside',
-                hovertemplate='<b>%{x} Cluster</b><br>Jumlah KBLI: %{y}<extra></extra>'
-            )
-            st.plotly_chart(fig_dist, use_container_width=True)
+            # Chart batang untuk distribusi jumlah cluster; klik batang untuk menyaring detail
+            st.plotly_chart(fig_dist, use_container_width=True, on_select="rerun",
+                            selection_mode="points", key=CHART_MULTI_DIST)
+            if jumlah_diklik:
+                st.caption(f"Detail disaring ke {', '.join(map(str, jumlah_diklik))} cluster. "
+                           "Klik dua kali area chart untuk menghapus.")
         
         with viz_col2:
             # Pie chart untuk persentase
-            fig_pie = px.pie(
-                values=cluster_dist.values,
-                names=cluster_dist.index.astype(str) + ' Cluster',
-                title="Persentase KBLI Multi-Cluster",
-                hole=0.4
-            )
             st.plotly_chart(fig_pie, use_container_width=True)
         
         # VISUALISASI 2: Cluster yang Sering Muncul Bersama
         st.subheader("🔗 Analisis Kombinasi Cluster")
 
-        # Analisis kombinasi cluster
-        def analyze_cluster_combinations(df_multi_cluster):
-            """Menganalisis kombinasi cluster yang sering muncul bersama"""
-            cluster_pairs = []
-            
-            for clusters in df_multi_cluster['CLUSTERS']:
-                if len(clusters) >= 2:
-                    # Generate semua pasangan cluster
-                    pairs = list(combinations(sorted(clusters), 2))
-                    cluster_pairs.extend(pairs)
-            
-            # Hitung frekuensi setiap pasangan
-            pair_counter = Counter(cluster_pairs)
-            
-            # Ambil semua pasangan, tidak hanya 10 teratas
-            all_pairs = pair_counter.most_common()
-            
-            return all_pairs
-
-        top_cluster_pairs = analyze_cluster_combinations(df_multi_cluster)
+        # Analisis kombinasi cluster dari matriks kemunculan bersama
+        cooccurrence = snapshot.cooccurrence
 
-        if top_cluster_pairs:
-            pairs_df = pd.DataFrame(top_cluster_pairs, columns=['Cluster Pair', 'Jumlah_Pasangan'])
-            pairs_df['Cluster Pair'] = pairs_df['Cluster Pair'].apply(lambda x: f"{x[0]} & {x[1]}")
+        if len(cooccurrence) > 0:
+            # Tabel tetap memuat semua pasangan, chart hanya N teratas + 'Lainnya'
+            pairs_df = cooccurrence.pairs()[['Cluster Pair', 'Jumlah_Pasangan']]
             
-            # Tampilkan total pairs
-            st.metric("Total Kombinasi Cluster Pair", len(pairs_df))
+            col_total, col_top = st.columns([3, 1])
+            with col_total:
+                # Tampilkan total pairs
+                st.metric("Total Kombinasi Cluster Pair", len(pairs_df))
+            with col_top:
+                top_n = st.selectbox(
+                    "Pasangan teratas di chart:",
+                    options=TOP_PAIRS_OPTIONS,
+                    index=TOP_PAIRS_OPTIONS.index(DEFAULT_TOP_PAIRS),
+                    key="pair_top_n"
+                )
             
-            fig_pairs = px.bar(
-                pairs_df,
-                x='Jumlah_Pasangan',
-                y='Cluster Pair',
-                orientation='h',
-                title=f"Kombinasi Cluster Pair ({len(pairs_df)} Total Pasangan)",
-                color='Jumlah_Pasangan',
-                color_continuous_scale='plasma',
-                labels={'Jumlah_Pasangan': 'Jumlah Kemunculan'}
-            )
-            # HILANGKAN SKALA DESIMAL - DIPERBAIKI
-            fig_pairs.update_layout(
-                yaxis={'categoryorder':'total ascending'},
-                xaxis=dict(tickformat='d')  # Format integer untuk x-axis
-            )
-            st.plotly_chart(fig_pairs, use_container_width=True)
+            st.plotly_chart(get_cluster_pair_figure(versi_data, top_n, snapshot), use_container_width=True)
+            
+            # Heatmap opsional langsung dari matriks pasangan
+            if st.checkbox("Tampilkan heatmap kombinasi cluster", key="show_pair_heatmap"):
+                st.plotly_chart(get_cluster_heatmap_figure(versi_data, snapshot), use_container_width=True)
             
             # Tampilkan tabel detail pairs
             with st.expander("📋 Detail Semua Cluster Pair"):
@@ -494,8 +595,8 @@ with tab5:
         
         st.info(f"Menampilkan {len(filtered_multi)} dari {len(df_multi_cluster)} KBLI multi-cluster")
         
-        # Tampilkan data dalam tabel expandable
-        for idx, row in filtered_multi.iterrows():
+        # Tampilkan data dalam tabel expandable per halaman
+        def render_multi_cluster(row):
             with st.expander(f"**{row['KODE_KBLI']}** - {row['JUDUL_KBLI']} ({row['JUMLAH_CLUSTER']} Cluster)", expanded=False):
                 
                 col_detail1, col_detail2 = st.columns(2)
@@ -507,13 +608,11 @@ with tab5:
                 
                 with col_detail2:
                     # Cari deskripsi lengkap
-                    deskripsi = df_kbli_full[
-                        df_kbli_full['KODE KBLI'] == row['KODE_KBLI']
-                    ]['DESKRIPSI KBLI'].values
+                    deskripsi = snapshot.kbli_index.deskripsi(row['KODE_KBLI'])
                     
-                    if len(deskripsi) > 0 and pd.notna(deskripsi[0]):
+                    if deskripsi:
                         st.write("**Deskripsi KBLI:**")
-                        st.write(deskripsi[0])
+                        st.write(deskripsi)
                     else:
                         st.write("**Deskripsi:** Tidak tersedia")
                 
@@ -521,31 +620,46 @@ with tab5:
                 if row['JUMLAH_CLUSTER'] >= 3:
                     st.warning("⚠️ KBLI ini memiliki 3 atau lebih cluster assignment. Perlu pengecekan ulang.")
         
+        paginated_list(
+            filtered_multi,
+            key="list_multi",
+            render_item=render_multi_cluster,
+            compact_columns=['KODE_KBLI', 'JUDUL_KBLI', 'JUMLAH_CLUSTER', 'DETAIL_CLUSTER']
+        )
+        
         # DOWNLOAD DATA
         st.markdown("---")
         st.subheader("📥 Export Data")
         
-        col_export1, col_export2 = st.columns(2)
+        # File baru dibangun saat tombol diklik, lalu di-cache per versi data dan filter
+        filter_multi = (search_multi, cluster_count_filter, tuple(jumlah_diklik))
+        
+        col_format, col_export1, col_export2 = st.columns([1, 2, 2])
+        
+        with col_format:
+            format_multi = st.selectbox("Format:", options=list(FORMAT_EKSPOR), key="export_format_multi")
         
         with col_export1:
             # Download data multi-cluster
-            csv_multi = convert_df_to_csv(filtered_multi[['KODE_KBLI', 'JUDUL_KBLI', 'JUMLAH_CLUSTER', 'DETAIL_CLUSTER']])
-            st.download_button(
-                label="Download Data Multi-Cluster (CSV)",
-                data=csv_multi,
-                file_name="kbli_multi_cluster.csv",
-                mime="text/csv",
+            export_button(
+                label=f"Download Data Multi-Cluster ({format_multi})",
+                name="kbli_multi_cluster",
+                build=lambda: filtered_multi[['KODE_KBLI', 'JUDUL_KBLI', 'JUMLAH_CLUSTER', 'DETAIL_CLUSTER']],
+                fmt=format_multi,
+                version=versi_data,
+                filter_key=filter_multi,
                 key="download_multi"
             )
         
         with col_export2:
             # Download data lengkap
-            csv_full = convert_df_to_csv(filtered_multi)
-            st.download_button(
-                label="Download Data Lengkap (CSV)",
-                data=csv_full,
-                file_name="kbli_multi_cluster_lengkap.csv",
-                mime="text/csv",
+            export_button(
+                label=f"Download Data Lengkap ({format_multi})",
+                name="kbli_multi_cluster_lengkap",
+                build=lambda: filtered_multi,
+                fmt=format_multi,
+                version=versi_data,
+                filter_key=filter_multi,
                 key="download_full"
             )
         
@@ -553,34 +667,8 @@ with tab5:
         st.success("✅ Tidak ditemukan KBLI yang diclusterkan lebih dari 1 cluster")
         st.info("Semua KBLI memiliki assignment cluster yang unik")
 
-with tab6:
-    # Analisis data untuk menemukan KBLI single cluster
-    @st.cache_data
-    def find_single_cluster_kbli(df_clean):
-        """Mencari KBLI yang hanya muncul di 1 cluster"""
-        # Hitung frekuensi setiap KBLI
-        kbli_counts = df_clean['KODE_KBLI'].value_counts()
-        
-        # Ambil KBLI yang muncul hanya 1 kali
-        single_cluster_kbli = kbli_counts[kbli_counts == 1].index.tolist()
-        
-        # Kumpulkan data detail
-        single_cluster_data = []
-        for kbli in single_cluster_kbli:
-            cluster_row = df_clean[df_clean['KODE_KBLI'] == kbli].iloc[0]
-            
-            single_cluster_data.append({
-                'KODE_KBLI': kbli,
-                'JUDUL_KBLI': cluster_row['JUDUL_KBLI'],
-                'CLUSTER': cluster_row['CLUSTER'],
-                'KETERANGAN': 'Single Cluster'
-            })
-        
-        return pd.DataFrame(single_cluster_data)
-    
-    # Cari data single cluster
-    df_single_cluster = find_single_cluster_kbli(df_clean)
-    
+def view_single_cluster():
+    df_single_cluster = snapshot.single_cluster
     st.header(f"✅ KBLI Single Cluster ({len(df_single_cluster)} KBLI)")
     
     if len(df_single_cluster) > 0:
@@ -589,7 +677,7 @@ with tab6:
         with col1:
             st.metric("Total KBLI Single Cluster", len(df_single_cluster))
         with col2:
-            percentage_single = (len(df_single_cluster) / df_clean['KODE_KBLI'].nunique()) * 100
+            percentage_single = (len(df_single_cluster) / ringkasan['total_kbli_cluster']) * 100
             st.metric("Persentase dari Total", f"{percentage_single:.1f}%")
         with col3:
             unique_clusters = df_single_cluster['CLUSTER'].nunique()
@@ -610,58 +698,38 @@ with tab6:
                                         options=["Semua"] + sorted(df_single_cluster['CLUSTER'].unique()),
                                         key="cluster_filter_single")
         
-        # Filter data
-        filtered_single = df_single_cluster.copy()
-        
-        if search_single:
-            filtered_single = filtered_single[
-                filtered_single['KODE_KBLI'].str.contains(search_single, case=False, na=False) |
-                filtered_single['JUDUL_KBLI'].str.contains(search_single, case=False, na=False)
-            ]
-        
-        if cluster_filter != "Semua":
-            filtered_single = filtered_single[filtered_single['CLUSTER'] == cluster_filter]
+        # Filter data: chart memakai filter pencarian dan cluster; batang yang diklik
+        # di chart hanya menyaring detail agar chart tetap menampilkan semua pilihan
+        index_single = snapshot.single_cluster_filters
+        cluster_diklik = chart_selection(CHART_SINGLE_DIST)
+        bitsets = [snapshot.search_bitmap(index_single, search_single)] if search_single else []
+        bits_chart = index_single.select(*bitsets, cluster=None if cluster_filter == "Semua" else cluster_filter)
+        filtered_single = index_single.take(df_single_cluster, index_single.select(bits_chart, cluster=cluster_diklik))
         
         # VISUALISASI: Distribusi per Cluster - DIPERBAIKI
         st.subheader("📊 Distribusi KBLI Single Cluster per Cluster")
         
         viz_col1, viz_col2 = st.columns(2)
         
+        # Agregat dan figure di-cache per versi data dan kombinasi filter
+        fig_dist_single, fig_pie_single = get_single_cluster_figures(
+            versi_data, search_single, cluster_filter, index_single, bits_chart
+        )
+        
         with viz_col1:
-            # Chart batang untuk distribusi per cluster
-            cluster_dist_single = filtered_single['CLUSTER'].value_counts()
-            
-            fig_dist_single = px.bar(
-                x=cluster_dist_single.index,
-                y=cluster_dist_single.values,
-                title="Distribusi KBLI Single Cluster per Cluster",
-                labels={'x': 'Cluster', 'y': 'Jumlah KBLI'},
-                color=cluster_dist_single.values,
-                color_continuous_scale='blues'
-            )
-            # HILANGKAN SKALA DESIMAL - DIPERBAIKI
-            fig_dist_single.update_layout(
-                showlegend=False,
-                xaxis_tickangle=-45,
-                yaxis=dict(tickformat='d')  # Format integer untuk y-axis
-            )
-            # Tambahkan annotation untuk setiap bar
-            fig_dist_single.update_traces(
-                text=cluster_dist_single.values,
-                textposition='outside',
-                hovertemplate='<b>%{x}</b><br>Jumlah KBLI: %{y}<extra></extra>'
-            )
-            st.plotly_chart(fig_dist_single, use_container_width=True)
+            # Chart batang untuk distribusi per cluster; klik batang untuk menyaring detail
+            if fig_dist_single is not None:
+                st.plotly_chart(fig_dist_single, use_container_width=True, on_select="rerun",
+                                selection_mode="points", key=CHART_SINGLE_DIST)
+                if cluster_diklik:
+                    st.caption(f"Detail disaring ke cluster: {', '.join(cluster_diklik)}. "
+                               "Klik dua kali area chart untuk menghapus.")
+            else:
+                st.info("Tidak ada KBLI yang cocok dengan filter")
         
         with viz_col2:
             # Pie chart untuk persentase
-            if len(cluster_dist_single) > 0:
-                fig_pie_single = px.pie(
-                    values=cluster_dist_single.values,
-                    names=cluster_dist_single.index,
-                    title="Persentase KBLI Single Cluster per Cluster",
-                    hole=0.4
-                )
+            if fig_pie_single is not None:
                 st.plotly_chart(fig_pie_single, use_container_width=True)
         
         # TABEL DATA DETAIL
@@ -669,8 +737,8 @@ with tab6:
         
         st.info(f"Menampilkan {len(filtered_single)} dari {len(df_single_cluster)} KBLI single cluster")
         
-        # Tampilkan data dalam tabel expandable
-        for idx, row in filtered_single.iterrows():
+        # Tampilkan data dalam tabel expandable per halaman
+        def render_single_cluster(row):
             with st.expander(f"**{row['KODE_KBLI']}** - {row['JUDUL_KBLI']}", expanded=False):
                 
                 col_detail1, col_detail2 = st.columns(2)
@@ -681,33 +749,342 @@ with tab6:
                 
                 with col_detail2:
                     # Cari deskripsi lengkap
-                    deskripsi = df_kbli_full[
-                        df_kbli_full['KODE KBLI'] == row['KODE_KBLI']
-                    ]['DESKRIPSI KBLI'].values
+                    deskripsi = snapshot.kbli_index.deskripsi(row['KODE_KBLI'])
                     
-                    if len(deskripsi) > 0 and pd.notna(deskripsi[0]):
+                    if deskripsi:
                         st.write("**Deskripsi KBLI:**")
-                        st.write(deskripsi[0])
+                        st.write(deskripsi)
                     else:
                         st.write("**Deskripsi:** Tidak tersedia")
         
+        paginated_list(
+            filtered_single,
+            key="list_single",
+            render_item=render_single_cluster,
+            compact_columns=['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']
+        )
+        
         # DOWNLOAD DATA
         st.markdown("---")
         st.subheader("📥 Export Data")
         
-        csv_single = convert_df_to_csv(filtered_single[['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']])
-        st.download_button(
-            label="Download Data Single Cluster (CSV)",
-            data=csv_single,
-            file_name="kbli_single_cluster.csv",
-            mime="text/csv",
-            key="download_single"
-        )
+        col_format, col_export = st.columns([1, 4])
+        
+        with col_format:
+            format_single = st.selectbox("Format:", options=list(FORMAT_EKSPOR), key="export_format_single")
+        
+        with col_export:
+            export_button(
+                label=f"Download Data Single Cluster ({format_single})",
+                name="kbli_single_cluster",
+                build=lambda: filtered_single[['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']],
+                fmt=format_single,
+                version=versi_data,
+                filter_key=(search_single, cluster_filter, tuple(cluster_diklik)),
+                key="download_single"
+            )
         
     else:
         st.warning("Tidak ditemukan KBLI yang hanya di 1 cluster")
         st.info("Semua KBLI memiliki multiple cluster assignments")
 
+def view_hierarki():
+    kbli_hierarchy = snapshot.hierarchy
+    kbli_index = snapshot.kbli_index
+    st.header("🧭 Hierarki KBLI")
+    st.caption("Telusuri KBLI per Kategori, Golongan Pokok (2 digit), Golongan (3 digit) dan Subgolongan (4 digit)")
+    
+    # Pilih kategori lalu turun per tingkat prefix kode
+    col_kat, col_gp, col_gol, col_subgol = st.columns(4)
+    
+    with col_kat:
+        opsi_kategori = ["Semua"] + [f"{huruf} - {nama}" for huruf, _, _, nama in KATEGORI_KBLI]
+        pilihan_kategori = st.selectbox("Kategori:", options=opsi_kategori, key="hierarki_kategori")
+    
+    rekap_golongan_pokok = kbli_hierarchy.children('')
+    if pilihan_kategori != "Semua":
+        rekap_golongan_pokok = rekap_golongan_pokok[
+            rekap_golongan_pokok['KATEGORI'] == pilihan_kategori.split(' - ')[0]
+        ]
+    
+    prefix = ''
+    with col_gp:
+        golongan_pokok = st.selectbox(
+            "Golongan Pokok:",
+            options=["Semua"] + rekap_golongan_pokok['PREFIX'].tolist(),
+            key="hierarki_golongan_pokok"
+        )
+    if golongan_pokok != "Semua":
+        prefix = golongan_pokok
+        with col_gol:
+            golongan = st.selectbox(
+                "Golongan:",
+                options=["Semua"] + kbli_hierarchy.children(prefix)['PREFIX'].tolist(),
+                key="hierarki_golongan"
+            )
+        if golongan != "Semua":
+            prefix = golongan
+            with col_subgol:
+                subgolongan = st.selectbox(
+                    "Subgolongan:",
+                    options=["Semua"] + kbli_hierarchy.children(prefix)['PREFIX'].tolist(),
+                    key="hierarki_subgolongan"
+                )
+            if subgolongan != "Semua":
+                prefix = subgolongan
+    
+    # Rekap tingkat di bawah prefix yang dipilih
+    if prefix:
+        rekap = kbli_hierarchy.children(prefix)
+        rekap_prefix = kbli_hierarchy.rollups[len(prefix)]
+        total_prefix = rekap_prefix[rekap_prefix['PREFIX'] == prefix].iloc[0]
+    else:
+        rekap = rekap_golongan_pokok
+        total_prefix = rekap[['JUMLAH_KBLI', 'Single Cluster', 'Multi Cluster', 'Tidak Terklasifikasi']].sum()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Jumlah KBLI", int(total_prefix['JUMLAH_KBLI']))
+    with col2:
+        st.metric("Single Cluster", int(total_prefix['Single Cluster']))
+    with col3:
+        st.metric("Multi Cluster", int(total_prefix['Multi Cluster']))
+    with col4:
+        st.metric("Tidak Terklasifikasi", int(total_prefix['Tidak Terklasifikasi']))
+    
+    if len(rekap) > 0:
+        tingkat_anak = TINGKAT_HIERARKI[len(rekap['PREFIX'].iloc[0])]
+        st.subheader(f"📊 Rekap per {tingkat_anak}" + (f" di bawah {prefix}" if prefix else ""))
+        st.dataframe(rekap, use_container_width=True, height=300)
+    
+    # Daftar KBLI 5 digit di bawah prefix
+    if prefix:
+        st.subheader(f"📋 KBLI di bawah {prefix}")
+        daftar = kbli_hierarchy.under(prefix)
+        daftar.insert(1, 'JUDUL_KBLI', daftar['KODE_KBLI'].map(kbli_index.judul))
+        daftar['CLUSTER'] = daftar['KODE_KBLI'].map(lambda kode: ', '.join(kbli_index.clusters(kode)))
+        
+        def render_hierarki(row):
+            with st.expander(f"**{row['KODE_KBLI']}** - {row['JUDUL_KBLI']} ({row['STATUS']})", expanded=False):
+                st.write(f"**Cluster:** {row['CLUSTER'] or 'Tidak terkategorisasi'}")
+                deskripsi = kbli_index.deskripsi(row['KODE_KBLI'])
+                st.write(f"**Deskripsi:** {deskripsi or 'Tidak tersedia'}")
+        
+        paginated_list(
+            daftar,
+            key="list_hierarki",
+            render_item=render_hierarki,
+            compact_columns=['KODE_KBLI', 'JUDUL_KBLI', 'STATUS', 'CLUSTER']
+        )
+
+def view_perbandingan_versi():
+    st.header("🆚 Perbandingan Versi Data")
+    st.caption("Bandingkan dua workbook bertanggal (YYYYMMDD.xlsx) di folder data")
+    
+    workbooks = dated_workbooks(DATA_DIR)
+    if len(workbooks) < 2:
+        st.info("Perbandingan membutuhkan minimal dua workbook bertanggal di folder data")
+        return
+    
+    workbook_per_nama = {p.name: p for p in workbooks}
+    nama_workbook = list(workbook_per_nama)
+    col_lama, col_baru = st.columns(2)
+    with col_lama:
+        pilihan_lama = st.selectbox("Versi lama:", options=nama_workbook,
+                                    index=len(nama_workbook) - 2, key="diff_versi_lama")
+    with col_baru:
+        pilihan_baru = st.selectbox("Versi baru:", options=nama_workbook,
+                                    index=len(nama_workbook) - 1, key="diff_versi_baru")
+    if pilihan_lama == pilihan_baru:
+        st.warning("Pilih dua workbook yang berbeda")
+        return
+    
+    # Workbook hasil klasifikasi sama untuk kedua versi
+    workbook_klasifikasi = source_workbooks(DATA_DIR)[1]
+    workbooks_lama = (workbook_per_nama[pilihan_lama], workbook_klasifikasi)
+    workbooks_baru = (workbook_per_nama[pilihan_baru], workbook_klasifikasi)
+    try:
+        with st.spinner("Membandingkan versi..."):
+            diff = get_version_diff(
+                data_version(paths=workbooks_lama), data_version(paths=workbooks_baru),
+                workbooks_lama, workbooks_baru
+            )
+    except Exception as e:
+        st.error(f"Gagal membandingkan workbook: {e}")
+        return
+    
+    ringkasan = dict(diff.summary().itertuples(index=False))
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("KBLI Ditambahkan", ringkasan['KBLI ditambahkan'])
+    with col2:
+        st.metric("KBLI Dihapus", ringkasan['KBLI dihapus'])
+    with col3:
+        st.metric("KBLI Pindah Cluster", ringkasan['KBLI pindah cluster'])
+    with col4:
+        st.metric("Berubah Single/Multi", ringkasan['KBLI berubah single/multi'])
+    with col5:
+        st.metric("Pekerjaan Berubah", len(diff.pekerjaan))
+    
+    if not diff.has_changes:
+        st.success("Tidak ada perubahan antara kedua versi")
+        return
+    
+    st.subheader("📊 Perubahan KBLI")
+    if len(diff.kbli) > 0:
+        opsi_perubahan = ["Semua"] + sorted(diff.kbli['PERUBAHAN'].unique().tolist())
+        filter_perubahan = st.selectbox("Jenis perubahan:", options=opsi_perubahan, key="diff_filter_perubahan")
+        tabel_kbli = diff.kbli
+        if filter_perubahan != "Semua":
+            tabel_kbli = tabel_kbli[tabel_kbli['PERUBAHAN'] == filter_perubahan]
+        st.dataframe(tabel_kbli, use_container_width=True, height=400)
+    else:
+        st.info("Tidak ada perubahan cluster KBLI")
+    
+    st.subheader("📋 Perubahan Cluster Pekerjaan")
+    if len(diff.pekerjaan) > 0:
+        st.dataframe(diff.pekerjaan, use_container_width=True, height=300)
+    else:
+        st.info("Tidak ada perubahan cluster pekerjaan")
+    
+    if len(diff.hasil) > 0:
+        st.subheader("🔍 Perubahan Hasil Klasifikasi")
+        st.dataframe(diff.hasil, use_container_width=True, height=300)
+    
+    st.markdown("---")
+    st.subheader("📥 Export Perbandingan")
+    export_button(
+        label="Download Perbandingan (XLSX)",
+        name="kbli_perbandingan_versi",
+        build=diff.sheets,
+        fmt='XLSX',
+        version=f"{diff.versi_lama}-{diff.versi_baru}",
+        key="download_perbandingan"
+    )
+
+def view_validasi():
+    st.header("🩺 Validasi Data")
+    st.caption("Pemeriksaan kualitas data di semua sheet; baris mengikuti nomor baris Excel")
+    
+    report = snapshot.validation
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Error", len(report.errors))
+    with col2:
+        st.metric("Peringatan", len(report.warnings))
+    with col3:
+        st.metric("Total Temuan", len(report.issues))
+    
+    if report.has_errors:
+        st.error("Data mengandung error; hasil di view lain bisa tidak lengkap")
+    elif len(report.issues) > 0:
+        st.warning("Data lolos validasi dengan peringatan")
+    else:
+        st.success("Tidak ada temuan")
+    
+    st.subheader("📊 Ringkasan Cek")
+    st.dataframe(report.summary(), use_container_width=True)
+    
+    if len(report.issues) == 0:
+        return
+    
+    st.subheader("📋 Detail Temuan")
+    opsi_cek = ["Semua"] + report.issues['CEK'].unique().tolist()
+    filter_cek = st.selectbox("Cek:", options=opsi_cek, key="validasi_filter_cek")
+    temuan = report.issues
+    if filter_cek != "Semua":
+        temuan = temuan[temuan['CEK'] == filter_cek]
+    st.dataframe(temuan, use_container_width=True, height=400)
+    
+    st.markdown("---")
+    st.subheader("📥 Export Validasi")
+    export_button(
+        label="Download Laporan Validasi (XLSX)",
+        name="kbli_validasi",
+        build=report.sheets,
+        fmt='XLSX',
+        version=versi_data,
+        key="download_validasi"
+    )
+
+def view_query_sql():
+    st.header("🧮 Query SQL")
+    st.caption("Query SELECT ad-hoc atas data yang sedang dimuat (DuckDB); hasil di-cache per versi data")
+    
+    with st.expander("📚 Tabel dan kolom"):
+        st.dataframe(snapshot.sql_engine.schema_frame(), use_container_width=True, height=300)
+    
+    # Nilai awal lewat session_state (bukan value=) karena keep_widget_state menulis kunci ini
+    st.session_state.setdefault("sql_query", CONTOH_QUERY)
+    st.session_state.setdefault("sql_limit", SQL_DEFAULT_LIMIT)
+    st.session_state.setdefault("sql_timeout", SQL_DEFAULT_TIMEOUT)
+    query = st.text_area("Query:", height=180, key="sql_query")
+    col1, col2 = st.columns(2)
+    with col1:
+        limit = st.number_input("Batas baris:", min_value=1, max_value=SQL_MAX_LIMIT,
+                                step=100, key="sql_limit")
+    with col2:
+        timeout = st.number_input("Batas waktu (detik):", min_value=1.0, max_value=60.0,
+                                  step=1.0, key="sql_timeout")
+    
+    try:
+        with perf.span("Query SQL"):
+            hasil = run_query(snapshot, query, limit=int(limit), timeout=timeout)
+    except QueryError as e:
+        st.error(str(e))
+        return
+    
+    keterangan_cache = "dari cache" if hasil.cached else f"{hasil.seconds * 1000:.1f} ms"
+    st.caption(f"{len(hasil.frame)} baris, {len(hasil.frame.columns)} kolom ({keterangan_cache})")
+    if hasil.truncated:
+        st.warning(f"Hasil dipotong pada {int(limit)} baris; naikkan batas baris atau tambahkan agregasi")
+    st.dataframe(hasil.frame, use_container_width=True, height=400)
+    
+    export_button(
+        label="Download Hasil Query (CSV)",
+        name="kbli_query_sql",
+        build=lambda: hasil.frame,
+        fmt='CSV',
+        version=versi_data,
+        filter_key=(hasil.sql, int(limit)),
+        key="download_query_sql"
+    )
+
+# Navigasi view
+VIEWS = {
+    "📈 KBLI Berdasarkan Cluster": view_kbli_cluster,
+    "📋 List Pekerjaan UMKM": view_pekerjaan_umkm,
+    "❓ Tidak Terklasifikasi": view_tidak_terklasifikasi,
+    "🔍 Pencarian KBLI": view_pencarian,
+    "🔄 KBLI Multi-Cluster": view_multi_cluster,
+    "✅ KBLI Single Cluster": view_single_cluster,
+    "🧭 Hierarki KBLI": view_hierarki,
+    "🆚 Perbandingan Versi": view_perbandingan_versi,
+    "🩺 Validasi Data": view_validasi,
+    "🧮 Query SQL": view_query_sql,
+}
+
+# Filter, halaman dan pilihan di view lain tetap tersimpan saat berpindah view
+keep_widget_state(exclude=(VIEW_KEY,))
+
+view_aktif = st.radio(
+    "Tampilan:",
+    options=list(VIEWS),
+    horizontal=True,
+    key=VIEW_KEY,
+    label_visibility="collapsed"
+)
+st.markdown("---")
+
+timer.label = view_aktif
+with perf.span(view_aktif, perf.KIND_VIEW):
+    VIEWS[view_aktif]()
+
 # Footer
 st.markdown("---")
 st.markdown("**Dashboard KBLI Cluster** - Menampilkan klasifikasi KBLI berdasarkan cluster dan pekerjaan tidak terklasifikasi")
+
+# Tutup timer rerun lalu tampilkan waterfall-nya di panel sidebar
+profil = perf.end_rerun()
+with panel_performa:
+    perf_panel(timer, profil, snapshot.debug_stats)
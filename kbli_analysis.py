@@ -0,0 +1,225 @@
+"""
+Analisis assignment cluster KBLI.
+
+Semua turunan (multi-cluster, single-cluster, metrik header) dihitung dari
+satu pass berkelompok atas data 'KBLI berdasarkan Cluster' yang sudah dibersihkan.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+KOLOM_ASSIGNMENT = ['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTERS', 'JUMLAH_CLUSTER']
+KOLOM_MULTI = ['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTERS', 'JUMLAH_CLUSTER', 'DETAIL_CLUSTER']
+KOLOM_SINGLE = ['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER', 'KETERANGAN']
+
+
+def cluster_assignments(df_clean):
+    """
+    Satu pass berkelompok: daftar cluster, jumlah cluster dan judul pertama per KBLI.
+
+    Urutan hasil sama dengan value_counts(): jumlah cluster menurun, lalu urutan
+    kemunculan pertama di sheet.
+    """
+    if len(df_clean) == 0:
+        return pd.DataFrame(columns=KOLOM_ASSIGNMENT)
+
+    kode_id, kode_unik = pd.factorize(df_clean['KODE_KBLI'], sort=False)
+    urutan = np.argsort(kode_id, kind='stable')
+    jumlah = np.bincount(kode_id, minlength=len(kode_unik))
+    awal = np.concatenate(([0], np.cumsum(jumlah)[:-1]))
+
+    clusters = df_clean['CLUSTER'].to_numpy(dtype=object)[urutan]
+    judul = df_clean['JUDUL_KBLI'].to_numpy(dtype=object)[urutan]
+
+    hasil = pd.DataFrame({
+        'KODE_KBLI': np.asarray(kode_unik, dtype=object),
+        'JUDUL_KBLI': judul[awal],
+        'CLUSTERS': [part.tolist() for part in np.split(clusters, awal[1:])],
+        'JUMLAH_CLUSTER': jumlah,
+    })
+    return hasil.sort_values('JUMLAH_CLUSTER', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def multi_cluster_kbli(assignments):
+    """KBLI yang muncul di lebih dari 1 cluster"""
+    multi = assignments[assignments['JUMLAH_CLUSTER'] > 1].reset_index(drop=True)
+    multi = multi.assign(DETAIL_CLUSTER=multi['CLUSTERS'].map(', '.join))
+    return multi[KOLOM_MULTI]
+
+
+def single_cluster_kbli(assignments):
+    """KBLI yang hanya muncul di 1 cluster"""
+    single = assignments[assignments['JUMLAH_CLUSTER'] == 1].reset_index(drop=True)
+    single = single.assign(
+        CLUSTER=single['CLUSTERS'].str[0],
+        KETERANGAN='Single Cluster',
+    )
+    return single[KOLOM_SINGLE]
+
+
+def cluster_count_distribution(df_multi):
+    """Jumlah KBLI per jumlah cluster (sumbu chart distribusi multi-cluster)"""
+    dist = df_multi['JUMLAH_CLUSTER'].value_counts().sort_index()
+    return pd.DataFrame({'JUMLAH_CLUSTER': dist.index.to_numpy(), 'JUMLAH_KBLI': dist.to_numpy()})
+
+
+def cluster_distribution(df_single):
+    """Jumlah KBLI per cluster, urut dari yang terbanyak"""
+    dist = df_single['CLUSTER'].value_counts()
+    return pd.DataFrame({'CLUSTER': dist.index.to_numpy(dtype=object), 'JUMLAH_KBLI': dist.to_numpy()})
+
+
+def changed_assignments(old_assignments, new_assignments):
+    """Kode KBLI yang himpunan clusternya berbeda antara dua hasil cluster_assignments (termasuk kode baru/hilang)"""
+    def kunci(assignments):
+        return pd.Series(
+            ['\x1f'.join(sorted(map(str, clusters))) for clusters in assignments['CLUSTERS']],
+            index=assignments['KODE_KBLI'].to_numpy(dtype=object),
+            dtype=object,
+        )
+
+    lama, baru = kunci(old_assignments).align(kunci(new_assignments), join='outer')
+    return lama.index[lama.ne(baru)].tolist()
+
+
+def _factorize_clusters(data):
+    """Id cluster per baris dan label cluster tersortir"""
+    return pd.factorize(data['CLUSTER'], sort=True)
+
+
+class ClusterCooccurrence:
+    """
+    Jumlah kemunculan bersama pasangan cluster pada KBLI yang sama.
+
+    Dihitung sebagai perkalian matriks sparse G = M^T M, dengan M matriks
+    insiden KBLI x cluster. Hasilnya sama dengan menghitung semua
+    combinations(sorted(clusters), 2) per KBLI, tanpa membentuk daftar pasangan.
+    """
+
+    def __init__(self, clusters, counts):
+        self.clusters = clusters
+        # Segitiga atas (termasuk diagonal) dari matriks pasangan, format COO
+        self._counts = counts
+        self._pairs = None
+
+    @classmethod
+    def from_frame(cls, df_clean):
+        """Bangun dari data 'KBLI berdasarkan Cluster' yang sudah dibersihkan"""
+        data = df_clean.dropna(subset=['CLUSTER'])
+        kode_id, _ = pd.factorize(data['KODE_KBLI'])
+        cluster_id, clusters = _factorize_clusters(data)
+        n_kode = int(kode_id.max()) + 1 if len(kode_id) else 0
+
+        # Baris duplikat (kode, cluster) dijumlahkan, sama seperti di daftar CLUSTERS
+        incidence = sparse.csr_matrix(
+            (np.ones(len(data), dtype=np.int64), (kode_id, cluster_id)),
+            shape=(n_kode, len(clusters)),
+        )
+        gram = (incidence.T @ incidence).tocoo()
+
+        # Diagonal: pasangan (A, A) dari cluster yang tercatat ganda, C(n, 2) per KBLI
+        kuadrat = np.asarray(incidence.multiply(incidence).sum(axis=0)).ravel()
+        total = np.asarray(incidence.sum(axis=0)).ravel()
+        diagonal = (kuadrat - total) // 2
+
+        atas = gram.row < gram.col
+        rows = np.concatenate([gram.row[atas], np.arange(len(clusters))])
+        cols = np.concatenate([gram.col[atas], np.arange(len(clusters))])
+        values = np.concatenate([gram.data[atas], diagonal])
+        ada = values > 0
+        counts = sparse.coo_matrix(
+            (values[ada], (rows[ada], cols[ada])),
+            shape=(len(clusters), len(clusters)),
+        )
+        return cls(np.asarray(clusters, dtype=object), counts)
+
+    @classmethod
+    def from_pair_counts(cls, clusters, counts):
+        """Bangun dari Series jumlah per pasangan (index CLUSTER_A, CLUSTER_B)"""
+        clusters = np.asarray(clusters, dtype=object)
+        counts = counts[counts > 0]
+        posisi = pd.Index(clusters)
+        rows = posisi.get_indexer(counts.index.get_level_values(0))
+        cols = posisi.get_indexer(counts.index.get_level_values(1))
+        # Simpan di segitiga atas menurut urutan clusters
+        rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+        matrix = sparse.coo_matrix(
+            (counts.to_numpy(dtype=np.int64), (rows, cols)),
+            shape=(len(clusters), len(clusters)),
+        )
+        matrix.sum_duplicates()
+        return cls(clusters, matrix)
+
+    def pair_counts(self):
+        """Jumlah per pasangan sebagai Series dengan index (CLUSTER_A, CLUSTER_B), A <= B"""
+        a = self.clusters[self._counts.row]
+        b = self.clusters[self._counts.col]
+        tukar = a > b
+        a, b = np.where(tukar, b, a), np.where(tukar, a, b)
+        return pd.Series(
+            self._counts.data.astype(np.int64),
+            index=pd.MultiIndex.from_arrays([a, b], names=['CLUSTER_A', 'CLUSTER_B']),
+        )
+
+    def updated(self, removed_rows, added_rows, df_clean):
+        """
+        Matriks pasangan baru setelah assignment sebagian KBLI berubah.
+
+        removed_rows / added_rows adalah semua baris lama / baru dari KBLI yang
+        berubah. Karena G = M^T M adalah jumlah kontribusi per KBLI, cukup
+        G' = G - G(lama) + G(baru); KBLI yang tidak berubah tidak dihitung ulang.
+        """
+        counts = self.pair_counts()
+        counts = counts.sub(ClusterCooccurrence.from_frame(removed_rows).pair_counts(), fill_value=0)
+        counts = counts.add(ClusterCooccurrence.from_frame(added_rows).pair_counts(), fill_value=0)
+        _, clusters = _factorize_clusters(df_clean.dropna(subset=['CLUSTER']))
+        return ClusterCooccurrence.from_pair_counts(clusters, counts)
+
+    def __len__(self):
+        return self._counts.nnz
+
+    def pairs(self):
+        """Tabel semua pasangan cluster, urut dari yang paling sering muncul"""
+        if self._pairs is not None:
+            return self._pairs
+        counts = self._counts
+        hasil = pd.DataFrame({
+            'CLUSTER_A': self.clusters[counts.row],
+            'CLUSTER_B': self.clusters[counts.col],
+            'Jumlah_Pasangan': counts.data,
+        })
+        hasil = hasil.sort_values(
+            ['Jumlah_Pasangan', 'CLUSTER_A', 'CLUSTER_B'],
+            ascending=[False, True, True],
+        ).reset_index(drop=True)
+        hasil.insert(0, 'Cluster Pair', hasil['CLUSTER_A'] + ' & ' + hasil['CLUSTER_B'])
+        self._pairs = hasil
+        return hasil
+
+    def top_pairs(self, k):
+        """k pasangan cluster teratas"""
+        return self.pairs().head(k)
+
+    def top_pairs_with_others(self, k, label='Lainnya'):
+        """
+        k pasangan teratas ditambah satu baris gabungan untuk sisanya.
+
+        Baris gabungan berlabel 'Lainnya (n pasangan)' dan hanya ditambahkan
+        jika jumlah pasangan lebih dari k, sehingga ukuran chart tetap terbatas.
+        """
+        pairs = self.pairs()[['Cluster Pair', 'Jumlah_Pasangan']]
+        if len(pairs) <= k:
+            return pairs
+        sisa = pairs.iloc[k:]
+        lainnya = pd.DataFrame({
+            'Cluster Pair': [f"{label} ({len(sisa)} pasangan)"],
+            'Jumlah_Pasangan': [int(sisa['Jumlah_Pasangan'].sum())],
+        })
+        return pd.concat([pairs.head(k), lainnya], ignore_index=True)
+
+    def matrix_frame(self):
+        """Matriks pasangan simetris sebagai DataFrame, untuk heatmap"""
+        atas = self._counts.toarray()
+        dense = atas + atas.T - np.diag(np.diag(atas))
+        return pd.DataFrame(dense, index=self.clusters, columns=self.clusters)
+
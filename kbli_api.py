@@ -0,0 +1,468 @@
+"""
+API HTTP JSON lokal atas data cluster KBLI.
+
+Memakai DatasetSnapshot yang sama dengan dashboard, jadi semua lookup
+dijawab dari indeks di memori. Respons GET di-cache per versi data dan
+dikirim dengan header ETag / X-Data-Version; klien yang mengirim
+If-None-Match dengan versi yang sama mendapat 304 tanpa body.
+
+Endpoint:
+    GET  /version
+    GET  /kbli/{kode}
+    POST /kbli                   {"codes": ["47111", ...]}
+    GET  /search?q=kopi&limit=20&fields=kode,judul
+    GET  /clusters
+    GET  /clusters/{nama}/kbli
+    GET  /multi-cluster
+    POST /classify               {"jobs": ["warung kopi", ...], "top_k": 3}
+
+Permintaan /classify yang datang bersamaan digabung menjadi satu batch
+sehingga perkalian matriks TF-IDF dilakukan sekali untuk semuanya.
+
+Contoh:
+    python kbli_api.py --port 8502
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from kbli_classifier import AMBANG_DITEMUKAN, DEFAULT_TOP_K, KbliMatcher, tingkat_kecocokan
+from kbli_index import STATUS_MULTI, STATUS_SINGLE, STATUS_TIDAK_TERKLASIFIKASI, kategori_kbli
+from kbli_search import SEMUA_FIELD
+from kbli_reload import DataWatcher, SnapshotStore
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+# Batas isi satu permintaan batch
+MAX_BATCH_CODES = 10000
+MAX_BATCH_JOBS = 5000
+MAX_TOP_K = 20
+# Jendela tunggu (detik) dan ukuran maksimum penggabungan permintaan /classify
+BATCH_WINDOW = 0.005
+MAX_BATCH_SIZE = 5000
+# Tabel snapshot yang dihitung saat start
+PREWARM = ('kbli_index', 'katalog', 'search_index', 'cluster_members', 'multi_cluster')
+# Jumlah respons GET yang disimpan (LRU)
+RESPONSE_CACHE_SIZE = 4096
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, set)):
+        return list(value)
+    raise TypeError(f"Tidak bisa diubah ke JSON: {type(value).__name__}")
+
+
+def dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def _status(clusters):
+    if len(clusters) == 0:
+        return STATUS_TIDAK_TERKLASIFIKASI
+    return STATUS_SINGLE if len(clusters) == 1 else STATUS_MULTI
+
+
+class KbliService:
+    """Jawaban API (dict/list biasa) untuk satu snapshot; tanpa HTTP"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    @cached_property
+    def matcher(self):
+        # Model TF-IDF hanya dibangun jika /classify dipakai
+        return KbliMatcher(self.snapshot.kbli_full)
+
+    def kbli(self, kode):
+        entry = self.snapshot.kbli_index.get(kode)
+        if entry is None:
+            return None
+        return {
+            'kode': entry.kode,
+            'judul': entry.judul,
+            'deskripsi': entry.deskripsi,
+            'kategori': kategori_kbli(entry.kode),
+            'clusters': list(entry.clusters),
+            'status': _status(entry.clusters),
+        }
+
+    def kbli_many(self, codes):
+        return {str(kode): self.kbli(kode) for kode in codes}
+
+    def search(self, query, limit=DEFAULT_LIMIT, fields=SEMUA_FIELD):
+        hasil = self.snapshot.search_index.search(query, fields=fields)
+        katalog = self.snapshot.katalog
+        kode = katalog['KODE KBLI'].to_numpy()
+        judul = katalog['JUDUL KBLI'].to_numpy()
+        return {
+            'query': query,
+            'total': hasil.total,
+            'results': [
+                {
+                    'kode': kode[pos],
+                    'judul': judul[pos],
+                    'skor': float(skor),
+                    'clusters': self.snapshot.kbli_index.clusters(kode[pos]),
+                }
+                for pos, skor in zip(hasil.positions[:limit], hasil.scores[:limit])
+            ],
+        }
+
+    def clusters(self):
+        return [
+            {'cluster': cluster, 'jumlah_kbli': len(kode)}
+            for cluster, kode in self.snapshot.cluster_members.items()
+        ]
+
+    def cluster_kbli(self, nama):
+        members = self.snapshot.cluster_members.get(nama)
+        if members is None:
+            return None
+        index = self.snapshot.kbli_index
+        return {
+            'cluster': nama,
+            'total': len(members),
+            'kbli': [{'kode': kode, 'judul': index.judul(kode)} for kode in members],
+        }
+
+    def multi_cluster(self):
+        df = self.snapshot.multi_cluster
+        return {
+            'total': len(df),
+            'kbli': [
+                {'kode': kode, 'judul': judul, 'clusters': list(clusters), 'jumlah_cluster': int(jumlah)}
+                for kode, judul, clusters, jumlah in zip(
+                    df['KODE_KBLI'], df['JUDUL_KBLI'], df['CLUSTERS'], df['JUMLAH_CLUSTER']
+                )
+            ],
+        }
+
+    def classify(self, jobs, top_k=DEFAULT_TOP_K):
+        """Kandidat KBLI per pekerjaan; sama dengan skor di kbli_classifier"""
+        posisi, skor, _, _ = self.matcher.score(jobs, top_k)
+        return self.classification_result(jobs, posisi, skor)
+
+    def classification_result(self, jobs, posisi, skor):
+        katalog = self.matcher.katalog
+        kode = katalog['KODE KBLI'].to_numpy()
+        judul = katalog['JUDUL KBLI'].to_numpy()
+        tingkat = tingkat_kecocokan(skor)
+        hasil = []
+        for i, job in enumerate(jobs):
+            lolos = skor[i] >= AMBANG_DITEMUKAN
+            hasil.append({
+                'pekerjaan': job,
+                'kandidat': [
+                    {
+                        'kode': kode[pos],
+                        'judul': judul[pos],
+                        'skor': round(float(s), 4),
+                        'tingkat': t,
+                        'clusters': self.snapshot.kbli_index.clusters(kode[pos]),
+                    }
+                    for pos, s, t in zip(posisi[i][lolos], skor[i][lolos], tingkat[i][lolos])
+                ],
+            })
+        return hasil
+
+
+class ClassifyBatcher:
+    """
+    Gabungkan permintaan /classify yang datang hampir bersamaan.
+
+    Permintaan pertama menunggu paling lama BATCH_WINDOW detik untuk
+    permintaan lain, lalu semua pekerjaan diskor dalam satu panggilan
+    matcher.score di thread terpisah (event loop tetap melayani lookup).
+    """
+
+    def __init__(self, window=BATCH_WINDOW, max_size=MAX_BATCH_SIZE):
+        self.window = window
+        self.max_size = max_size
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, service, jobs, top_k):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((service, jobs, top_k, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        size = len(batch[0][1])
+        loop = asyncio.get_running_loop()
+        batas = loop.time() + self.window
+        while size < self.max_size:
+            sisa = batas - loop.time()
+            if sisa <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), sisa)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[1])
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Error apa pun diteruskan ke permintaan batch ini; worker tetap hidup
+            try:
+                await self._process(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _process(self, batch):
+        loop = asyncio.get_running_loop()
+        # Permintaan dengan snapshot berbeda (setelah reload) diskor terpisah
+        per_service = OrderedDict()
+        for item in batch:
+            per_service.setdefault(id(item[0]), []).append(item)
+        for items in per_service.values():
+            service = items[0][0]
+            jobs = [job for _, part, _, _ in items for job in part]
+            top_k = max(k for _, _, k, _ in items)
+            try:
+                posisi, skor, _, _ = await loop.run_in_executor(None, service.matcher.score, jobs, top_k)
+                awal = 0
+                for _, part, k, future in items:
+                    akhir = awal + len(part)
+                    if not future.done():
+                        future.set_result(service.classification_result(
+                            part, posisi[awal:akhir, :k], skor[awal:akhir, :k]
+                        ))
+                    awal = akhir
+            except Exception as e:
+                for *_, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+class ResponseCache:
+    """Cache LRU body respons GET, kunci (versi data, path + query)"""
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        body = self._data.get(key)
+        if body is not None:
+            self._data.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self._data[key] = body
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+def _int_param(request, name, default, maksimum):
+    nilai = request.query_params.get(name)
+    if nilai is None:
+        return default
+    try:
+        nilai = int(nilai)
+    except ValueError:
+        raise ApiError(400, f"Parameter '{name}' harus bilangan bulat")
+    if not 1 <= nilai <= maksimum:
+        raise ApiError(400, f"Parameter '{name}' harus antara 1 dan {maksimum}")
+    return nilai
+
+
+async def _json_body(request):
+    try:
+        return json.loads(await request.body())
+    except ValueError:
+        raise ApiError(400, "Body harus JSON")
+
+
+def _list_param(body, name, batas):
+    nilai = body.get(name) if isinstance(body, dict) else None
+    if not isinstance(nilai, list):
+        raise ApiError(400, f"Field '{name}' harus berupa list")
+    if len(nilai) > batas:
+        raise ApiError(400, f"Field '{name}' maksimal {batas} item")
+    # Hanya teks atau bilangan bulat; null, bool, float dan objek ditolak
+    if any(isinstance(v, bool) or not isinstance(v, (str, int)) for v in nilai):
+        raise ApiError(400, f"Item '{name}' harus berupa teks atau bilangan bulat")
+    return [str(v) for v in nilai]
+
+
+def build_app(get_snapshot):
+    """
+    Aplikasi ASGI; get_snapshot dipanggil per permintaan dan mengembalikan
+    DatasetSnapshot yang berlaku, sehingga versi data bisa diganti saat berjalan.
+    """
+    services = {}
+    cache = ResponseCache()
+    batcher = ClassifyBatcher()
+
+    def current_service():
+        snapshot = get_snapshot()
+        service = services.get(snapshot.version)
+        if service is None or service.snapshot is not snapshot:
+            services.clear()
+            service = services[snapshot.version] = KbliService(snapshot)
+        return service
+
+    def respond(body, version, status=200):
+        return Response(
+            body,
+            status_code=status,
+            media_type='application/json',
+            headers={'ETag': f'"{version}"', 'X-Data-Version': version},
+        )
+
+    def error(e, version):
+        return Response(
+            dumps({'error': e.message}),
+            status_code=e.status,
+            media_type='application/json',
+            headers={'X-Data-Version': version},
+        )
+
+    def cached_get(build):
+        """
+        Handler GET dengan ETag, 304 dan cache body per versi data.
+
+        Resource dicari lebih dulu: 304 hanya untuk resource yang ada, error
+        (mis. 404) selalu dikembalikan apa adanya.
+        """
+        async def endpoint(request):
+            service = current_service()
+            version = service.version
+            key = (version, request.url.path, request.url.query)
+            body = cache.get(key)
+            if body is None:
+                try:
+                    data = build(service, request)
+                except ApiError as e:
+                    return error(e, version)
+                body = dumps(data)
+                cache.put(key, body)
+            if request.headers.get('if-none-match') in (f'"{version}"', f'W/"{version}"'):
+                return Response(status_code=304, headers={'ETag': f'"{version}"', 'X-Data-Version': version})
+            return respond(body, version)
+        return endpoint
+
+    def get_version(service, request):
+        return {'version': service.version}
+
+    def get_kbli(service, request):
+        data = service.kbli(request.path_params['kode'])
+        if data is None:
+            raise ApiError(404, f"KBLI {request.path_params['kode']} tidak ditemukan")
+        return data
+
+    def get_search(service, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ApiError(400, "Parameter 'q' wajib diisi")
+        fields = tuple(f for f in request.query_params.get('fields', ','.join(SEMUA_FIELD)).split(',') if f)
+        if not fields or any(f not in SEMUA_FIELD for f in fields):
+            raise ApiError(400, f"Parameter 'fields' hanya boleh berisi {', '.join(SEMUA_FIELD)}")
+        return service.search(query, _int_param(request, 'limit', DEFAULT_LIMIT, MAX_LIMIT), fields)
+
+    def get_clusters(service, request):
+        return {'clusters': service.clusters()}
+
+    def get_cluster_kbli(service, request):
+        data = service.cluster_kbli(request.path_params['nama'])
+        if data is None:
+            raise ApiError(404, f"Cluster '{request.path_params['nama']}' tidak ditemukan")
+        return data
+
+    def get_multi_cluster(service, request):
+        return service.multi_cluster()
+
+    async def post_kbli(request):
+        service = current_service()
+        try:
+            codes = _list_param(await _json_body(request), 'codes', MAX_BATCH_CODES)
+        except ApiError as e:
+            return error(e, service.version)
+        return respond(dumps({'results': service.kbli_many(codes)}), service.version)
+
+    async def post_classify(request):
+        service = current_service()
+        try:
+            body = await _json_body(request)
+            jobs = _list_param(body, 'jobs', MAX_BATCH_JOBS)
+            top_k = body.get('top_k', DEFAULT_TOP_K)
+            if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= MAX_TOP_K:
+                raise ApiError(400, f"Field 'top_k' harus antara 1 dan {MAX_TOP_K}")
+        except ApiError as e:
+            return error(e, service.version)
+        hasil = await batcher.submit(service, jobs, top_k) if jobs else []
+        return respond(dumps({'results': hasil}), service.version)
+
+    routes = [
+        Route('/version', cached_get(get_version)),
+        Route('/kbli/{kode}', cached_get(get_kbli)),
+        Route('/kbli', post_kbli, methods=['POST']),
+        Route('/search', cached_get(get_search)),
+        Route('/clusters', cached_get(get_clusters)),
+        Route('/clusters/{nama}/kbli', cached_get(get_cluster_kbli)),
+        Route('/multi-cluster', cached_get(get_multi_cluster)),
+        Route('/classify', post_classify, methods=['POST']),
+    ]
+    return Starlette(routes=routes)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="API HTTP JSON lokal untuk data cluster KBLI")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--no-reload', action='store_true',
+                        help="Jangan memantau perubahan workbook di direktori data")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Indeks lookup dibangun sebelum server menerima permintaan; workbook yang
+    # berubah dimuat ulang di latar belakang tanpa menghentikan server
+    store = SnapshotStore(warm=PREWARM)
+    watcher = None if args.no_reload else DataWatcher(store).start()
+    print(f"Data versi {store.current().version}, melayani di http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        uvicorn.run(build_app(store.current), host=args.host, port=args.port, log_level='warning')
+    finally:
+        if watcher is not None:
+            watcher.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
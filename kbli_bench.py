@@ -0,0 +1,452 @@
+"""
+Benchmark komputasi dashboard pada data sintetis berbagai ukuran.
+
+Workbook sintetis dibangun dari workbook asli dengan skema yang sama
+('KBLI berdasarkan Cluster', 'KBLI', 'Cluster Pekerjaan', 'Hasil Klasifikasi'):
+setiap salinan ke-i menggeser kode KBLI dan memberi akhiran pada nama
+cluster, judul dan pekerjaan, sehingga skala N berisi kira-kira N kali
+jumlah baris, cluster dan pasangan cluster. Jumlah baris per sheet dibatasi
+batas baris Excel, dan kode KBLI tetap 5 digit (maksimal 100.000 kode unik).
+
+Setiap skala dijalankan di proses terpisah (KBLI_DATA_DIR/KBLI_CACHE_DIR
+menunjuk ke data sintetisnya) dan mengukur:
+- pemuatan workbook (parse Excel) dan pemuatan dari cache Parquet,
+- setiap tabel turunan DatasetSnapshot dan operasi yang dipakai view,
+- setiap view dashboard lewat streamlit AppTest (run pertama dan berikutnya).
+Waktu diambil dari beberapa pengulangan; memori adalah puncak alokasi
+tracemalloc dari satu run terpisah.
+
+Contoh:
+    python kbli_bench.py --scales 1,10 --output bench.json
+    python kbli_bench.py --scales 1,10 --baseline bench_baseline.json
+    python kbli_bench.py --scales 1,10 --baseline bench_baseline.json --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kbli_data import (
+    CACHE_DIR,
+    DATA_DIR,
+    SHEET_CLUSTER_PEKERJAAN,
+    SHEET_HASIL_KLASIFIKASI,
+    SHEET_KBLI,
+    SHEET_KBLI_CLUSTER,
+    WORKBOOK_KLASIFIKASI,
+    WORKBOOK_UTAMA,
+    compact_tables,
+    data_version,
+    load_workbook_sheets,
+    source_workbooks,
+)
+from kbli_export import write_xlsx
+
+BENCH_DIR = Path('.kbli_bench')
+DEFAULT_SCALES = (1, 10, 100, 1000)
+DEFAULT_REPEAT = 3
+# Selisih relatif yang masih dianggap wajar terhadap baseline
+DEFAULT_TOLERANCE = 0.25
+# Selisih absolut di bawah ini tidak dianggap regresi (noise pengukuran)
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_MB = 1.0
+
+# Batas baris data per sheet Excel (di luar header)
+EXCEL_MAX_ROWS = 1048575
+RUANG_KODE = 100000
+# Pergeseran kode per salinan; relatif prima terhadap RUANG_KODE
+GESER_KODE = 7919
+CLUSTER_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+APP_FILE = Path(__file__).with_name('cluster_pekerjaan.py')
+
+
+# Data sintetis ---------------------------------------------------------------
+
+def _geser_kode(values, salinan):
+    """Geser kode numerik sebesar salinan * GESER_KODE; nilai non-angka dibiarkan"""
+    angka = pd.to_numeric(values, errors='coerce')
+    geser = (angka + salinan * GESER_KODE) % RUANG_KODE
+    if values.dtype == object:
+        teks = geser.map(lambda v: v if pd.isna(v) else f"{int(v):05d}")
+        return teks.where(angka.notna(), values)
+    if values.dtype.kind in 'iu':
+        return geser.astype(values.dtype)
+    return geser
+
+
+def _akhiran(values, salinan, kecuali=()):
+    """Tambah akhiran ' {salinan}' pada teks (salinan pertama dibiarkan)"""
+    if salinan == 0:
+        return values
+    teks = values.astype(object)
+    hasil = teks.map(lambda v: v if pd.isna(v) else f"{v} {salinan + 1}")
+    return hasil.where(~teks.isin(kecuali), teks)
+
+
+def _replikasi(df, scale, ubah):
+    """scale salinan df (diubah per salinan), berhenti begitu EXCEL_MAX_ROWS baris tercapai"""
+    salinan = []
+    sisa = EXCEL_MAX_ROWS
+    for i in range(scale):
+        if sisa <= 0 or (i > 0 and len(df) == 0):
+            break
+        # Salinan terakhir hanya dibuat dari baris yang masih muat
+        bagian = ubah(df.head(sisa), i)
+        salinan.append(bagian)
+        sisa -= len(bagian)
+    return pd.concat(salinan, ignore_index=True)
+
+
+def synthetic_sheets(base, scale):
+    """
+    Sheet sintetis skala scale dari sheet asli.
+
+    base berisi keempat sheet sumber seperti hasil load_workbook_sheets.
+    Mengembalikan (sheet workbook utama, sheet workbook klasifikasi).
+    """
+    def kbli_cluster(df, i):
+        return df.assign(
+            CLUSTER=_akhiran(df['CLUSTER'], i),
+            KODE_KBLI=_geser_kode(df['KODE_KBLI'], i),
+            JUDUL_KBLI=_akhiran(df['JUDUL_KBLI'], i),
+        )
+
+    def kbli_full(df, i):
+        return df.assign(**{
+            'KODE KBLI': _geser_kode(df['KODE KBLI'], i),
+            'JUDUL KBLI': _akhiran(df['JUDUL KBLI'], i),
+        })
+
+    def pekerjaan(df, i):
+        return df.assign(**{
+            'List Pekerjaan UMKM': _akhiran(df['List Pekerjaan UMKM'], i),
+            'CLUSTER': _akhiran(df['CLUSTER'], i, kecuali=(CLUSTER_TIDAK_TERKLASIFIKASI,)),
+        })
+
+    def hasil(df, i):
+        return df.assign(**{
+            'List Pekerjaan UMKM': _akhiran(df['List Pekerjaan UMKM'], i),
+            'KODE KBLI': _geser_kode(df['KODE KBLI'].astype(object), i),
+        })
+
+    utama = {
+        SHEET_KBLI_CLUSTER: _replikasi(base[SHEET_KBLI_CLUSTER], scale, kbli_cluster),
+        SHEET_CLUSTER_PEKERJAAN: _replikasi(base[SHEET_CLUSTER_PEKERJAAN], scale, pekerjaan),
+        SHEET_KBLI: _replikasi(base[SHEET_KBLI], scale, kbli_full),
+    }
+    klasifikasi = {SHEET_HASIL_KLASIFIKASI: _replikasi(base[SHEET_HASIL_KLASIFIKASI], scale, hasil)}
+    return utama, klasifikasi
+
+
+def base_sheets(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    workbook_utama, workbook_klasifikasi = source_workbooks(data_dir)
+    sheets = load_workbook_sheets(
+        workbook_utama, [SHEET_KBLI_CLUSTER, SHEET_KBLI, SHEET_CLUSTER_PEKERJAAN], cache_dir
+    )
+    sheets.update(load_workbook_sheets(workbook_klasifikasi, [SHEET_HASIL_KLASIFIKASI], cache_dir))
+    return sheets
+
+
+def ensure_dataset(scale, bench_dir=BENCH_DIR, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """
+    Direktori data sintetis untuk skala scale, dibangun sekali per versi data asli.
+
+    Mengembalikan (direktori, jumlah baris per sheet).
+    """
+    versi = data_version(cache_dir=cache_dir, data_dir=data_dir)
+    target = Path(bench_dir) / 'data' / f"x{scale}_{versi}"
+    info_path = target / 'rows.json'
+    if info_path.exists():
+        return target, json.loads(info_path.read_text())
+
+    utama, klasifikasi = synthetic_sheets(base_sheets(data_dir, cache_dir), scale)
+    target.mkdir(parents=True, exist_ok=True)
+    write_xlsx(utama, target / WORKBOOK_UTAMA)
+    write_xlsx(klasifikasi, target / WORKBOOK_KLASIFIKASI)
+    rows = {nama: len(df) for nama, df in {**utama, **klasifikasi}.items()}
+    info_path.write_text(json.dumps(rows))
+    return target, rows
+
+
+# Pengukuran ------------------------------------------------------------------
+
+def measure(prepare, repeat):
+    """
+    Ukur callable hasil prepare().
+
+    prepare dipanggil di luar pengukuran untuk setiap run dan mengembalikan
+    callable tanpa argumen. Mengembalikan dict waktu (min/median/run pertama)
+    dan puncak alokasi memori dalam MB.
+    """
+    waktu = []
+    for _ in range(max(repeat, 1)):
+        fn = prepare()
+        mulai = time.perf_counter()
+        fn()
+        waktu.append(time.perf_counter() - mulai)
+
+    fn = prepare()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': min(waktu),
+        'median_seconds': statistics.median(waktu),
+        'first_seconds': waktu[0],
+        'peak_mb': puncak / 2 ** 20,
+    }
+
+
+# Tabel turunan -> turunan yang sudah harus ada sebelum diukur, agar
+# waktunya hanya mencakup komputasi tabel itu sendiri
+KOMPUTASI = {
+    'kbli_index': (),
+    'katalog': ('kbli_index',),
+    'search_index': ('katalog',),
+    'hierarchy': ('kbli_index',),
+    'assignments': (),
+    'multi_cluster': ('assignments',),
+    'single_cluster': ('assignments',),
+    'multi_cluster_distribution': ('multi_cluster',),
+    'cooccurrence': (),
+    'clusters': (),
+    'cluster_members': (),
+    'summary': ('single_cluster', 'multi_cluster'),
+    'debug_stats': (),
+    'sql_engine': ('katalog',),
+    'clean_filters': (),
+    'multi_cluster_filters': ('multi_cluster',),
+    'single_cluster_filters': ('single_cluster',),
+    'pekerjaan_filters': (),
+    'job_matcher': ('cluster_members',),
+}
+
+
+def _operasi(snapshot):
+    """Operasi per interaksi view, diukur pada snapshot yang sudah hangat"""
+    from kbli_charts import DEFAULT_TOP_PAIRS
+    from kbli_diff import diff_snapshots
+    from kbli_sql import CONTOH_QUERY, run_query
+
+    return {
+        'search': lambda: snapshot.search_index.search('perdagangan eceran'),
+        'filter_by_search': lambda: snapshot.filter_by_search(snapshot.single_cluster, 'industri'),
+        'top_pairs': lambda: snapshot.cooccurrence.top_pairs_with_others(DEFAULT_TOP_PAIRS),
+        'matrix_frame': lambda: snapshot.cooccurrence.matrix_frame(),
+        'pekerjaan_by_cluster': lambda: snapshot.pekerjaan_by_cluster(snapshot.pekerjaan_clusters[0]),
+        'diff_snapshots': lambda: diff_snapshots(snapshot, snapshot),
+        'sql_rollup': lambda: run_query(snapshot, CONTOH_QUERY, cache=None),
+        'fuzzy_lookup': lambda: snapshot.job_matcher.lookup(['bengkel motr', 'jasa pencucian seragm'], 5),
+        'bitmap_filter': lambda: snapshot.multi_cluster_filters.take(
+            snapshot.multi_cluster,
+            snapshot.multi_cluster_filters.select(bucket='2 Cluster', cluster=snapshot.clusters[:3])
+        ),
+    }
+
+
+def bench_computations(repeat, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    from kbli_data import load_all
+    from kbli_snapshot import DatasetSnapshot
+
+    hasil = {}
+
+    def load_workbook():
+        # Cache kosong setiap run: parse Excel penuh
+        tmp = tempfile.TemporaryDirectory(prefix='kbli_bench_')
+        fn = lambda: load_all(Path(tmp.name), data_dir)
+        fn.tmp = tmp
+        return fn
+
+    hasil['load_workbook'] = measure(load_workbook, repeat)
+    load_all(cache_dir, data_dir)
+    hasil['load_cache'] = measure(lambda: lambda: load_all(cache_dir, data_dir), repeat)
+
+    sheets = load_all(cache_dir, data_dir)
+    hasil['compact_tables'] = measure(lambda: lambda: compact_tables(*sheets), repeat)
+
+    versi = data_version(cache_dir=cache_dir, data_dir=data_dir)
+    hangat = DatasetSnapshot(versi, compact_tables(*sheets))
+    hangat.warm(*KOMPUTASI)
+
+    for nama, prasyarat in KOMPUTASI.items():
+        def prepare(nama=nama, prasyarat=prasyarat):
+            snapshot = DatasetSnapshot(versi, hangat.tables)
+            for p in prasyarat:
+                snapshot.__dict__[p] = hangat.__dict__[p]
+            return lambda: getattr(snapshot, nama)
+        hasil[nama] = measure(prepare, repeat)
+
+    for nama, fn in _operasi(hangat).items():
+        hasil[nama] = measure(lambda fn=fn: fn, repeat)
+    return hasil
+
+
+def bench_views(repeat):
+    """Waktu dan memori setiap view dashboard lewat AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    hasil = {}
+    at = AppTest.from_file(str(APP_FILE), default_timeout=600)
+    mulai = time.perf_counter()
+    at.run()
+    hasil['app_first_run'] = {'seconds': time.perf_counter() - mulai}
+    if at.exception:
+        raise RuntimeError(f"Dashboard gagal dijalankan: {at.exception[0].value}")
+
+    for view in at.radio(key='view_aktif').options:
+        def prepare(view=view):
+            return lambda: at.radio(key='view_aktif').set_value(view).run()
+        ukuran = measure(prepare, repeat)
+        if at.exception:
+            raise RuntimeError(f"View {view} gagal: {at.exception[0].value}")
+        hasil[f"view:{view}"] = ukuran
+    return hasil
+
+
+def run_worker(repeat, skip_views):
+    """Jalankan semua benchmark untuk data di KBLI_DATA_DIR (dipanggil di subprocess)"""
+    hasil = {'compute': bench_computations(repeat)}
+    if not skip_views:
+        hasil['view'] = bench_views(repeat)
+    # ru_maxrss dalam KB di Linux
+    hasil['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return hasil
+
+
+def run_scale(scale, repeat, skip_views, bench_dir=BENCH_DIR):
+    """Bangun data skala scale lalu ukur di proses terpisah"""
+    data_dir, rows = ensure_dataset(scale, bench_dir)
+    env = dict(
+        os.environ,
+        KBLI_DATA_DIR=str(data_dir.resolve()),
+        KBLI_CACHE_DIR=str((data_dir / 'cache').resolve()),
+    )
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--worker', '--repeat', str(repeat)]
+    if skip_views:
+        cmd.append('--skip-views')
+    proses = subprocess.run(
+        cmd, env=env, cwd=str(APP_FILE.parent), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if proses.returncode != 0:
+        raise RuntimeError(f"Benchmark skala {scale} gagal:\n{proses.stderr[-2000:]}")
+    hasil = json.loads(proses.stdout.strip().splitlines()[-1])
+    hasil['rows'] = rows
+    return hasil
+
+
+# Hasil dan baseline ----------------------------------------------------------
+
+def flatten(results):
+    """Baris (scale, group, name, metrik...) dari hasil JSON"""
+    baris = []
+    for scale, per_skala in results['scales'].items():
+        for group in ('compute', 'view'):
+            for name, metrik in per_skala.get(group, {}).items():
+                baris.append(dict(scale=int(scale), group=group, name=name, **metrik))
+    return pd.DataFrame(baris)
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Bandingkan hasil dengan baseline.
+
+    Mengembalikan DataFrame per benchmark yang ada di keduanya, dengan rasio
+    waktu/memori dan kolom REGRESI.
+    """
+    kunci = ['scale', 'group', 'name']
+    sekarang = flatten(results)
+    dasar = flatten(baseline)
+    if len(sekarang) == 0 or len(dasar) == 0:
+        return pd.DataFrame(columns=kunci + ['REGRESI'])
+    gabung = sekarang.merge(dasar, on=kunci, suffixes=('', '_baseline'))
+    if 'peak_mb' not in gabung:
+        gabung['peak_mb'] = gabung['peak_mb_baseline'] = np.nan
+    gabung['rasio_waktu'] = gabung['seconds'] / gabung['seconds_baseline']
+    gabung['rasio_memori'] = gabung['peak_mb'] / gabung['peak_mb_baseline']
+    lambat = (
+        (gabung['seconds'] > gabung['seconds_baseline'] * (1 + tolerance))
+        & (gabung['seconds'] - gabung['seconds_baseline'] > MIN_DELTA_SECONDS)
+    )
+    boros = (
+        (gabung['peak_mb'] > gabung['peak_mb_baseline'] * (1 + tolerance))
+        & (gabung['peak_mb'] - gabung['peak_mb_baseline'] > MIN_DELTA_MB)
+    )
+    gabung['REGRESI'] = np.select([lambat & boros, lambat, boros], ['waktu+memori', 'waktu', 'memori'], default='')
+    return gabung[kunci + ['seconds_baseline', 'seconds', 'rasio_waktu',
+                           'peak_mb_baseline', 'peak_mb', 'rasio_memori', 'REGRESI']]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard KBLI pada data sintetis")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="Skala data dipisah koma (default 1,10,100,1000)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Jumlah pengulangan per benchmark")
+    parser.add_argument('--skip-views', action='store_true', help="Lewati benchmark view (AppTest)")
+    parser.add_argument('--output', help="Tulis hasil JSON ke file (default stdout)")
+    parser.add_argument('--baseline', help="File JSON baseline untuk dibandingkan")
+    parser.add_argument('--update-baseline', action='store_true', help="Timpa baseline dengan hasil ini")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Selisih relatif yang masih diterima (default 0.25)")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        print(json.dumps(run_worker(args.repeat, args.skip_views)))
+        return 0
+
+    results = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'scales': {},
+    }
+    for scale in [int(s) for s in args.scales.split(',') if s.strip()]:
+        print(f"Skala {scale}x ...", file=sys.stderr)
+        results['scales'][str(scale)] = run_scale(scale, args.repeat, args.skip_views)
+
+    teks = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(teks, encoding='utf-8')
+    elif not args.baseline:
+        print(teks)
+
+    kode_keluar = 0
+    if args.baseline and Path(args.baseline).exists() and not args.update_baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        perbandingan = compare(results, baseline, args.tolerance)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(perbandingan.round(4).to_string(index=False))
+        regresi = perbandingan[perbandingan['REGRESI'] != '']
+        if len(regresi) > 0:
+            print(f"{len(regresi)} benchmark mengalami regresi (toleransi {args.tolerance:.0%})", file=sys.stderr)
+            kode_keluar = 1
+    elif args.baseline:
+        Path(args.baseline).write_text(teks, encoding='utf-8')
+        print(f"Baseline ditulis ke {args.baseline}", file=sys.stderr)
+    return kode_keluar
+
+
+if __name__ == '__main__':
+    sys.exit(main())
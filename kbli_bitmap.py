@@ -0,0 +1,174 @@
+"""
+Indeks bitmap untuk kombinasi filter di dashboard.
+
+Setiap nilai facet (cluster, jumlah cluster, kelompok jumlah cluster) disimpan
+sebagai bitset baris hasil np.packbits: satu bit per baris, jadi 300 ribu
+baris hanya ~37 KB per nilai. Kombinasi filter adalah AND bitwise atas bitset
+tersebut dan baris hasilnya diambil sekali dengan take, tanpa memindai ulang
+kolom atau menyalin DataFrame per filter.
+
+Facet boleh bernilai ganda: satu KBLI multi-cluster masuk ke bitset setiap
+cluster-nya. Kode KBLI per baris disimpan sebagai posting (posisi baris per
+kode), sehingga hasil pencarian menjadi bitset dari posisi kode yang cocok
+tanpa memindai kolom. Indeks dibangun sekali per versi data (lihat
+DatasetSnapshot) dan dipakai read-only oleh semua sesi.
+"""
+import numpy as np
+import pandas as pd
+
+from kbli_index import normalize_kode_series
+
+BUCKET_JUMLAH_CLUSTER = ("2 Cluster", "3 Cluster", "4+ Cluster")
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bits):
+        return int(np.bitwise_count(bits).sum())
+else:
+    # numpy < 2 belum punya bitwise_count: tabel jumlah bit per byte
+    _BIT_PER_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits):
+        return int(_BIT_PER_BYTE[bits].sum(dtype=np.int64))
+
+
+def cluster_count_bucket(jumlah):
+    """Label kelompok jumlah cluster per baris ('2 Cluster', '3 Cluster', '4+ Cluster')"""
+    jumlah = np.asarray(jumlah)
+    return np.select([jumlah >= 4, jumlah == 3, jumlah == 2], BUCKET_JUMLAH_CLUSTER[::-1], default=None)
+
+
+class BitmapIndex:
+    """Bitset baris per nilai facet untuk satu DataFrame"""
+
+    def __init__(self, n_rows, keys=None):
+        self.n_rows = n_rows
+        self.facets = {}
+        self._semua = np.packbits(np.ones(n_rows, dtype=bool))
+        # Posting kode KBLI untuk filter pencarian: kode -> nomor kelompok,
+        # posisi baris diurutkan per kelompok dengan batas tiap kelompok
+        self._key_group = {}
+        self._key_rows = np.empty(0, dtype=np.int64)
+        self._key_batas = np.zeros(1, dtype=np.int64)
+        if keys is not None:
+            self._key_group, self._key_rows, self._key_batas = self._postings(
+                np.arange(n_rows), np.asarray(keys, dtype=object)
+            )
+
+    @staticmethod
+    def _postings(posisi, nilai):
+        """(nilai -> nomor kelompok, posisi urut per kelompok, batas kelompok)"""
+        kode, unik = pd.factorize(nilai, use_na_sentinel=True)
+        ada = kode >= 0
+        posisi, kode = posisi[ada], kode[ada]
+        urutan = np.argsort(kode, kind='stable')
+        batas = np.searchsorted(kode[urutan], np.arange(len(unik) + 1))
+        return {v: i for i, v in enumerate(unik)}, posisi[urutan], batas
+
+    @classmethod
+    def from_frame(cls, df, facets, multi=(), kode_column='KODE_KBLI'):
+        """
+        Indeks untuk df.
+
+        facets: nama facet -> nama kolom df; facet di multi berisi list nilai per baris.
+        """
+        keys = None
+        if kode_column in df.columns:
+            keys = normalize_kode_series(df[kode_column]).to_numpy(dtype=object)
+        index = cls(len(df), keys)
+        for name, column in facets.items():
+            index.add_facet(name, df[column], multi=name in multi)
+        return index
+
+    def add_facet(self, name, values, multi=False):
+        if multi:
+            panjang = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+            posisi = np.repeat(np.arange(self.n_rows), panjang)
+            nilai = np.fromiter((x for v in values for x in v), dtype=object, count=int(panjang.sum()))
+        else:
+            posisi = np.arange(self.n_rows)
+            nilai = np.asarray(values, dtype=object)
+        # Posisi dikelompokkan per nilai, lalu setiap kelompok menjadi satu bitset
+        kelompok, baris, batas = self._postings(posisi, nilai)
+        bitsets = {}
+        for nilai_facet, i in kelompok.items():
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[baris[batas[i]:batas[i + 1]]] = True
+            bitsets[nilai_facet] = np.packbits(mask)
+        self.facets[name] = bitsets
+
+    # Bitset ------------------------------------------------------------
+
+    def all(self):
+        return self._semua
+
+    def none(self):
+        return np.zeros_like(self._semua)
+
+    def from_mask(self, mask):
+        return np.packbits(np.asarray(mask, dtype=bool))
+
+    def bitmap(self, facet, value):
+        """Bitset satu nilai facet; list/tuple/set nilai digabung dengan OR"""
+        bitsets = self.facets[facet]
+        if isinstance(value, (list, tuple, set)):
+            hasil = self.none()
+            for v in value:
+                if v in bitsets:
+                    hasil = hasil | bitsets[v]
+            return hasil
+        return bitsets.get(value, self.none())
+
+    def keys_bitmap(self, keys):
+        """Bitset baris yang kodenya ada di keys (mis. hasil pencarian), dari posting kode"""
+        kelompok = [self._key_group[k] for k in keys if k in self._key_group]
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for i in kelompok:
+            mask[self._key_rows[self._key_batas[i]:self._key_batas[i + 1]]] = True
+        return self.from_mask(mask)
+
+    def select(self, *bitsets, **filters):
+        """
+        AND dari bitset tambahan dan filter facet=nilai.
+
+        Nilai None atau list kosong berarti facet itu tidak difilter.
+        """
+        hasil = self._semua
+        for facet, value in filters.items():
+            if value is None or (isinstance(value, (list, tuple, set)) and len(value) == 0):
+                continue
+            hasil = hasil & self.bitmap(facet, value)
+        for bits in bitsets:
+            hasil = hasil & bits
+        return hasil
+
+    # Hasil -------------------------------------------------------------
+
+    def count(self, bits):
+        return _popcount(bits)
+
+    def positions(self, bits):
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def take(self, df, bits):
+        """Baris df yang bit-nya aktif; df apa adanya jika semua baris terpilih"""
+        if bits is self._semua or self.count(bits) == self.n_rows:
+            return df
+        return df.take(self.positions(bits))
+
+    def counts(self, facet, bits=None):
+        """Jumlah baris terpilih per nilai facet (tanpa yang nol), urut terbanyak"""
+        bitsets = self.facets[facet]
+        if bits is None:
+            bits = self._semua
+        jumlah = pd.Series(
+            [_popcount(b & bits) for b in bitsets.values()],
+            index=pd.Index(list(bitsets), dtype=object),
+            dtype='int64',
+        )
+        return jumlah[jumlah > 0].sort_values(ascending=False, kind='stable')
+
+    def memory_usage(self):
+        return (
+            sum(b.nbytes for bitsets in self.facets.values() for b in bitsets.values())
+            + self._key_rows.nbytes + self._key_batas.nbytes
+        )
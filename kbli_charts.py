@@ -0,0 +1,155 @@
+"""
+Figure Plotly untuk dashboard, dibangun dari agregat yang sudah dihitung.
+
+Fungsi di sini tidak bergantung pada Streamlit dan hanya menerima tabel
+agregat kecil (lihat kbli_analysis), sehingga hasilnya bisa di-cache per
+versi data dan kombinasi filter tanpa menyimpan data mentah.
+"""
+import plotly.express as px
+
+# Jumlah pasangan cluster default di chart kombinasi sebelum digabung ke 'Lainnya'
+DEFAULT_TOP_PAIRS = 25
+TOP_PAIRS_OPTIONS = [10, 25, 50, 100]
+
+
+def multi_cluster_distribution_figure(dist):
+    """Chart batang jumlah KBLI per jumlah cluster"""
+    jumlah = dist['JUMLAH_KBLI'].to_numpy()
+    fig = px.bar(
+        x=dist['JUMLAH_CLUSTER'].to_numpy(),
+        y=jumlah,
+        title="Distribusi Jumlah Cluster per KBLI",
+        labels={'x': 'Jumlah Cluster', 'y': 'Jumlah KBLI'},
+        color=jumlah,
+        color_continuous_scale='viridis'
+    )
+    # Sumbu dengan angka bulat
+    fig.update_layout(
+        showlegend=False,
+        xaxis=dict(tickmode='linear', dtick=1),
+        yaxis=dict(tickformat='d')
+    )
+    fig.update_traces(
+        text=jumlah,
+        textposition='outside',
+        hovertemplate='<b>%{x} Cluster</b><br>Jumlah KBLI: %{y}<extra></extra>'
+    )
+    return fig
+
+
+def multi_cluster_pie_figure(dist):
+    """Pie chart persentase KBLI per jumlah cluster"""
+    return px.pie(
+        values=dist['JUMLAH_KBLI'],
+        names=dist['JUMLAH_CLUSTER'].astype(str) + ' Cluster',
+        title="Persentase KBLI Multi-Cluster",
+        hole=0.4
+    )
+
+
+def single_cluster_distribution_figure(dist):
+    """Chart batang jumlah KBLI single cluster per cluster"""
+    jumlah = dist['JUMLAH_KBLI'].to_numpy()
+    fig = px.bar(
+        x=dist['CLUSTER'].to_numpy(),
+        y=jumlah,
+        title="Distribusi KBLI Single Cluster per Cluster",
+        labels={'x': 'Cluster', 'y': 'Jumlah KBLI'},
+        color=jumlah,
+        color_continuous_scale='blues'
+    )
+    fig.update_layout(
+        showlegend=False,
+        xaxis_tickangle=-45,
+        yaxis=dict(tickformat='d')
+    )
+    fig.update_traces(
+        text=jumlah,
+        textposition='outside',
+        hovertemplate='<b>%{x}</b><br>Jumlah KBLI: %{y}<extra></extra>'
+    )
+    return fig
+
+
+def single_cluster_pie_figure(dist):
+    """Pie chart persentase KBLI single cluster per cluster"""
+    return px.pie(
+        values=dist['JUMLAH_KBLI'],
+        names=dist['CLUSTER'],
+        title="Persentase KBLI Single Cluster per Cluster",
+        hole=0.4
+    )
+
+
+def cluster_pair_figure(pairs, total_pairs, top_n):
+    """
+    Chart batang horizontal pasangan cluster.
+
+    pairs berasal dari ClusterCooccurrence.top_pairs_with_others(top_n); baris
+    'Lainnya' (jika ada) selalu diletakkan paling bawah.
+    """
+    if total_pairs > top_n:
+        judul = f"Kombinasi Cluster Pair ({top_n} teratas dari {total_pairs} Total Pasangan)"
+        teratas = pairs['Cluster Pair'].iloc[:-1]
+        urutan = [pairs['Cluster Pair'].iloc[-1]] + teratas.iloc[::-1].tolist()
+    else:
+        judul = f"Kombinasi Cluster Pair ({total_pairs} Total Pasangan)"
+        urutan = pairs['Cluster Pair'].iloc[::-1].tolist()
+
+    fig = px.bar(
+        pairs,
+        x='Jumlah_Pasangan',
+        y='Cluster Pair',
+        orientation='h',
+        title=judul,
+        color='Jumlah_Pasangan',
+        color_continuous_scale='plasma',
+        labels={'Jumlah_Pasangan': 'Jumlah Kemunculan'}
+    )
+    fig.update_layout(
+        yaxis={'categoryorder': 'array', 'categoryarray': urutan},
+        xaxis=dict(tickformat='d'),
+        # Tinggi mengikuti jumlah batang agar label tidak bertumpuk
+        height=max(450, 22 * len(pairs))
+    )
+    return fig
+
+
+def cluster_heatmap_figure(matrix):
+    """Heatmap matriks kemunculan bersama cluster"""
+    return px.imshow(
+        matrix,
+        title="Heatmap Kemunculan Bersama Cluster",
+        labels={'x': 'Cluster', 'y': 'Cluster', 'color': 'Jumlah Kemunculan'},
+        color_continuous_scale='plasma',
+        aspect='auto'
+    )
+
+
+def rerun_waterfall_figure(records):
+    """
+    Waterfall span satu rerun (lihat kbli_perf): satu batang per span,
+    dimulai pada waktu mulainya relatif terhadap awal rerun.
+    """
+    records = records.iloc[::-1]
+    label = [
+        ('  ' * depth) + nama
+        for depth, nama in zip(records['depth'].to_numpy(), records['name'].astype(str).to_numpy())
+    ]
+    fig = px.bar(
+        x=(records['seconds'] * 1000).to_numpy(),
+        y=label,
+        base=(records['start'] * 1000).to_numpy(),
+        orientation='h',
+        color=records['kind'].to_numpy(),
+        labels={'x': 'Waktu (ms)', 'y': '', 'color': 'Jenis'},
+        title="Waterfall Rerun",
+    )
+    fig.update_traces(hovertemplate='<b>%{y}</b><br>%{base:.1f} ms + %{x:.1f} ms<extra></extra>')
+    fig.update_layout(
+        height=max(250, 22 * len(records) + 100),
+        margin=dict(l=10, r=10, t=40, b=10),
+        yaxis=dict(categoryorder='array', categoryarray=label),
+        legend=dict(orientation='h', y=-0.15),
+    )
+    return fig
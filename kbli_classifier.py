@@ -0,0 +1,519 @@
+"""
+Klasifikasi batch nama pekerjaan UMKM ke kode KBLI.
+
+Membaca sheet 'Cluster Pekerjaan' dan 'KBLI', lalu mencocokkan setiap nama
+pekerjaan dengan judul dan deskripsi KBLI memakai kemiripan TF-IDF n-gram
+karakter. Hasilnya ditulis dengan skema 'Hasil Klasifikasi' yang dibaca tab
+"Tidak Terklasifikasi" di dashboard, ditambah kolom SKOR_KECOCOKAN.
+
+Untuk input besar, --workers menjalankan pencocokan per shard di process pool.
+Matriks katalog ditulis sekali sebagai file .npy dan dibaca worker lewat
+memory map (tanpa pickle per tugas). Hasil setiap shard disimpan di
+--shard-dir sehingga proses yang terhenti bisa dilanjutkan dengan --resume.
+
+Hasil default ditulis ke hasil_klasifikasi_kbli_baru.xlsx, bukan ke workbook
+klasifikasi yang dibaca dashboard; --output tidak boleh menunjuk workbook input.
+
+Contoh:
+    python kbli_classifier.py
+    python kbli_classifier.py --output hasil_klasifikasi_kbli.xlsx
+    python kbli_classifier.py --semua --top-k 1 --output hasil.parquet
+    python kbli_classifier.py --input ekspor.parquet --workers 8 --resume --output hasil.parquet
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from kbli_data import (
+    DATA_DIR,
+    SHEET_CLUSTER_PEKERJAAN,
+    SHEET_HASIL_KLASIFIKASI,
+    SHEET_KBLI,
+    iter_sheet_chunks,
+    load_workbook_sheets,
+    source_workbooks,
+)
+from kbli_export import format_from_suffix, write_frames
+from kbli_index import normalize_kode_series
+from kbli_search import fold_text
+
+KOLOM_PEKERJAAN = 'List Pekerjaan UMKM'
+CLUSTER_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+TIDAK_DITEMUKAN = 'Tidak Ditemukan'
+
+KOLOM_HASIL = [
+    'List Pekerjaan UMKM', 'CLUSTER', 'KODE KBLI', 'JUDUL KBLI', 'DESKRIPSI KBLI',
+    'TINGKAT_KECOCOKAN', 'KETERANGAN_KECOCOKAN', 'SKOR_KECOCOKAN',
+]
+
+# Skor gabungan = BOBOT_JUDUL * kemiripan judul + (1 - BOBOT_JUDUL) * kemiripan deskripsi
+BOBOT_JUDUL = 0.6
+AMBANG_DITEMUKAN = 0.2
+AMBANG_SEDANG = 0.3
+AMBANG_TINGGI = 0.5
+
+# Output default, terpisah dari WORKBOOK_KLASIFIKASI yang dibaca dashboard
+OUTPUT_KLASIFIKASI = 'hasil_klasifikasi_kbli_baru.xlsx'
+DEFAULT_TOP_K = 3
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_SHARD_SIZE = 50000
+DEFAULT_SHARD_DIR = '.kbli_shards'
+
+
+class KbliMatcher:
+    """Model TF-IDF n-gram karakter atas katalog KBLI"""
+
+    def __init__(self, df_kbli_full):
+        katalog = pd.DataFrame({
+            'KODE KBLI': normalize_kode_series(df_kbli_full['KODE KBLI']),
+            'JUDUL KBLI': df_kbli_full['JUDUL KBLI'],
+            'DESKRIPSI KBLI': df_kbli_full['DESKRIPSI KBLI'],
+        }).dropna(subset=['KODE KBLI']).drop_duplicates('KODE KBLI').reset_index(drop=True)
+        self.katalog = katalog
+
+        judul = [fold_text(v) for v in katalog['JUDUL KBLI']]
+        deskripsi = [fold_text(v) for v in katalog['DESKRIPSI KBLI']]
+
+        self.vectorizer = TfidfVectorizer(
+            analyzer='char_wb',
+            ngram_range=(3, 5),
+            sublinear_tf=True,
+            dtype=np.float32,
+        )
+        self.vectorizer.fit(judul + deskripsi)
+        # Matriks katalog ditransposisi sekali: (n_fitur x n_kbli)
+        self.judul_matrix = self.vectorizer.transform(judul).T.tocsr()
+        self.deskripsi_matrix = self.vectorizer.transform(deskripsi).T.tocsr()
+
+    def score(self, jobs, top_k=DEFAULT_TOP_K):
+        """
+        Skor top-k KBLI untuk setiap nama pekerjaan.
+
+        Mengembalikan array (n_jobs x top_k) berisi posisi katalog, skor gabungan
+        dan kemiripan judul/deskripsi, urut dari skor tertinggi.
+        """
+        return score_matrices(
+            self.vectorizer.transform([fold_text(v) for v in jobs]),
+            self.judul_matrix,
+            self.deskripsi_matrix,
+            top_k,
+        )
+
+
+def score_matrices(job_matrix, judul_matrix, deskripsi_matrix, top_k=DEFAULT_TOP_K):
+    """Kemiripan kosinus pekerjaan x katalog lalu ambil top-k per baris"""
+    sim_judul = (job_matrix @ judul_matrix).toarray()
+    sim_deskripsi = (job_matrix @ deskripsi_matrix).toarray()
+    skor = BOBOT_JUDUL * sim_judul + (1 - BOBOT_JUDUL) * sim_deskripsi
+
+    top_k = min(top_k, skor.shape[1])
+    kandidat = np.argpartition(-skor, top_k - 1, axis=1)[:, :top_k]
+    skor_kandidat = np.take_along_axis(skor, kandidat, axis=1)
+    # Urutan stabil: skor menurun, seri diputus dengan posisi katalog
+    urutan = np.lexsort((kandidat, -skor_kandidat), axis=1)
+    posisi = np.take_along_axis(kandidat, urutan, axis=1)
+    return (
+        posisi,
+        np.take_along_axis(skor, posisi, axis=1),
+        np.take_along_axis(sim_judul, posisi, axis=1),
+        np.take_along_axis(sim_deskripsi, posisi, axis=1),
+    )
+
+
+def unique_jobs(df_pekerjaan):
+    """Nama pekerjaan unik (setelah normalisasi teks) beserta cluster pertamanya"""
+    jobs = df_pekerjaan[[KOLOM_PEKERJAAN, 'CLUSTER']].dropna(subset=[KOLOM_PEKERJAAN])
+    kunci = jobs[KOLOM_PEKERJAAN].map(fold_text)
+    return jobs[~kunci.duplicated()].reset_index(drop=True)
+
+
+def tingkat_kecocokan(skor):
+    """Tinggi / Sedang / Rendah menurut ambang skor gabungan"""
+    return np.where(skor >= AMBANG_TINGGI, 'Tinggi', np.where(skor >= AMBANG_SEDANG, 'Sedang', 'Rendah'))
+
+
+def _keterangan(sim_judul, sim_deskripsi, judul, deskripsi):
+    if sim_judul >= sim_deskripsi:
+        return f"Cocok dengan judul: {judul}"
+    return f"Cocok dengan deskripsi: {str(deskripsi)[:70]}..."
+
+
+def build_result(jobs, katalog, posisi, skor, sim_judul, sim_deskripsi):
+    """
+    Susun tabel 'Hasil Klasifikasi'.
+
+    Setiap pekerjaan mendapat satu baris per KBLI dengan skor di atas ambang,
+    atau satu baris 'Tidak Ditemukan' jika tidak ada yang lolos.
+    """
+    n_jobs, top_k = posisi.shape
+    lolos = skor >= AMBANG_DITEMUKAN
+    # Kandidat yang lolos ambang, diratakan baris per baris
+    job_idx, rank = np.nonzero(lolos)
+    pos = posisi[job_idx, rank]
+
+    ditemukan = pd.DataFrame({
+        '_urutan': job_idx,
+        '_rank': rank,
+        KOLOM_PEKERJAAN: jobs[KOLOM_PEKERJAAN].to_numpy()[job_idx],
+        'CLUSTER': jobs['CLUSTER'].to_numpy()[job_idx],
+        'KODE KBLI': katalog['KODE KBLI'].to_numpy()[pos],
+        'JUDUL KBLI': katalog['JUDUL KBLI'].to_numpy()[pos],
+        'DESKRIPSI KBLI': katalog['DESKRIPSI KBLI'].to_numpy()[pos],
+        'TINGKAT_KECOCOKAN': tingkat_kecocokan(skor[job_idx, rank]),
+        'KETERANGAN_KECOCOKAN': [
+            _keterangan(sj, sd, j, d)
+            for sj, sd, j, d in zip(
+                sim_judul[job_idx, rank], sim_deskripsi[job_idx, rank],
+                katalog['JUDUL KBLI'].to_numpy()[pos], katalog['DESKRIPSI KBLI'].to_numpy()[pos],
+            )
+        ],
+        'SKOR_KECOCOKAN': np.round(skor[job_idx, rank], 4),
+    })
+
+    tidak = np.flatnonzero(~lolos.any(axis=1))
+    tidak_ditemukan = pd.DataFrame({
+        '_urutan': tidak,
+        '_rank': 0,
+        KOLOM_PEKERJAAN: jobs[KOLOM_PEKERJAAN].to_numpy()[tidak],
+        'CLUSTER': jobs['CLUSTER'].to_numpy()[tidak],
+        'KODE KBLI': TIDAK_DITEMUKAN,
+        'JUDUL KBLI': TIDAK_DITEMUKAN,
+        'DESKRIPSI KBLI': TIDAK_DITEMUKAN,
+        'TINGKAT_KECOCOKAN': 'Rendah',
+        'KETERANGAN_KECOCOKAN': 'Tidak ada kecocokan dengan data KBLI',
+        'SKOR_KECOCOKAN': np.round(skor[tidak, 0], 4) if top_k else 0.0,
+    })
+
+    hasil = pd.concat([ditemukan, tidak_ditemukan], ignore_index=True)
+    hasil = hasil.sort_values(['_urutan', '_rank'], kind='stable')
+    return hasil[KOLOM_HASIL].reset_index(drop=True)
+
+
+def classify_jobs(df_pekerjaan, df_kbli_full, top_k=DEFAULT_TOP_K, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Klasifikasikan nama pekerjaan unik terhadap katalog KBLI, per potongan baris"""
+    matcher = KbliMatcher(df_kbli_full)
+    jobs = unique_jobs(df_pekerjaan)
+
+    bagian = []
+    for start in range(0, len(jobs), chunk_size):
+        potongan = jobs.iloc[start:start + chunk_size]
+        bagian.append(matcher.score(potongan[KOLOM_PEKERJAAN], top_k))
+
+    posisi, skor, sim_judul, sim_deskripsi = _stack_scores(bagian, top_k)
+    return build_result(jobs, matcher.katalog, posisi, skor, sim_judul, sim_deskripsi)
+
+
+def _stack_scores(bagian, top_k):
+    """Gabungkan potongan (posisi, skor, sim_judul, sim_deskripsi) secara berurutan"""
+    if not bagian:
+        kosong = np.zeros((0, top_k))
+        bagian = [(kosong.astype(np.int64), kosong, kosong, kosong)]
+    return tuple(np.vstack(arr) for arr in zip(*bagian))
+
+
+# ---------------------------------------------------------------------------
+# Eksekusi shard paralel
+# ---------------------------------------------------------------------------
+
+_MATRIKS_KATALOG = ('judul', 'deskripsi')
+_KOMPONEN_CSR = ('data', 'indices', 'indptr')
+
+# State per proses worker, diisi sekali oleh _init_worker
+_worker = {}
+
+
+def _save_catalog_matrices(matcher, direktori):
+    """Tulis matriks CSR katalog sebagai file .npy agar bisa di-memory-map oleh worker"""
+    shapes = {}
+    for nama in _MATRIKS_KATALOG:
+        matriks = getattr(matcher, f'{nama}_matrix')
+        for komponen in _KOMPONEN_CSR:
+            np.save(direktori / f'katalog_{nama}_{komponen}.npy', getattr(matriks, komponen))
+        shapes[nama] = matriks.shape
+    return shapes
+
+
+def _load_catalog_matrix(direktori, nama, shape):
+    arrays = [
+        np.load(direktori / f'katalog_{nama}_{komponen}.npy', mmap_mode='r')
+        for komponen in _KOMPONEN_CSR
+    ]
+    return sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+def _init_worker(vectorizer, direktori, shapes, top_k, chunk_size):
+    _worker['vectorizer'] = vectorizer
+    _worker['judul'] = _load_catalog_matrix(direktori, 'judul', shapes['judul'])
+    _worker['deskripsi'] = _load_catalog_matrix(direktori, 'deskripsi', shapes['deskripsi'])
+    _worker['top_k'] = top_k
+    _worker['chunk_size'] = chunk_size
+
+
+def _score_shard(nomor, jobs):
+    """Skor satu shard di proses worker"""
+    bagian = []
+    chunk_size = _worker['chunk_size']
+    for start in range(0, len(jobs), chunk_size):
+        job_matrix = _worker['vectorizer'].transform([fold_text(v) for v in jobs[start:start + chunk_size]])
+        bagian.append(score_matrices(job_matrix, _worker['judul'], _worker['deskripsi'], _worker['top_k']))
+    return nomor, _stack_scores(bagian, _worker['top_k'])
+
+
+def _shard_file(direktori, nomor):
+    return direktori / f'shard_{nomor:06d}.npz'
+
+
+def _save_shard(direktori, nomor, scores):
+    tujuan = _shard_file(direktori, nomor)
+    tmp = tujuan.with_name(tujuan.stem + '.tmp.npz')
+    np.savez(tmp, posisi=scores[0], skor=scores[1], sim_judul=scores[2], sim_deskripsi=scores[3])
+    os.replace(tmp, tujuan)
+
+
+def _load_shard(direktori, nomor):
+    with np.load(_shard_file(direktori, nomor)) as data:
+        return data['posisi'], data['skor'], data['sim_judul'], data['sim_deskripsi']
+
+
+def _run_signature(jobs, matcher, top_k, shard_size):
+    """Sidik jari run: shard hanya boleh dipakai ulang jika input dan parameter sama"""
+    h = hashlib.sha256()
+    for teks in jobs[KOLOM_PEKERJAAN]:
+        h.update(str(teks).encode('utf-8'))
+        h.update(b'\0')
+    h.update(pd.util.hash_pandas_object(matcher.katalog, index=False).values.tobytes())
+    h.update(f'{top_k}:{shard_size}:{BOBOT_JUDUL}'.encode())
+    return h.hexdigest()
+
+
+# File yang ditulis classify_jobs_sharded di shard_dir; hanya ini yang boleh dihapus
+POLA_FILE_SHARD = ('shard_*.npz', 'katalog_*.npy', 'manifest.json')
+
+
+class ShardDirError(ValueError):
+    """shard_dir tidak bisa dipakai tanpa menghapus file yang bukan milik tool ini"""
+
+
+def _read_shard_manifest(manifest_file):
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and 'signature' in manifest else None
+
+
+def _prepare_shard_dir(direktori, signature, resume):
+    """
+    Siapkan shard_dir untuk satu run.
+
+    Direktori yang tidak kosong hanya dipakai jika berisi manifest dari tool ini;
+    saat mulai ulang, hanya file shard, katalog dan manifest yang dihapus.
+    """
+    manifest_file = direktori / 'manifest.json'
+    manifest = _read_shard_manifest(manifest_file)
+    if direktori.exists() and manifest is None and any(direktori.iterdir()):
+        raise ShardDirError(f"Direktori shard {direktori} tidak kosong dan bukan milik kbli_classifier; "
+                         "pilih --shard-dir lain")
+    if resume and manifest is not None and manifest['signature'] == signature:
+        return
+    for pola in POLA_FILE_SHARD:
+        for path in direktori.glob(pola):
+            path.unlink()
+    direktori.mkdir(parents=True, exist_ok=True)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({'signature': signature}, f)
+
+
+def classify_jobs_sharded(df_pekerjaan, df_kbli_full, workers, top_k=DEFAULT_TOP_K,
+                          chunk_size=DEFAULT_CHUNK_SIZE, shard_size=DEFAULT_SHARD_SIZE,
+                          shard_dir=DEFAULT_SHARD_DIR, resume=False, log=print):
+    """
+    Versi paralel classify_jobs: pekerjaan dipecah menjadi shard dan diskor di process pool.
+
+    Shard yang sudah selesai disimpan ke shard_dir. Dengan resume=True, shard yang
+    sudah ada (untuk input dan parameter yang sama) tidak dihitung ulang. Hasil
+    digabung menurut nomor shard sehingga identik dengan classify_jobs.
+    """
+    matcher = KbliMatcher(df_kbli_full)
+    jobs = unique_jobs(df_pekerjaan)
+    direktori = Path(shard_dir)
+    _prepare_shard_dir(direktori, _run_signature(jobs, matcher, top_k, shard_size), resume)
+
+    n_shard = -(-len(jobs) // shard_size)
+    selesai = {nomor for nomor in range(n_shard) if _shard_file(direktori, nomor).exists()}
+    sisa = [nomor for nomor in range(n_shard) if nomor not in selesai]
+    if selesai:
+        log(f"Melanjutkan: {len(selesai)} dari {n_shard} shard sudah selesai")
+
+    if sisa:
+        shapes = _save_catalog_matrices(matcher, direktori)
+        teks_pekerjaan = jobs[KOLOM_PEKERJAAN].tolist()
+        mulai = time.perf_counter()
+        baris_selesai = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(matcher.vectorizer, direktori, shapes, top_k, chunk_size),
+        ) as pool:
+            futures = [
+                pool.submit(_score_shard, nomor, teks_pekerjaan[nomor * shard_size:(nomor + 1) * shard_size])
+                for nomor in sisa
+            ]
+            for future in as_completed(futures):
+                nomor, scores = future.result()
+                _save_shard(direktori, nomor, scores)
+                selesai.add(nomor)
+                baris_selesai += len(scores[0])
+                laju = baris_selesai / max(time.perf_counter() - mulai, 1e-9)
+                log(f"Shard {nomor + 1}/{n_shard} selesai ({len(selesai)}/{n_shard}), {laju:,.0f} baris/detik")
+
+    posisi, skor, sim_judul, sim_deskripsi = _stack_scores(
+        [_load_shard(direktori, nomor) for nomor in range(n_shard)], top_k
+    )
+    return build_result(jobs, matcher.katalog, posisi, skor, sim_judul, sim_deskripsi)
+
+
+def summarize(hasil):
+    """Sheet 'Summary' seperti pada workbook hasil klasifikasi"""
+    per_pekerjaan = hasil.groupby(KOLOM_PEKERJAAN, sort=False)['KODE KBLI'].first()
+    ditemukan = hasil[hasil['KODE KBLI'] != TIDAK_DITEMUKAN]
+    return pd.DataFrame({
+        'Keterangan': [
+            'Total Pekerjaan Tidak Terklasifikasi',
+            'Berhasil Ditemukan KBLI',
+            'Tidak Ditemukan KBLI',
+            'Tingkat Kecocokan Tinggi',
+            'Tingkat Kecocokan Sedang',
+        ],
+        'Jumlah': [
+            len(per_pekerjaan),
+            int((per_pekerjaan != TIDAK_DITEMUKAN).sum()),
+            int((per_pekerjaan == TIDAK_DITEMUKAN).sum()),
+            int((ditemukan['TINGKAT_KECOCOKAN'] == 'Tinggi').sum()),
+            int((ditemukan['TINGKAT_KECOCOKAN'] == 'Sedang').sum()),
+        ],
+    })
+
+
+def write_result(hasil, output):
+    """Tulis hasil; format ditentukan dari ekstensi file (.xlsx, .csv, .parquet)"""
+    fmt = format_from_suffix(output)
+    if fmt == 'XLSX':
+        data = {
+            SHEET_HASIL_KLASIFIKASI: hasil,
+            'Berhasil Ditemukan': hasil[hasil['KODE KBLI'] != TIDAK_DITEMUKAN],
+            'Summary': summarize(hasil),
+        }
+    else:
+        data = hasil
+    write_frames(data, Path(output), fmt)
+
+
+def read_jobs(path):
+    """Baca daftar pekerjaan dari file .csv, .parquet atau .xlsx (kolom 'List Pekerjaan UMKM')"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        df = pd.read_csv(path)
+    elif suffix == '.parquet':
+        df = pd.read_parquet(path)
+    else:
+        # Workbook dibaca per potongan, hanya kolom yang dipakai yang disimpan
+        df = pd.concat(
+            [
+                chunk[[col for col in (KOLOM_PEKERJAAN, 'CLUSTER') if col in chunk.columns]]
+                for chunk in iter_sheet_chunks(path, None)
+            ],
+            ignore_index=True,
+        )
+    if 'CLUSTER' not in df.columns:
+        df['CLUSTER'] = CLUSTER_TIDAK_TERKLASIFIKASI
+    return df
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Klasifikasi batch pekerjaan UMKM ke kode KBLI")
+    parser.add_argument('--workbook',
+                        help="Workbook dengan sheet 'Cluster Pekerjaan' dan 'KBLI' "
+                             "(default: workbook bertanggal terbaru di DATA_DIR, sama dengan dashboard)")
+    parser.add_argument('--output', default=OUTPUT_KLASIFIKASI,
+                        help=f"File hasil (.xlsx, .csv atau .parquet), default {OUTPUT_KLASIFIKASI}")
+    parser.add_argument('--semua', action='store_true',
+                        help="Klasifikasikan semua pekerjaan, bukan hanya yang 'Tidak Terklasifikasi'")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help="Jumlah maksimum KBLI per pekerjaan")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Jumlah pekerjaan per potongan perhitungan")
+    parser.add_argument('--input',
+                        help="File daftar pekerjaan (.csv/.parquet/.xlsx) sebagai pengganti sheet 'Cluster Pekerjaan'")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses worker; lebih dari 1 mengaktifkan eksekusi per shard")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help="Jumlah pekerjaan per shard")
+    parser.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR,
+                        help="Direktori hasil antara per shard (kosong atau milik run sebelumnya)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Lanjutkan dari shard terakhir yang sudah selesai")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workbook is None:
+        args.workbook = source_workbooks(DATA_DIR)[0]
+    # Jangan menimpa workbook yang sedang dibaca
+    masukan = [Path(p).resolve() for p in (args.workbook, args.input) if p]
+    if Path(args.output).resolve() in masukan:
+        parser.error(f"--output {args.output} adalah file input; pilih file hasil lain")
+
+    sheets = load_workbook_sheets(args.workbook, [SHEET_CLUSTER_PEKERJAAN, SHEET_KBLI])
+    if args.input:
+        df_pekerjaan = read_jobs(args.input)
+    else:
+        df_pekerjaan = sheets[SHEET_CLUSTER_PEKERJAAN]
+    if not args.semua:
+        df_pekerjaan = df_pekerjaan[df_pekerjaan['CLUSTER'] == CLUSTER_TIDAK_TERKLASIFIKASI]
+
+    mulai = time.perf_counter()
+    if args.workers > 1 or args.resume:
+        try:
+            hasil = classify_jobs_sharded(
+                df_pekerjaan, sheets[SHEET_KBLI],
+                workers=args.workers,
+                top_k=args.top_k,
+                chunk_size=args.chunk_size,
+                shard_size=args.shard_size,
+                shard_dir=args.shard_dir,
+                resume=args.resume,
+                log=lambda pesan: print(pesan, file=sys.stderr),
+            )
+        except ShardDirError as e:
+            parser.error(str(e))
+    else:
+        hasil = classify_jobs(df_pekerjaan, sheets[SHEET_KBLI], top_k=args.top_k, chunk_size=args.chunk_size)
+    durasi = time.perf_counter() - mulai
+
+    write_result(hasil, args.output)
+    ringkasan = summarize(hasil)
+    for keterangan, jumlah in ringkasan.itertuples(index=False):
+        print(f"{keterangan}: {jumlah}")
+    jumlah_pekerjaan = int(ringkasan['Jumlah'].iloc[0])
+    print(f"Selesai dalam {durasi:.2f} detik ({jumlah_pekerjaan / max(durasi, 1e-9):,.0f} pekerjaan/detik), "
+          f"hasil ditulis ke {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,479 @@
+"""
+Pemuatan workbook KBLI dengan cache kolumnar (Parquet).
+
+Setiap sheet Excel hanya di-parse sekali lalu disimpan sebagai file Parquet
+di direktori cache. Cache dikunci dengan path, ukuran, mtime dan hash isi
+workbook, sehingga hanya dibangun ulang jika workbook sumber benar-benar berubah.
+
+Sheet besar (SHEET_STREAMING) dibaca per potongan hanya saat membangun cache,
+sehingga parse Excel tidak memuat seluruh sheet sekaligus. Pemuatan dari cache
+tetap membaca sheet utuh ke DataFrame: memori dashboard sebanding dengan
+ukuran data, tidak konstan.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+# Lokasi workbook sumber
+WORKBOOK_UTAMA = '20251022.xlsx'
+WORKBOOK_KLASIFIKASI = 'hasil_klasifikasi_kbli.xlsx'
+
+# Direktori workbook sumber; workbook utama bernama tanggal (mis. 20251022.xlsx)
+# dan yang namanya paling akhir dipakai, sehingga workbook baru cukup diletakkan di sini
+DATA_DIR = Path(os.environ.get('KBLI_DATA_DIR', '.'))
+POLA_WORKBOOK_UTAMA = re.compile(r'^\d{8}\.xlsx$')
+
+# Nama sheet yang dipakai dashboard
+SHEET_KBLI_CLUSTER = 'KBLI berdasarkan Cluster'
+SHEET_KBLI = 'KBLI'
+SHEET_CLUSTER_PEKERJAAN = 'Cluster Pekerjaan'
+SHEET_HASIL_KLASIFIKASI = 'Hasil Klasifikasi'
+
+# Kolom yang disimpan sebagai kategori (dictionary-encoded) di cache
+KOLOM_KATEGORI = {
+    SHEET_KBLI_CLUSTER: ['CLUSTER'],
+    SHEET_KBLI: [],
+    SHEET_CLUSTER_PEKERJAAN: ['CLUSTER'],
+    SHEET_HASIL_KLASIFIKASI: ['CLUSTER', 'TINGKAT_KECOCOKAN'],
+}
+
+# Sheet yang bisa sangat besar dibaca baris demi baris saat membangun cache
+# (hanya tahap build; load_workbook_sheets tetap memuat sheet utuh)
+SHEET_STREAMING = {SHEET_CLUSTER_PEKERJAAN, SHEET_HASIL_KLASIFIKASI}
+STREAMING_CHUNK_ROWS = 50000
+
+CACHE_DIR = Path(os.environ.get('KBLI_CACHE_DIR', '.kbli_cache'))
+MANIFEST_FILE = 'manifest.json'
+# Naikkan jika format isi cache berubah, agar cache lama dibangun ulang
+CACHE_FORMAT = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(path):
+    """Hitung sha256 isi file secara bertahap"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z]+', '_', text).strip('_').lower()
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(cache_dir / MANIFEST_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _atomic_write(path, write):
+    """Tulis file lewat file sementara lalu rename, agar pembaca tidak melihat file setengah jadi"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_manifest(cache_dir, manifest):
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    _atomic_write(cache_dir / MANIFEST_FILE, write)
+
+
+def workbook_fingerprint(path, cache_dir=CACHE_DIR):
+    """
+    Sidik jari workbook: path, ukuran, mtime dan sha256 isi.
+
+    Hash hanya dihitung ulang jika ukuran atau mtime berbeda dari manifest.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    entry = _read_manifest(Path(cache_dir)).get(str(path), {})
+    if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+        sha256 = entry['sha256']
+    else:
+        sha256 = _hash_file(path)
+    return {
+        'path': str(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+    }
+
+
+def dated_workbooks(data_dir=DATA_DIR):
+    """Workbook utama bertanggal di data_dir, urut dari yang terlama"""
+    return sorted(p for p in Path(data_dir).glob('*.xlsx') if POLA_WORKBOOK_UTAMA.match(p.name))
+
+
+def source_workbooks(data_dir=DATA_DIR):
+    """(workbook utama, workbook klasifikasi) yang berlaku di data_dir"""
+    data_dir = Path(data_dir)
+    kandidat = dated_workbooks(data_dir)
+    utama = kandidat[-1] if kandidat else data_dir / WORKBOOK_UTAMA
+    return utama, data_dir / WORKBOOK_KLASIFIKASI
+
+
+def data_version(paths=None, cache_dir=CACHE_DIR, data_dir=DATA_DIR):
+    """Versi data gabungan dari semua workbook sumber (dipakai sebagai kunci cache)"""
+    if paths is None:
+        paths = source_workbooks(data_dir)
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(workbook_fingerprint(path, cache_dir)['sha256'].encode())
+    return h.hexdigest()[:16]
+
+
+def _to_cacheable(df, kategori):
+    """Siapkan DataFrame agar bisa ditulis ke Parquet"""
+    df = df.copy()
+    for col in df.columns:
+        if col in kategori:
+            df[col] = df[col].astype('category')
+        elif df[col].dtype == object:
+            # Kolom campuran (mis. kode KBLI int dan teks 'Tidak Ditemukan') disimpan sebagai teks
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v)).astype(object)
+    return df
+
+
+def _from_cache(df):
+    """Kembalikan kolom kategori menjadi teks biasa seperti hasil pd.read_excel"""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _cache_path(cache_dir, fingerprint, sheet_name):
+    stem = _slug(Path(fingerprint['path']).stem)
+    return cache_dir / f"{stem}__{_slug(sheet_name)}__{fingerprint['sha256'][:16]}_v{CACHE_FORMAT}.parquet"
+
+
+def _remove_stale(cache_dir, old_entry, keep):
+    for filename in old_entry.get('sheets', {}).values():
+        if filename not in keep:
+            try:
+                os.remove(cache_dir / filename)
+            except OSError:
+                pass
+
+
+def _refresh_manifest(cache_dir, fingerprint):
+    """Perbarui ukuran/mtime di manifest jika file hanya di-touch tanpa perubahan isi"""
+    manifest = _read_manifest(cache_dir)
+    entry = manifest.get(fingerprint['path'])
+    if entry is None or entry.get('sha256') != fingerprint['sha256']:
+        return
+    if entry.get('size') == fingerprint['size'] and entry.get('mtime_ns') == fingerprint['mtime_ns']:
+        return
+    manifest[fingerprint['path']] = dict(entry, size=fingerprint['size'], mtime_ns=fingerprint['mtime_ns'])
+    try:
+        _write_manifest(cache_dir, manifest)
+    except OSError:
+        pass
+
+
+def iter_sheet_chunks(path, sheet_name, chunk_size=None):
+    """
+    Baca sheet baris demi baris (openpyxl read-only) dan hasilkan DataFrame per potongan.
+    Jika sheet_name None, sheet pertama yang dibaca.
+
+    Nilai sel dipertahankan dengan tipe aslinya (angka, teks, tanggal); tipe
+    kolom disimpulkan per potongan. Sheet yang hanya berisi header menghasilkan
+    satu DataFrame kosong dengan kolom header tersebut.
+    """
+    from openpyxl import load_workbook
+
+    chunk_size = chunk_size or STREAMING_CHUNK_ROWS
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(name) if name is not None else f'Unnamed: {i}'
+            for i, name in enumerate(header)
+        ]
+
+        buffer = []
+        ada_baris = False
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            row = tuple(row[:len(columns)])
+            buffer.append(row + (None,) * (len(columns) - len(row)))
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+                ada_baris = True
+        if buffer or not ada_baris:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _tipe_angka(tipe):
+    import pyarrow as pa
+
+    return pa.types.is_integer(tipe) or pa.types.is_floating(tipe)
+
+
+def _lebarkan_tipe(lama, baru):
+    """
+    Tipe kolom gabungan dua potongan, dengan aturan yang sama dengan pd.read_excel
+    + _to_cacheable: kosong ikut tipe lain, angka dengan angka menjadi float64,
+    selain itu teks.
+    """
+    import pyarrow as pa
+
+    if lama is None or pa.types.is_null(lama):
+        return baru
+    if pa.types.is_null(baru) or lama == baru:
+        return lama
+    if _tipe_angka(lama) and _tipe_angka(baru):
+        return pa.float64()
+    return pa.string()
+
+
+def _stream_sheet_to_parquet(path, sheet_name, target):
+    """
+    Tulis sheet ke Parquet per row group tanpa memuat seluruh sheet ke memori.
+
+    Workbook dibaca sekali. Setiap potongan disimpan sementara sebagai file Arrow
+    di samping target sambil schema gabungan dikumpulkan (mis. 'KODE KBLI' angka
+    di satu potongan dan 'Tidak Ditemukan' di potongan lain menjadi teks); setelah
+    itu potongan dibaca satu per satu, di-cast ke schema tersebut dan ditulis.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    kategori = KOLOM_KATEGORI.get(sheet_name, [])
+    with tempfile.TemporaryDirectory(dir=Path(target).parent, prefix='.stream_') as tmp_dir:
+        potongan = []
+        tipe = {}
+        for nomor, chunk in enumerate(iter_sheet_chunks(path, sheet_name)):
+            # Kolom campuran di dalam satu potongan menjadi teks, seperti jalur pd.read_excel
+            table = pa.Table.from_pandas(_to_cacheable(chunk, []), preserve_index=False)
+            for field in table.schema:
+                tipe[field.name] = _lebarkan_tipe(tipe.get(field.name), field.type)
+            file_potongan = Path(tmp_dir) / f'{nomor:06d}.arrow'
+            with pa.OSFile(str(file_potongan), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            potongan.append(file_potongan)
+
+        if not potongan:
+            # Sheet tanpa header sama sekali
+            pd.DataFrame().to_parquet(target, index=False)
+            return
+
+        schema = pa.schema([
+            pa.field(nama, pa.dictionary(pa.int32(), pa.string()) if nama in kategori else tipe_kolom)
+            for nama, tipe_kolom in tipe.items()
+        ])
+        with pq.ParquetWriter(target, schema) as writer:
+            for file_potongan in potongan:
+                with pa.memory_map(str(file_potongan)) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                kolom = []
+                for field in schema:
+                    data = table.column(field.name)
+                    if pa.types.is_dictionary(field.type):
+                        data = data.cast(pa.string()).dictionary_encode().cast(field.type)
+                    elif data.type != field.type:
+                        data = data.cast(field.type)
+                    kolom.append(data)
+                writer.write_table(pa.Table.from_arrays(kolom, schema=schema))
+
+
+def ensure_cached(path, sheet_names, cache_dir=CACHE_DIR):
+    """
+    Pastikan sheet-sheet workbook ada di cache Parquet.
+
+    Mengembalikan (file cache per sheet, DataFrame cadangan). DataFrame cadangan
+    hanya terisi jika cache tidak bisa ditulis, agar data tetap bisa dipakai.
+    Sheet di SHEET_STREAMING dibaca per potongan; sheet lain di-parse sekali
+    bersama-sama dengan pd.read_excel.
+    """
+    cache_dir = Path(cache_dir)
+    fingerprint = workbook_fingerprint(path, cache_dir)
+    key = fingerprint['path']
+
+    files = {sheet_name: _cache_path(cache_dir, fingerprint, sheet_name) for sheet_name in sheet_names}
+    missing = [sheet_name for sheet_name in sheet_names if not files[sheet_name].exists()]
+    if not missing:
+        _refresh_manifest(cache_dir, fingerprint)
+        return files, {}
+
+    # Parse workbook sekali untuk semua sheet kecil yang belum ter-cache
+    sheet_pandas = [sheet_name for sheet_name in missing if sheet_name not in SHEET_STREAMING]
+    parsed = {}
+    if sheet_pandas:
+        parsed = {
+            sheet_name: _to_cacheable(df, KOLOM_KATEGORI.get(sheet_name, []))
+            for sheet_name, df in pd.read_excel(path, sheet_name=sheet_pandas).items()
+        }
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = _read_manifest(cache_dir)
+        old_entry = manifest.get(key, {})
+        if old_entry.get('sha256') == fingerprint['sha256']:
+            sheets = dict(old_entry.get('sheets', {}))
+        else:
+            sheets = {}
+
+        for sheet_name in missing:
+            if sheet_name in parsed:
+                df = parsed[sheet_name]
+                _atomic_write(files[sheet_name], lambda tmp: df.to_parquet(tmp, index=False))
+            else:
+                _atomic_write(files[sheet_name], lambda tmp: _stream_sheet_to_parquet(path, sheet_name, tmp))
+            sheets[sheet_name] = files[sheet_name].name
+
+        _remove_stale(cache_dir, old_entry, set(sheets.values()))
+        manifest[key] = dict(fingerprint, sheets=sheets)
+        _write_manifest(cache_dir, manifest)
+        return files, {}
+    except (OSError, ImportError, ValueError):
+        # Cache bersifat opsional: data tetap bisa dipakai langsung dari Excel
+        fallback = dict(parsed)
+        sisa = [sheet_name for sheet_name in missing if sheet_name not in fallback]
+        if sisa:
+            fallback.update(pd.read_excel(path, sheet_name=sisa))
+        return files, fallback
+
+
+def load_workbook_sheets(path, sheet_names, cache_dir=CACHE_DIR):
+    """
+    Muat beberapa sheet dari satu workbook, lewat cache Parquet bila masih valid.
+
+    Workbook hanya di-parse sekali untuk semua sheet yang belum ada di cache.
+    Setiap sheet dikembalikan utuh sebagai DataFrame. Jika direktori cache tidak
+    bisa ditulis, data tetap dikembalikan tanpa cache.
+    """
+    files, fallback = ensure_cached(path, sheet_names, cache_dir)
+    result = {}
+    for sheet_name in sheet_names:
+        if sheet_name in fallback:
+            result[sheet_name] = _from_cache(fallback[sheet_name])
+        else:
+            result[sheet_name] = _from_cache(pd.read_parquet(files[sheet_name]))
+    return result
+
+
+def load_all(cache_dir=CACHE_DIR, data_dir=DATA_DIR, workbooks=None):
+    """Muat semua sheet yang dipakai dashboard; workbooks=(utama, klasifikasi) menimpa pilihan dari data_dir"""
+    workbook_utama, workbook_klasifikasi = workbooks or source_workbooks(data_dir)
+    utama = load_workbook_sheets(
+        workbook_utama,
+        [SHEET_KBLI_CLUSTER, SHEET_KBLI, SHEET_CLUSTER_PEKERJAAN],
+        cache_dir,
+    )
+    klasifikasi = load_workbook_sheets(
+        workbook_klasifikasi,
+        [SHEET_HASIL_KLASIFIKASI],
+        cache_dir,
+    )
+    return (
+        utama[SHEET_KBLI_CLUSTER],
+        utama[SHEET_KBLI],
+        klasifikasi[SHEET_HASIL_KLASIFIKASI],
+        utama[SHEET_CLUSTER_PEKERJAAN],
+    )
+
+
+@dataclass(frozen=True)
+class KbliTables:
+    """
+    Tabel dashboard dalam bentuk ringkas, dibagikan read-only antar sesi.
+
+    Cluster memakai satu CategoricalDtype bersama untuk semua sheet, kode KBLI
+    disimpan sebagai kategori, dan judul/deskripsi yang berulang di 'Hasil
+    Klasifikasi' menunjuk ke tabel string yang sama dengan katalog KBLI.
+    Jangan mengubah DataFrame di dalamnya; buat salinan jika perlu.
+    """
+    kbli_cluster: pd.DataFrame
+    kbli_full: pd.DataFrame
+    tidak_terklasifikasi: pd.DataFrame
+    cluster_pekerjaan: pd.DataFrame
+    # 'KBLI berdasarkan Cluster' tanpa kode kosong, kode sebagai teks
+    clean: pd.DataFrame
+    cluster_dtype: pd.CategoricalDtype
+
+    def memory_usage(self):
+        """Total memori (byte) semua tabel, termasuk isi string"""
+        return sum(
+            int(df.memory_usage(deep=True).sum())
+            for df in (self.kbli_cluster, self.kbli_full, self.tidak_terklasifikasi,
+                       self.cluster_pekerjaan, self.clean)
+        )
+
+
+def _kategori_bersama(*series):
+    """CategoricalDtype dengan kategori gabungan (tersortir) dari beberapa kolom"""
+    nilai = pd.concat([pd.Series(s, dtype=object) for s in series], ignore_index=True).dropna()
+    return pd.CategoricalDtype(pd.Index(sorted(pd.unique(nilai))))
+
+
+def _as_category(series, dtype='category'):
+    return series.astype(object).astype(dtype)
+
+
+def compact_tables(df_kbli_cluster, df_kbli_full, df_tidak_terklasifikasi, df_cluster_pekerjaan):
+    """
+    Ubah keempat sheet menjadi KbliTables.
+
+    Kolom berulang (cluster, judul dan deskripsi di 'Hasil Klasifikasi', tingkat
+    kecocokan) menjadi kategori: kode integer per baris plus tabel string unik
+    yang disimpan sekali. Kolom yang nilainya unik per baris dibiarkan apa adanya.
+    """
+    cluster_dtype = _kategori_bersama(
+        df_kbli_cluster['CLUSTER'], df_cluster_pekerjaan['CLUSTER'], df_tidak_terklasifikasi['CLUSTER']
+    )
+
+    kbli_cluster = df_kbli_cluster.assign(
+        CLUSTER=_as_category(df_kbli_cluster['CLUSTER'], cluster_dtype),
+        JUDUL_KBLI=_as_category(df_kbli_cluster['JUDUL_KBLI']),
+    )
+
+    clean = kbli_cluster.dropna(subset=['KODE_KBLI'])
+    clean = clean.assign(KODE_KBLI=clean['KODE_KBLI'].astype(str).str.strip())
+
+    tidak_terklasifikasi = df_tidak_terklasifikasi.assign(CLUSTER=_as_category(
+        df_tidak_terklasifikasi['CLUSTER'], cluster_dtype
+    ))
+    for col in ('KODE KBLI', 'JUDUL KBLI', 'DESKRIPSI KBLI', 'TINGKAT_KECOCOKAN', 'KETERANGAN_KECOCOKAN'):
+        if col in tidak_terklasifikasi.columns:
+            tidak_terklasifikasi[col] = _as_category(tidak_terklasifikasi[col])
+
+    cluster_pekerjaan = df_cluster_pekerjaan.assign(
+        CLUSTER=_as_category(df_cluster_pekerjaan['CLUSTER'], cluster_dtype),
+    )
+
+    return KbliTables(
+        kbli_cluster=kbli_cluster,
+        kbli_full=df_kbli_full,
+        tidak_terklasifikasi=tidak_terklasifikasi,
+        cluster_pekerjaan=cluster_pekerjaan,
+        clean=clean,
+        cluster_dtype=cluster_dtype,
+    )
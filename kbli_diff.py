@@ -0,0 +1,277 @@
+"""
+Perbandingan dua versi data cluster KBLI.
+
+Setiap sisi diubah menjadi pasangan keanggotaan (kunci, nilai), mis.
+(kode KBLI 5 digit, cluster) atau (nama pekerjaan ternormalisasi, cluster),
+lalu dibandingkan dengan satu outer join berindikator. Jumlah per kunci
+dihitung dengan groupby, sehingga biaya tetap satu pass vektor walau katalog
+besar; daftar nilai dalam bentuk teks hanya dibentuk untuk kunci yang berubah.
+
+Contoh:
+    python kbli_diff.py 20251022.xlsx 20251105.xlsx
+    python kbli_diff.py 20251022.xlsx 20251105.xlsx --output diff.xlsx --fail-on-change
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kbli_data import CACHE_DIR, WORKBOOK_KLASIFIKASI
+from kbli_export import format_from_suffix, write_frames
+from kbli_index import STATUS_MULTI, STATUS_SINGLE, STATUS_TIDAK_TERKLASIFIKASI, normalize_kode_series
+from kbli_search import fold_text_series
+from kbli_snapshot import DatasetSnapshot
+
+KOLOM_PEKERJAAN = 'List Pekerjaan UMKM'
+SEPARATOR_NILAI = ', '
+
+PERUBAHAN_DITAMBAHKAN = 'Ditambahkan'
+PERUBAHAN_DIHAPUS = 'Dihapus'
+PERUBAHAN_BERUBAH = 'Berubah'
+PERUBAHAN_TETAP = 'Tetap'
+PERUBAHAN_PINDAH_CLUSTER = 'Pindah Cluster'
+
+KOLOM_DIFF = [
+    'KUNCI', 'LAMA', 'BARU', 'DITAMBAH', 'DIHAPUS', 'JUMLAH_LAMA', 'JUMLAH_BARU', 'PERUBAHAN',
+]
+
+
+def membership_diff(lama, baru, kunci, nilai):
+    """
+    Bandingkan keanggotaan kunci -> himpunan nilai antara dua versi.
+
+    lama dan baru adalah DataFrame dengan kolom kunci dan nilai (nilai boleh
+    kosong: kunci tetap dianggap ada). Hasilnya satu baris per kunci yang
+    berubah, dengan kolom KOLOM_DIFF; kunci yang tetap tidak disertakan.
+    Jumlah kunci yang tetap dikembalikan sebagai nilai kedua.
+    """
+    kunci_lama = pd.Index(lama[kunci].dropna().unique())
+    kunci_baru = pd.Index(baru[kunci].dropna().unique())
+
+    pasangan_lama = lama[[kunci, nilai]].dropna().drop_duplicates()
+    pasangan_baru = baru[[kunci, nilai]].dropna().drop_duplicates()
+    gabung = pasangan_lama.merge(pasangan_baru, how='outer', on=[kunci, nilai], indicator=True)
+    status = gabung['_merge'].astype(str).to_numpy()
+    per_kunci = pd.DataFrame({
+        kunci: gabung[kunci].to_numpy(),
+        'JUMLAH_LAMA': status != 'right_only',
+        'JUMLAH_BARU': status != 'left_only',
+        'DITAMBAH': status == 'right_only',
+        'DIHAPUS': status == 'left_only',
+    }).groupby(kunci, sort=False).sum()
+
+    semua = kunci_lama.union(kunci_baru, sort=False)
+    per_kunci = per_kunci.reindex(semua, fill_value=0)
+    ada_lama = semua.isin(kunci_lama)
+    ada_baru = semua.isin(kunci_baru)
+    berubah = (per_kunci['DITAMBAH'].to_numpy() + per_kunci['DIHAPUS'].to_numpy()) > 0
+    perubahan = np.select(
+        [~ada_lama, ~ada_baru, berubah],
+        [PERUBAHAN_DITAMBAHKAN, PERUBAHAN_DIHAPUS, PERUBAHAN_BERUBAH],
+        default=PERUBAHAN_TETAP,
+    )
+    hasil = pd.DataFrame({
+        'KUNCI': semua.to_numpy(dtype=object),
+        'JUMLAH_LAMA': per_kunci['JUMLAH_LAMA'].to_numpy(dtype=np.int64),
+        'JUMLAH_BARU': per_kunci['JUMLAH_BARU'].to_numpy(dtype=np.int64),
+        'PERUBAHAN': perubahan,
+    })
+    tetap = int((perubahan == PERUBAHAN_TETAP).sum())
+    hasil = hasil[hasil['PERUBAHAN'] != PERUBAHAN_TETAP].reset_index(drop=True)
+
+    # Daftar nilai sebagai teks, hanya untuk kunci yang berubah
+    diubah = gabung[gabung[kunci].isin(hasil['KUNCI'])]
+    sisi = gabung['_merge'].astype(str)[diubah.index]
+
+    def teks(mask):
+        bagian = diubah[mask.to_numpy()]
+        gabungan = bagian.assign(_nilai=bagian[nilai].astype(str)).sort_values('_nilai', kind='stable')
+        return gabungan.groupby(kunci, sort=False)['_nilai'].agg(SEPARATOR_NILAI.join)
+
+    for kolom, mask in (
+        ('LAMA', sisi != 'right_only'),
+        ('BARU', sisi != 'left_only'),
+        ('DITAMBAH', sisi == 'right_only'),
+        ('DIHAPUS', sisi == 'left_only'),
+    ):
+        hasil[kolom] = hasil['KUNCI'].map(teks(mask)).fillna('')
+    return hasil[KOLOM_DIFF], tetap
+
+
+def _status_cluster(jumlah):
+    return np.select(
+        [jumlah == 0, jumlah == 1],
+        [STATUS_TIDAK_TERKLASIFIKASI, STATUS_SINGLE],
+        default=STATUS_MULTI,
+    )
+
+
+def _kbli_pairs(snapshot):
+    clean = snapshot.clean
+    return pd.DataFrame({
+        'KODE_KBLI': normalize_kode_series(clean['KODE_KBLI']).to_numpy(dtype=object),
+        'CLUSTER': clean['CLUSTER'].astype(object).to_numpy(),
+    })
+
+
+def _pekerjaan_pairs(df, nilai):
+    return pd.DataFrame({
+        'PEKERJAAN': fold_text_series(df[KOLOM_PEKERJAAN]).replace('', np.nan).to_numpy(dtype=object),
+        nilai: df[nilai].astype(object).to_numpy(),
+        '_NAMA': df[KOLOM_PEKERJAAN].astype(object).to_numpy(),
+    })
+
+
+def _hasil_pairs(df):
+    kode = df['KODE KBLI'].astype(object)
+    normal = normalize_kode_series(kode)
+    pairs = _pekerjaan_pairs(df.assign(**{'KODE KBLI': normal.where(normal.notna(), kode)}), 'KODE KBLI')
+    return pairs
+
+
+def _nama_pekerjaan(kunci, *frames):
+    """Nama pekerjaan asli (kemunculan pertama) untuk kunci ternormalisasi"""
+    nama = pd.concat([f[['PEKERJAAN', '_NAMA']] for f in frames]).dropna().drop_duplicates('PEKERJAAN')
+    return kunci.map(nama.set_index('PEKERJAAN')['_NAMA'])
+
+
+@dataclass(frozen=True)
+class VersionDiff:
+    versi_lama: str
+    versi_baru: str
+    kbli: pd.DataFrame
+    pekerjaan: pd.DataFrame
+    hasil: pd.DataFrame
+    tetap: dict
+
+    @property
+    def has_changes(self):
+        return len(self.kbli) > 0 or len(self.pekerjaan) > 0 or len(self.hasil) > 0
+
+    def summary(self):
+        """Ringkasan jumlah perubahan per bagian"""
+        baris = [
+            ('KBLI ditambahkan', int((self.kbli['PERUBAHAN'] == PERUBAHAN_DITAMBAHKAN).sum())),
+            ('KBLI dihapus', int((self.kbli['PERUBAHAN'] == PERUBAHAN_DIHAPUS).sum())),
+            ('KBLI pindah cluster', int((self.kbli['PERUBAHAN'] == PERUBAHAN_PINDAH_CLUSTER).sum())),
+            ('KBLI berubah single/multi', int(self.kbli['STATUS_BERUBAH'].sum())),
+            ('KBLI tetap', self.tetap['kbli']),
+            ('Pekerjaan ditambahkan', int((self.pekerjaan['PERUBAHAN'] == PERUBAHAN_DITAMBAHKAN).sum())),
+            ('Pekerjaan dihapus', int((self.pekerjaan['PERUBAHAN'] == PERUBAHAN_DIHAPUS).sum())),
+            ('Pekerjaan pindah cluster', int((self.pekerjaan['PERUBAHAN'] == PERUBAHAN_PINDAH_CLUSTER).sum())),
+            ('Pekerjaan tetap', self.tetap['pekerjaan']),
+            ('Hasil klasifikasi berubah', len(self.hasil)),
+        ]
+        return pd.DataFrame(baris, columns=['Keterangan', 'Jumlah'])
+
+    def sheets(self):
+        """Tabel untuk ekspor workbook"""
+        return {
+            'Ringkasan': self.summary(),
+            'KBLI': self.kbli,
+            'Pekerjaan': self.pekerjaan,
+            'Hasil Klasifikasi': self.hasil,
+        }
+
+
+def diff_snapshots(lama, baru):
+    """Bandingkan dua DatasetSnapshot"""
+    # KBLI: keanggotaan kode -> cluster
+    kbli, tetap_kbli = membership_diff(_kbli_pairs(lama), _kbli_pairs(baru), 'KODE_KBLI', 'CLUSTER')
+    kbli = kbli.rename(columns={
+        'KUNCI': 'KODE_KBLI', 'LAMA': 'CLUSTER_LAMA', 'BARU': 'CLUSTER_BARU',
+        'DITAMBAH': 'CLUSTER_DITAMBAH', 'DIHAPUS': 'CLUSTER_DIHAPUS',
+    })
+    kbli['PERUBAHAN'] = kbli['PERUBAHAN'].replace(PERUBAHAN_BERUBAH, PERUBAHAN_PINDAH_CLUSTER)
+    kbli['STATUS_LAMA'] = np.where(
+        kbli['PERUBAHAN'] == PERUBAHAN_DITAMBAHKAN, '', _status_cluster(kbli['JUMLAH_LAMA'].to_numpy())
+    )
+    kbli['STATUS_BARU'] = np.where(
+        kbli['PERUBAHAN'] == PERUBAHAN_DIHAPUS, '', _status_cluster(kbli['JUMLAH_BARU'].to_numpy())
+    )
+    kbli['STATUS_BERUBAH'] = (
+        (kbli['PERUBAHAN'] == PERUBAHAN_PINDAH_CLUSTER) & (kbli['STATUS_LAMA'] != kbli['STATUS_BARU'])
+    )
+    judul = baru.kbli_index.judul
+    judul_lama = lama.kbli_index.judul
+    kbli.insert(1, 'JUDUL_KBLI', [judul(k) or judul_lama(k) for k in kbli['KODE_KBLI']])
+
+    # Pekerjaan: nama ternormalisasi -> cluster
+    kerja_lama = _pekerjaan_pairs(lama.cluster_pekerjaan, 'CLUSTER')
+    kerja_baru = _pekerjaan_pairs(baru.cluster_pekerjaan, 'CLUSTER')
+    pekerjaan, tetap_pekerjaan = membership_diff(kerja_lama, kerja_baru, 'PEKERJAAN', 'CLUSTER')
+    pekerjaan['PERUBAHAN'] = pekerjaan['PERUBAHAN'].replace(PERUBAHAN_BERUBAH, PERUBAHAN_PINDAH_CLUSTER)
+    pekerjaan.insert(0, KOLOM_PEKERJAAN, _nama_pekerjaan(pekerjaan['KUNCI'], kerja_lama, kerja_baru))
+    pekerjaan = pekerjaan.drop(columns='KUNCI').rename(columns={'LAMA': 'CLUSTER_LAMA', 'BARU': 'CLUSTER_BARU'})
+    pekerjaan = pekerjaan.drop(columns=['DITAMBAH', 'DIHAPUS'])
+
+    # Hasil klasifikasi: nama ternormalisasi -> kode KBLI
+    hasil_lama = _hasil_pairs(lama.tidak_terklasifikasi)
+    hasil_baru = _hasil_pairs(baru.tidak_terklasifikasi)
+    hasil, tetap_hasil = membership_diff(hasil_lama, hasil_baru, 'PEKERJAAN', 'KODE KBLI')
+    hasil.insert(0, KOLOM_PEKERJAAN, _nama_pekerjaan(hasil['KUNCI'], hasil_lama, hasil_baru))
+    hasil = hasil.drop(columns='KUNCI').rename(columns={
+        'LAMA': 'KBLI_LAMA', 'BARU': 'KBLI_BARU', 'DITAMBAH': 'KBLI_DITAMBAH', 'DIHAPUS': 'KBLI_DIHAPUS',
+    })
+
+    return VersionDiff(
+        versi_lama=lama.version,
+        versi_baru=baru.version,
+        kbli=kbli,
+        pekerjaan=pekerjaan,
+        hasil=hasil,
+        tetap={'kbli': tetap_kbli, 'pekerjaan': tetap_pekerjaan, 'hasil': tetap_hasil},
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bandingkan dua versi workbook cluster KBLI")
+    parser.add_argument('lama', help="Workbook utama versi lama (mis. 20251022.xlsx)")
+    parser.add_argument('baru', help="Workbook utama versi baru")
+    parser.add_argument('--klasifikasi-lama', help="Workbook hasil klasifikasi versi lama")
+    parser.add_argument('--klasifikasi-baru', help="Workbook hasil klasifikasi versi baru")
+    parser.add_argument('--output', help="Tulis detail perubahan (.xlsx multi-sheet; .csv/.parquet berisi tabel KBLI)")
+    parser.add_argument('--json', action='store_true', help="Cetak ringkasan sebagai JSON")
+    parser.add_argument('--fail-on-change', action='store_true',
+                        help="Keluar dengan kode 1 jika ada perubahan (untuk CI)")
+    return parser
+
+
+def _klasifikasi_default(workbook):
+    return Path(workbook).parent / WORKBOOK_KLASIFIKASI
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    lama = DatasetSnapshot.from_workbooks(
+        args.lama, args.klasifikasi_lama or _klasifikasi_default(args.lama), CACHE_DIR
+    )
+    baru = DatasetSnapshot.from_workbooks(
+        args.baru, args.klasifikasi_baru or _klasifikasi_default(args.baru), CACHE_DIR
+    )
+    diff = diff_snapshots(lama, baru)
+    ringkasan = diff.summary()
+
+    if args.json:
+        print(json.dumps({
+            'versi_lama': diff.versi_lama,
+            'versi_baru': diff.versi_baru,
+            'ringkasan': dict(zip(ringkasan['Keterangan'], ringkasan['Jumlah'].astype(int).tolist())),
+        }, ensure_ascii=False, indent=2))
+    else:
+        print(f"Versi {diff.versi_lama} -> {diff.versi_baru}")
+        for keterangan, jumlah in ringkasan.itertuples(index=False):
+            print(f"{keterangan}: {jumlah}")
+
+    if args.output:
+        fmt = format_from_suffix(args.output)
+        write_frames(diff.sheets() if fmt == 'XLSX' else diff.kbli, Path(args.output), fmt)
+    return 1 if args.fail_on_change and diff.has_changes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Ekspor tabel ke CSV, Parquet dan XLSX.
+
+Setiap format ditulis per potongan baris sehingga tidak perlu membentuk
+seluruh isi file sebagai satu objek bytes. File hasil ekspor dashboard
+disimpan di folder cache dengan kunci versi data + filter, jadi unduhan
+berulang untuk kombinasi yang sama tidak menulis ulang apa pun. Folder itu
+dibatasi jumlah file dan umurnya; file yang paling lama tidak dipakai dihapus lebih dulu.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from kbli_data import CACHE_DIR, _atomic_write, _slug
+
+EXPORT_DIR = 'exports'
+EXPORT_CHUNK_ROWS = 10000
+# Batas isi folder ekspor: jumlah file dan umur (detik) sejak terakhir dipakai
+EXPORT_MAX_FILES = 100
+EXPORT_MAX_AGE = 7 * 24 * 3600
+# File yang dipakai/ditulis dalam sekian detik terakhir tidak dihapus: sesi lain
+# mungkin baru saja menerima path-nya dari export_file dan belum membacanya
+EXPORT_GRACE_SECONDS = 300
+# Pemisah untuk kolom berisi list (mis. CLUSTERS) saat diekspor
+SEPARATOR_LIST = ', '
+# Batas panjang nama sheet Excel
+PANJANG_NAMA_SHEET = 31
+
+# Format -> (ekstensi, MIME type)
+FORMAT_EKSPOR = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'XLSX': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def exportable(df):
+    """Salinan ringan df dengan kolom list/tuple digabung menjadi teks"""
+    hasil = df
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        contoh = df[col].dropna().head(1)
+        if len(contoh) and isinstance(contoh.iloc[0], (list, tuple)):
+            if hasil is df:
+                hasil = df.copy(deep=False)
+            hasil[col] = [
+                SEPARATOR_LIST.join(map(str, v)) if isinstance(v, (list, tuple)) else v
+                for v in df[col]
+            ]
+    return hasil
+
+
+def iter_row_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """CSV utf-8-sig (BOM hanya di awal file) agar terbaca benar di Excel"""
+    df = exportable(df)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        if len(df) == 0:
+            df.to_csv(f, index=False)
+            return
+        for i, chunk in enumerate(iter_row_chunks(df, chunk_rows)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+
+def _arrow_schema(df):
+    """Skema tetap untuk semua potongan; kolom object selalu teks"""
+    fields = []
+    for col in df.columns:
+        if df[col].dtype == object:
+            fields.append(pa.field(str(col), pa.string()))
+        else:
+            fields.append(pa.Schema.from_pandas(df[[col]].head(0), preserve_index=False).field(str(col)))
+    return pa.schema(fields)
+
+
+def write_parquet(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Parquet dengan satu row group per potongan"""
+    df = exportable(df)
+    schema = _arrow_schema(df)
+    with pq.ParquetWriter(path, schema) as writer:
+        if len(df) == 0:
+            writer.write_table(schema.empty_table())
+        for chunk in iter_row_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _cell(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_xlsx(sheets, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Workbook multi-sheet dari dict nama sheet -> DataFrame.
+
+    Memakai mode write-only openpyxl: baris langsung ditulis ke file
+    sementara, tidak disimpan sebagai objek sel di memori.
+    """
+    if isinstance(sheets, pd.DataFrame):
+        sheets = {'Data': sheets}
+    wb = Workbook(write_only=True)
+    for nama, df in sheets.items():
+        df = exportable(df)
+        ws = wb.create_sheet(title=str(nama)[:PANJANG_NAMA_SHEET])
+        ws.append([str(col) for col in df.columns])
+        for chunk in iter_row_chunks(df, chunk_rows):
+            for row in chunk.itertuples(index=False, name=None):
+                ws.append([_cell(v) for v in row])
+    wb.save(path)
+
+
+def write_frames(data, path, fmt):
+    """Tulis DataFrame (CSV/Parquet/XLSX) atau dict sheet (XLSX saja) ke path"""
+    if fmt == 'XLSX':
+        write_xlsx(data, path)
+    elif isinstance(data, dict):
+        raise ValueError(f"Format {fmt} hanya mendukung satu tabel")
+    elif fmt == 'CSV':
+        write_csv(data, path)
+    elif fmt == 'Parquet':
+        write_parquet(data, path)
+    else:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+
+def format_from_suffix(path):
+    """Format ekspor menurut ekstensi file; default XLSX"""
+    suffix = Path(path).suffix.lower()
+    for fmt, (ext, _) in FORMAT_EKSPOR.items():
+        if suffix == ext:
+            return fmt
+    return 'XLSX'
+
+
+def export_path(name, fmt, version, filter_key=None, cache_dir=CACHE_DIR):
+    """Lokasi file ekspor untuk kombinasi nama, format, versi data dan filter"""
+    ext, _ = FORMAT_EKSPOR[fmt]
+    digest = hashlib.sha256(
+        json.dumps([name, fmt, filter_key], default=str).encode('utf-8')
+    ).hexdigest()[:16]
+    return Path(cache_dir) / EXPORT_DIR / f"{_slug(name)}__{version}__{digest}{ext}"
+
+
+def _remove_stale_exports(target, max_files=EXPORT_MAX_FILES, max_age=EXPORT_MAX_AGE,
+                          grace=EXPORT_GRACE_SECONDS):
+    """
+    Bersihkan folder ekspor sebelum target ditulis.
+
+    Ekspor dengan nama yang sama dari versi data lain selalu dihapus. Sisanya
+    dibatasi seperti LRU menurut mtime (diperbarui setiap kali file dipakai):
+    file yang tidak dipakai lebih dari max_age dihapus, lalu yang paling lama
+    tidak dipakai hingga tersisa max_files - 1 file, menyisakan tempat untuk target.
+    File yang dipakai dalam grace detik terakhir tidak pernah dihapus, sehingga
+    batas jumlah bisa terlampaui sementara saat banyak ekspor aktif.
+    """
+    nama, versi, _ = target.stem.split('__')
+    sekarang = time.time()
+    batas_waktu = sekarang - max_age
+    tersisa = []
+    n_baru = 0
+    for path in target.parent.iterdir():
+        if path.name.endswith('.tmp'):
+            continue
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        if mtime > sekarang - grace:
+            n_baru += 1
+            continue
+        bagian = path.stem.split('__')
+        if (bagian[0] == nama and bagian[1:2] != [versi]) or mtime < batas_waktu:
+            _unlink(path)
+        else:
+            tersisa.append((mtime, path))
+    tersisa.sort()
+    for _, path in tersisa[:max(n_baru + len(tersisa) - max_files + 1, 0)]:
+        _unlink(path)
+
+
+def _unlink(path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def export_file(name, build, fmt, version, filter_key=None, cache_dir=CACHE_DIR):
+    """
+    Path file ekspor, dibangun hanya jika belum ada di cache.
+
+    build adalah callable tanpa argumen yang mengembalikan DataFrame atau dict
+    sheet -> DataFrame; baru dipanggil saat file memang perlu ditulis.
+    """
+    target = export_path(name, fmt, version, filter_key, cache_dir)
+    if target.exists():
+        try:
+            # Tandai sebagai baru dipakai agar tidak tergusur lebih dulu
+            os.utime(target)
+            return target
+        except OSError:
+            # Baru saja dihapus sesi lain; tulis ulang
+            pass
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _remove_stale_exports(target)
+    data = build()
+    _atomic_write(target, lambda tmp: write_frames(data, tmp, fmt))
+    return target
+
+
+def dashboard_sheets(snapshot):
+    """Semua tabel utama dashboard untuk workbook ekspor gabungan"""
+    return {
+        'Single Cluster': snapshot.single_cluster,
+        'Multi Cluster': snapshot.multi_cluster,
+        'Tidak Terklasifikasi': snapshot.tidak_terklasifikasi,
+        'Cluster Pair': snapshot.cooccurrence.pairs(),
+    }
@@ -0,0 +1,304 @@
+"""
+Pencarian nama pekerjaan UMKM yang toleran salah ketik.
+
+Nama pekerjaan dari 'Cluster Pekerjaan' dan 'Hasil Klasifikasi' dinormalisasi
+(fold_text) lalu dipecah menjadi trigram karakter per kata. Kandidat dipilih
+dari kemiripan Dice trigram, satu perkalian matriks sparse untuk seluruh
+batch kueri, lalu diurutkan ulang dengan jarak edit Levenshtein yang dihitung
+sekaligus untuk semua pasangan kueri-kandidat. Indeks dibangun sekali per
+versi data (lihat DatasetSnapshot.job_matcher).
+
+Contoh:
+    python kbli_fuzzy.py "penjual bakso kliling" "tukang jahid"
+    python kbli_fuzzy.py --input daftar_pekerjaan.xlsx --top-k 3 --output cocok.xlsx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from kbli_export import format_from_suffix, write_frames
+from kbli_search import fold_text
+
+KOLOM_PEKERJAAN = 'List Pekerjaan UMKM'
+CLUSTER_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+TIDAK_DITEMUKAN = 'Tidak Ditemukan'
+
+KOLOM_HASIL = ['KUERI', 'PERINGKAT', 'PEKERJAAN', 'CLUSTER', 'KODE_KBLI', 'JUMLAH_KBLI', 'SKOR', 'JARAK_EDIT']
+
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 20
+# Minimal kandidat trigram per kueri yang dihitung jarak editnya
+MIN_KANDIDAT = 20
+# Skor = BOBOT_TRIGRAM * Dice trigram + (1 - BOBOT_TRIGRAM) * kemiripan edit
+BOBOT_TRIGRAM = 0.5
+# Kandidat dengan skor di bawah ini dibuang (kueri acak seperti 'xqzv' skornya
+# < 0.3, sedangkan nama dengan dua salah ketik masih di atas 0.5)
+MIN_SKOR = 0.3
+# Jarak edit dihitung atas paling banyak sekian karakter pertama; nama yang
+# sangat panjang tetap dinilai penuh lewat trigram
+MAX_PANJANG_EDIT = 64
+# Jumlah kueri per potongan perhitungan batch
+DEFAULT_CHUNK_SIZE = 1000
+
+
+# Alfabet keluaran fold_text; karakter lain dipetakan ke simbol terakhir
+ALFABET = ' 0123456789abcdefghijklmnopqrstuvwxyz'
+_SIMBOL = np.full(256, len(ALFABET), dtype=np.uint8)
+_SIMBOL[np.frombuffer(ALFABET.encode('ascii'), dtype=np.uint8)] = np.arange(len(ALFABET), dtype=np.uint8)
+N_SIMBOL = len(ALFABET) + 1
+
+
+def encode_texts(texts, panjang=MAX_PANJANG_EDIT):
+    """Teks hasil fold_text -> matriks indeks simbol berpadding dan panjang per baris"""
+    codes = np.zeros((len(texts), panjang), dtype=np.uint8)
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for i, teks in enumerate(texts):
+        data = teks.encode('ascii', 'ignore')[:panjang]
+        codes[i, :len(data)] = np.frombuffer(data, dtype=np.uint8)
+        lengths[i] = len(data)
+    return _SIMBOL[codes], lengths
+
+
+def position_masks(codes, lengths):
+    """Bitmask posisi setiap simbol per teks (bit j aktif jika karakter ke-j = simbol itu)"""
+    masks = np.zeros((len(codes), N_SIMBOL), dtype=np.uint64)
+    baris = np.arange(len(codes))
+    for j in range(codes.shape[1]):
+        aktif = j < lengths
+        # Setiap baris muncul sekali per j, jadi indeks (baris, simbol) tidak berulang
+        masks[baris[aktif], codes[aktif, j]] |= np.uint64(1) << np.uint64(j)
+    return masks
+
+
+def edit_distance(a, a_len, b_masks, b_len):
+    """
+    Jarak Levenshtein per pasangan: teks a[i] terhadap pola yang bitmask-nya b_masks[i].
+
+    Algoritma bit-paralel Myers/Hyyrö: satu kolom DP (pola <= 64 karakter) disimpan
+    sebagai dua word uint64 delta vertikal, sehingga setiap karakter a hanya butuh
+    beberapa operasi bit per pasangan, dijalankan vektor untuk semua pasangan.
+    """
+    n_pasangan = len(a_len)
+    satu = np.uint64(1)
+    pv = np.full(n_pasangan, np.iinfo(np.uint64).max, dtype=np.uint64)
+    mv = np.zeros(n_pasangan, dtype=np.uint64)
+    # Bit baris terakhir DP (posisi karakter terakhir pola)
+    bit_akhir = satu << (np.maximum(b_len, 1) - 1).astype(np.uint64)
+    skor = b_len.copy()
+    for i in range(a.shape[1]):
+        aktif = i < a_len
+        if not aktif.any():
+            break
+        eq = np.take_along_axis(b_masks, a[:, i:i + 1].astype(np.intp), axis=1).ravel()
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        skor += aktif & ((ph & bit_akhir) != 0)
+        skor -= aktif & ((mh & bit_akhir) != 0)
+        # Baris 0 DP bernilai 0..n, jadi delta horizontal di atasnya selalu +1
+        ph = (ph << satu) | satu
+        mh = mh << satu
+        pv = mh | ~(xv | ph)
+        mv = ph & xv
+    kosong = b_len == 0
+    skor[kosong] = a_len[kosong]
+    return skor
+
+
+def job_table(cluster_pekerjaan, hasil_klasifikasi, cluster_members):
+    """
+    Satu baris per nama pekerjaan unik (setelah fold_text).
+
+    Cluster diambil dari 'Cluster Pekerjaan'. KBLI dari 'Hasil Klasifikasi'
+    jika pekerjaan itu pernah diklasifikasikan, selain itu KBLI cluster-nya.
+    """
+    pekerjaan = pd.concat([
+        cluster_pekerjaan[[KOLOM_PEKERJAAN, 'CLUSTER']].astype(object),
+        hasil_klasifikasi[[KOLOM_PEKERJAAN, 'CLUSTER']].astype(object),
+    ], ignore_index=True).dropna(subset=[KOLOM_PEKERJAAN])
+    kunci = pekerjaan[KOLOM_PEKERJAAN].map(fold_text)
+    pekerjaan = pekerjaan.assign(_KUNCI=kunci)[(kunci != '') & ~kunci.duplicated()]
+
+    hasil = hasil_klasifikasi[hasil_klasifikasi['KODE KBLI'] != TIDAK_DITEMUKAN]
+    kode_hasil = (
+        pd.DataFrame({
+            '_KUNCI': hasil[KOLOM_PEKERJAAN].map(fold_text).to_numpy(),
+            'KODE': hasil['KODE KBLI'].astype(object).to_numpy(),
+        })
+        .drop_duplicates()
+        .groupby('_KUNCI', sort=False)['KODE']
+        .agg(list)
+    )
+    kode = [
+        kode_hasil.get(k) or cluster_members.get(c, [])
+        for k, c in zip(pekerjaan['_KUNCI'], pekerjaan['CLUSTER'])
+    ]
+    return pd.DataFrame({
+        'PEKERJAAN': pekerjaan[KOLOM_PEKERJAAN].to_numpy(),
+        'CLUSTER': pekerjaan['CLUSTER'].to_numpy(),
+        'KODE_KBLI': [', '.join(k) for k in kode],
+        'JUMLAH_KBLI': [len(k) for k in kode],
+        '_KUNCI': pekerjaan['_KUNCI'].to_numpy(),
+    })
+
+
+class JobMatcher:
+    """Indeks trigram + jarak edit atas nama pekerjaan yang sudah dikenal"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs.drop(columns='_KUNCI').reset_index(drop=True)
+        kunci = jobs['_KUNCI'].tolist()
+        # Trigram per kata (char_wb menambahkan spasi di tepi kata), biner
+        self.vectorizer = CountVectorizer(analyzer='char_wb', ngram_range=(3, 3), binary=True, dtype=np.float32)
+        matrix = self.vectorizer.fit_transform(kunci)
+        self._analyzer = self.vectorizer.build_analyzer()
+        self.trigram_counts = np.asarray(matrix.sum(axis=1), dtype=np.float32).ravel()
+        # Ditransposisi sekali: (n_trigram x n_pekerjaan)
+        self.matrix_t = matrix.T.tocsr()
+        codes, self.lengths = encode_texts(kunci)
+        self.masks = position_masks(codes, self.lengths)
+        self.terklasifikasi = (self.jobs['CLUSTER'] != CLUSTER_TIDAK_TERKLASIFIKASI).to_numpy()
+
+    @classmethod
+    def from_tables(cls, cluster_pekerjaan, hasil_klasifikasi, cluster_members):
+        return cls(job_table(cluster_pekerjaan, hasil_klasifikasi, cluster_members))
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def score(self, queries, top_k=DEFAULT_TOP_K, terklasifikasi=False, min_skor=MIN_SKOR):
+        """
+        Top-k pekerjaan terdekat untuk setiap kueri (teks sudah melalui fold_text).
+
+        Mengembalikan array (n_kueri x top_k) berisi posisi pekerjaan, skor dan
+        jarak edit, urut dari skor tertinggi. Posisi -1 berarti tidak ada
+        kandidat (mis. semua pekerjaan dikecualikan atau skornya di bawah min_skor).
+        """
+        top_k = min(top_k, len(self))
+        n_kandidat = min(max(top_k * 4, MIN_KANDIDAT), len(self))
+        query_matrix = self.vectorizer.transform(queries)
+        # Jumlah trigram kueri termasuk yang tidak ada di kosakata indeks
+        jumlah_trigram = np.array([len(set(self._analyzer(q))) for q in queries], dtype=np.float32)
+        overlap = (query_matrix @ self.matrix_t).toarray()
+        dice = 2 * overlap / np.maximum(jumlah_trigram[:, None] + self.trigram_counts[None, :], 1)
+        if terklasifikasi:
+            dice[:, ~self.terklasifikasi] = -1
+
+        kandidat = np.argpartition(-dice, n_kandidat - 1, axis=1)[:, :n_kandidat]
+        dice_kandidat = np.take_along_axis(dice, kandidat, axis=1)
+
+        codes, lengths = encode_texts(queries)
+        pasangan = kandidat.ravel()
+        a_len = np.repeat(lengths, n_kandidat)
+        b_len = self.lengths[pasangan]
+        jarak = edit_distance(
+            np.repeat(codes, n_kandidat, axis=0), a_len, self.masks[pasangan], b_len
+        ).reshape(kandidat.shape)
+        kemiripan_edit = 1 - jarak / np.maximum(np.maximum(a_len, b_len), 1).reshape(kandidat.shape)
+
+        skor = BOBOT_TRIGRAM * dice_kandidat + (1 - BOBOT_TRIGRAM) * kemiripan_edit
+        skor[dice_kandidat < 0] = -np.inf
+        # Urutan stabil: skor menurun, seri diputus dengan posisi pekerjaan
+        urutan = np.lexsort((kandidat, -skor), axis=1)[:, :top_k]
+        posisi = np.take_along_axis(kandidat, urutan, axis=1)
+        skor = np.take_along_axis(skor, urutan, axis=1)
+        posisi[~np.isfinite(skor) | (skor < min_skor)] = -1
+        return posisi, skor, np.take_along_axis(jarak, urutan, axis=1)
+
+    def lookup(self, queries, top_k=DEFAULT_TOP_K, terklasifikasi=False, chunk_size=DEFAULT_CHUNK_SIZE,
+               min_skor=MIN_SKOR):
+        """
+        Hasil pencocokan sebagai DataFrame (KOLOM_HASIL), paling banyak top_k baris per kueri.
+
+        queries boleh satu string atau list; kueri kosong dilewati, begitu juga
+        kandidat dengan skor di bawah min_skor (kueri tanpa kandidat tidak punya
+        baris). Kueri diproses per potongan chunk_size agar memori matriks
+        kemiripan terbatas.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        queries = [str(q) for q in queries if q is not None and not pd.isna(q)]
+        kunci = [fold_text(q) for q in queries]
+        dipakai = [i for i, k in enumerate(kunci) if k]
+        bagian = []
+        for awal in range(0, len(dipakai), chunk_size):
+            indeks = dipakai[awal:awal + chunk_size]
+            posisi, skor, jarak = self.score([kunci[i] for i in indeks], top_k, terklasifikasi, min_skor)
+            baris, peringkat = np.nonzero(posisi >= 0)
+            cocok = self.jobs.iloc[posisi[baris, peringkat]]
+            bagian.append(pd.DataFrame({
+                'KUERI': np.asarray(queries, dtype=object)[np.asarray(indeks)[baris]],
+                'PERINGKAT': peringkat + 1,
+                'PEKERJAAN': cocok['PEKERJAAN'].to_numpy(),
+                'CLUSTER': cocok['CLUSTER'].to_numpy(),
+                'KODE_KBLI': cocok['KODE_KBLI'].to_numpy(),
+                'JUMLAH_KBLI': cocok['JUMLAH_KBLI'].to_numpy(),
+                'SKOR': np.round(skor[baris, peringkat], 4),
+                'JARAK_EDIT': jarak[baris, peringkat],
+            }))
+        if not bagian:
+            return pd.DataFrame(columns=KOLOM_HASIL)
+        return pd.concat(bagian, ignore_index=True)
+
+
+def best_matches(hasil):
+    """Satu baris terbaik per kueri (untuk rekonsiliasi daftar)"""
+    return hasil[hasil['PERINGKAT'] == 1].reset_index(drop=True)
+
+
+def read_queries(path):
+    """Kueri dari file .txt (satu per baris) atau .csv/.parquet/.xlsx (kolom 'List Pekerjaan UMKM')"""
+    from kbli_classifier import read_jobs
+
+    if Path(path).suffix.lower() == '.txt':
+        with open(path, encoding='utf-8') as f:
+            return [baris.strip() for baris in f if baris.strip()]
+    return read_jobs(path)[KOLOM_PEKERJAAN].tolist()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cari pekerjaan UMKM terdekat (toleran salah ketik)")
+    parser.add_argument('queries', nargs='*', help="Nama pekerjaan yang dicari")
+    parser.add_argument('--input', help="File daftar pekerjaan (.txt/.csv/.parquet/.xlsx) untuk mode batch")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help="Jumlah pekerjaan terdekat per kueri")
+    parser.add_argument('--terklasifikasi', action='store_true',
+                        help="Hanya cocokkan ke pekerjaan yang sudah punya cluster")
+    parser.add_argument('--min-skor', type=float, default=MIN_SKOR,
+                        help=f"Skor minimum kandidat (default {MIN_SKOR})")
+    parser.add_argument('--output', help="Simpan hasil (.xlsx, .csv atau .parquet)")
+    args = parser.parse_args(argv)
+    if not 1 <= args.top_k <= MAX_TOP_K:
+        parser.error(f"--top-k harus antara 1 dan {MAX_TOP_K}")
+
+    queries = list(args.queries)
+    if args.input:
+        queries += read_queries(args.input)
+    if not queries:
+        parser.error("Berikan nama pekerjaan atau --input")
+
+    from kbli_snapshot import DatasetSnapshot
+    matcher = DatasetSnapshot.load().job_matcher
+
+    mulai = time.perf_counter()
+    hasil = matcher.lookup(queries, args.top_k, args.terklasifikasi, min_skor=args.min_skor)
+    durasi = time.perf_counter() - mulai
+
+    if args.output:
+        fmt = format_from_suffix(args.output)
+        data = {'Terbaik': best_matches(hasil), 'Semua Kandidat': hasil} if fmt == 'XLSX' else hasil
+        write_frames(data, Path(args.output), fmt)
+        print(f"Hasil disimpan ke {args.output}")
+    else:
+        print(hasil.to_string(index=False, max_colwidth=60))
+    print(f"{len(queries)} kueri dalam {durasi * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
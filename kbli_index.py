@@ -0,0 +1,240 @@
+"""
+Indeks lookup KBLI.
+
+Menyatukan sheet 'KBLI' (kolom 'KODE KBLI') dan 'KBLI berdasarkan Cluster'
+(kolom 'KODE_KBLI') dengan kunci kode KBLI yang dinormalisasi menjadi teks
+5 digit, sehingga judul, deskripsi dan daftar cluster bisa dicari dalam O(1).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PANJANG_KODE = 5
+
+
+def normalize_kode(value):
+    """Normalisasi satu kode KBLI menjadi teks 5 digit, atau None jika tidak valid"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    teks = str(value).strip()
+    if teks.endswith('.0'):
+        teks = teks[:-2]
+    if not teks.isdigit() or len(teks) > PANJANG_KODE:
+        return None
+    return teks.zfill(PANJANG_KODE)
+
+
+def normalize_kode_series(series):
+    """Versi vektor dari normalize_kode; kode tidak valid menjadi NaN"""
+    teks = series.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    valid = teks.str.fullmatch(r'\d{1,%d}' % PANJANG_KODE).fillna(False).astype(bool)
+    return teks.where(valid).str.zfill(PANJANG_KODE)
+
+
+@dataclass(frozen=True)
+class KbliEntry:
+    kode: str
+    judul: str
+    deskripsi: str
+    clusters: tuple
+
+
+class KbliIndex:
+    """Peta kode KBLI ternormalisasi -> judul, deskripsi dan daftar cluster"""
+
+    def __init__(self, entries):
+        self._entries = entries
+
+    @classmethod
+    def from_frames(cls, df_kbli_full, df_kbli_cluster):
+        """Bangun indeks dari sheet 'KBLI' dan sheet 'KBLI berdasarkan Cluster'"""
+        katalog = pd.DataFrame({
+            'kode': normalize_kode_series(df_kbli_full['KODE KBLI']),
+            'judul': df_kbli_full['JUDUL KBLI'],
+            'deskripsi': df_kbli_full['DESKRIPSI KBLI'],
+        }).dropna(subset=['kode']).drop_duplicates('kode')
+
+        mapping = pd.DataFrame({
+            'kode': normalize_kode_series(df_kbli_cluster['KODE_KBLI']),
+            'judul': df_kbli_cluster['JUDUL_KBLI'],
+            'cluster': df_kbli_cluster['CLUSTER'],
+        }).dropna(subset=['kode'])
+
+        # Cluster per kode, urutan sesuai kemunculan di sheet
+        clusters = mapping.dropna(subset=['cluster']).groupby('kode', sort=False)['cluster'].agg(tuple)
+        judul_cluster = mapping.groupby('kode', sort=False)['judul'].first()
+
+        judul = dict(zip(katalog['kode'], katalog['judul']))
+        deskripsi = dict(zip(katalog['kode'], katalog['deskripsi']))
+
+        entries = {}
+        for kode in pd.unique(pd.concat([katalog['kode'], mapping['kode']], ignore_index=True)):
+            judul_kode = judul.get(kode)
+            if judul_kode is None or pd.isna(judul_kode):
+                judul_kode = judul_cluster.get(kode)
+            deskripsi_kode = deskripsi.get(kode)
+            entries[kode] = KbliEntry(
+                kode=kode,
+                judul=None if pd.isna(judul_kode) else judul_kode,
+                deskripsi=None if deskripsi_kode is None or pd.isna(deskripsi_kode) else deskripsi_kode,
+                clusters=clusters.get(kode, ()),
+            )
+        return cls(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, kode):
+        return normalize_kode(kode) in self._entries
+
+    def entries(self):
+        return list(self._entries.values())
+
+    def to_frame(self):
+        """Katalog gabungan sebagai DataFrame dengan kolom seperti sheet 'KBLI'"""
+        entries = list(self._entries.values())
+        return pd.DataFrame({
+            'KODE KBLI': [e.kode for e in entries],
+            'JUDUL KBLI': [e.judul for e in entries],
+            'DESKRIPSI KBLI': [e.deskripsi for e in entries],
+        })
+
+    def get(self, kode):
+        """Entri untuk kode KBLI (str atau int), None jika tidak ada"""
+        return self._entries.get(normalize_kode(kode))
+
+    def judul(self, kode):
+        entry = self.get(kode)
+        return entry.judul if entry else None
+
+    def deskripsi(self, kode):
+        entry = self.get(kode)
+        return entry.deskripsi if entry else None
+
+    def clusters(self, kode):
+        entry = self.get(kode)
+        return list(entry.clusters) if entry else []
+
+
+# Tingkat hierarki KBLI menurut panjang prefix kode
+TINGKAT_HIERARKI = {
+    2: 'Golongan Pokok',
+    3: 'Golongan',
+    4: 'Subgolongan',
+    5: 'Kelompok',
+}
+
+# Kategori KBLI 2020 (huruf) menurut rentang golongan pokok (2 digit)
+KATEGORI_KBLI = [
+    ('A', 1, 3, 'Pertanian, Kehutanan dan Perikanan'),
+    ('B', 5, 9, 'Pertambangan dan Penggalian'),
+    ('C', 10, 33, 'Industri Pengolahan'),
+    ('D', 35, 35, 'Pengadaan Listrik, Gas, Uap/Air Panas dan Udara Dingin'),
+    ('E', 36, 39, 'Treatment Air, Air Limbah, Pengelolaan dan Daur Ulang Sampah'),
+    ('F', 41, 43, 'Konstruksi'),
+    ('G', 45, 47, 'Perdagangan Besar dan Eceran; Reparasi dan Perawatan Mobil dan Sepeda Motor'),
+    ('H', 49, 53, 'Pengangkutan dan Pergudangan'),
+    ('I', 55, 56, 'Penyediaan Akomodasi dan Penyediaan Makan Minum'),
+    ('J', 58, 63, 'Informasi dan Komunikasi'),
+    ('K', 64, 66, 'Aktivitas Keuangan dan Asuransi'),
+    ('L', 68, 68, 'Real Estat'),
+    ('M', 69, 75, 'Aktivitas Profesional, Ilmiah dan Teknis'),
+    ('N', 77, 82, 'Aktivitas Penyewaan dan Sewa Guna Usaha Tanpa Hak Opsi, Ketenagakerjaan, Agen Perjalanan dan Penunjang Usaha Lainnya'),
+    ('O', 84, 84, 'Administrasi Pemerintahan, Pertahanan dan Jaminan Sosial Wajib'),
+    ('P', 85, 85, 'Pendidikan'),
+    ('Q', 86, 88, 'Aktivitas Kesehatan Manusia dan Aktivitas Sosial'),
+    ('R', 90, 93, 'Kesenian, Hiburan dan Rekreasi'),
+    ('S', 94, 96, 'Aktivitas Jasa Lainnya'),
+    ('T', 97, 98, 'Aktivitas Rumah Tangga sebagai Pemberi Kerja'),
+    ('U', 99, 99, 'Aktivitas Badan Internasional dan Badan Ekstra Internasional Lainnya'),
+]
+
+STATUS_SINGLE = 'Single Cluster'
+STATUS_MULTI = 'Multi Cluster'
+STATUS_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+
+
+def kategori_kbli(kode):
+    """Huruf kategori KBLI untuk kode atau prefix kode (min. 2 digit), None jika tidak diketahui"""
+    teks = str(kode).strip()
+    if not (isinstance(kode, str) and teks.isdigit() and 2 <= len(teks) < PANJANG_KODE):
+        teks = normalize_kode(kode)
+        if teks is None:
+            return None
+    golongan_pokok = int(teks[:2])
+    for huruf, awal, akhir, _ in KATEGORI_KBLI:
+        if awal <= golongan_pokok <= akhir:
+            return huruf
+    return None
+
+
+class KbliHierarchy:
+    """
+    Indeks prefix atas kode KBLI 5 digit yang tersortir.
+
+    Semua kode di bawah sebuah prefix (mis. '47' atau '4711') berada pada satu
+    potongan array yang bersebelahan, sehingga cukup dicari dengan bisect:
+    O(log n + k). Rekap jumlah per tingkat dihitung sekali saat dibangun.
+    """
+
+    def __init__(self, codes, status, rollups):
+        self.codes = codes
+        self.status = status
+        # tingkat (2/3/4/5) -> DataFrame rekap per prefix
+        self.rollups = rollups
+
+    @classmethod
+    def from_index(cls, kbli_index):
+        """Bangun dari KbliIndex; status dihitung dari jumlah cluster per kode"""
+        entries = sorted(kbli_index.entries(), key=lambda e: e.kode)
+        codes = np.array([e.kode for e in entries], dtype=object)
+        jumlah = np.array([len(e.clusters) for e in entries], dtype=np.int64)
+        status = np.where(
+            jumlah == 0, STATUS_TIDAK_TERKLASIFIKASI,
+            np.where(jumlah == 1, STATUS_SINGLE, STATUS_MULTI)
+        ).astype(object)
+
+        frame = pd.DataFrame({'KODE': codes, 'STATUS': status})
+        rollups = {}
+        for panjang, nama in TINGKAT_HIERARKI.items():
+            prefix = frame['KODE'].str[:panjang]
+            rekap = pd.crosstab(prefix, frame['STATUS']).reindex(
+                columns=[STATUS_SINGLE, STATUS_MULTI, STATUS_TIDAK_TERKLASIFIKASI], fill_value=0
+            )
+            rekap.insert(0, 'JUMLAH_KBLI', rekap.sum(axis=1))
+            rekap.index.name = 'PREFIX'
+            rekap = rekap.reset_index()
+            rekap.columns.name = None
+            rekap.insert(1, 'TINGKAT', nama)
+            if panjang == 2:
+                rekap.insert(2, 'KATEGORI', rekap['PREFIX'].map(kategori_kbli))
+            rollups[panjang] = rekap
+        return cls(codes, status, rollups)
+
+    def _range(self, prefix):
+        prefix = str(prefix).strip()
+        lo = int(np.searchsorted(self.codes, prefix, side='left'))
+        hi = int(np.searchsorted(self.codes, prefix + '\uffff', side='left'))
+        return lo, hi
+
+    def under(self, prefix):
+        """Semua kode 5 digit di bawah prefix, beserta statusnya"""
+        lo, hi = self._range(prefix)
+        return pd.DataFrame({'KODE_KBLI': self.codes[lo:hi], 'STATUS': self.status[lo:hi]})
+
+    def count_under(self, prefix):
+        lo, hi = self._range(prefix)
+        return hi - lo
+
+    def children(self, prefix=''):
+        """Rekap satu tingkat di bawah prefix (mis. semua golongan di bawah '47')"""
+        prefix = str(prefix).strip()
+        panjang = len(prefix) + 1 if prefix else 2
+        if panjang not in self.rollups:
+            return pd.DataFrame()
+        rekap = self.rollups[panjang]
+        # Rekap tersortir menurut PREFIX, jadi anak-anak prefix juga bersebelahan
+        lo = int(rekap['PREFIX'].searchsorted(prefix, side='left'))
+        hi = int(rekap['PREFIX'].searchsorted(prefix + '\uffff', side='left'))
+        return rekap.iloc[lo:hi].reset_index(drop=True)
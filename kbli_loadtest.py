@@ -0,0 +1,444 @@
+"""
+Uji beban dashboard dengan banyak sesi bersamaan.
+
+Menjalankan `streamlit run cluster_pekerjaan.py` (atau memakai server yang
+sudah berjalan lewat --url) lalu membuka N sesi websocket sekaligus. Setiap
+sesi berbicara dengan protokol yang sama seperti browser: mengirim
+BackMsg rerun_script berisi state widget dan menunggu ForwardMsg
+script_finished, sehingga server menjalankan ulang skrip persis seperti
+saat pengguna mengubah widget.
+
+Skenario per sesi: ganti cluster di view KBLI Berdasarkan Cluster, mengetik
+di Pencarian KBLI, memfilter di view Multi-Cluster dan Single Cluster, lalu
+mengunduh ekspor. Untuk setiap jumlah sesi dilaporkan persentil latensi
+rerun, throughput, CPU dan RSS proses server (dibaca dari /proc, Linux).
+
+Contoh:
+    python kbli_loadtest.py --sessions 1,5,10,25 --iterations 2
+    python kbli_loadtest.py --url http://localhost:8501 --pid 12345 --sessions 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_FILE = Path(__file__).with_name('cluster_pekerjaan.py')
+DEFAULT_PORT = 8599
+DEFAULT_SESSIONS = (1, 5, 10, 25)
+DEFAULT_ITERATIONS = 2
+# Jeda "berpikir" pengguna antar interaksi (detik), diacak +-50%
+DEFAULT_THINK = 0.3
+SERVER_START_TIMEOUT = 60
+SAMPLE_INTERVAL = 0.25
+PERSENTIL = (50, 90, 95, 99)
+
+# Potongan label view di navigasi (radio 'view_aktif')
+VIEW_CLUSTER = "KBLI Berdasarkan Cluster"
+VIEW_PENCARIAN = "Pencarian KBLI"
+VIEW_MULTI = "KBLI Multi-Cluster"
+VIEW_SINGLE = "KBLI Single Cluster"
+
+# Jenis elemen -> field nilai di WidgetState
+FIELD_NILAI = {
+    'radio': 'string_value',
+    'selectbox': 'string_value',
+    'text_input': 'string_value',
+    'checkbox': 'bool_value',
+    'number_input': 'double_value',
+}
+
+
+class ScriptError(Exception):
+    pass
+
+
+class DashboardSession:
+    """Satu sesi browser tiruan di atas websocket Streamlit"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.ws_url = self.base_url.replace('http', 'ws', 1) + '/_stcore/stream'
+        self.ws = None
+        self.session_id = None
+        self.elements = {}
+        self.widget_states = {}
+        self.samples = []
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.ws_url, subprotocols=['streamlit'], max_size=None)
+        return self
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _recv(self):
+        msg = ForwardMsg()
+        msg.ParseFromString(await self.ws.recv())
+        return msg
+
+    def _catat_elemen(self, element):
+        jenis = element.WhichOneof('type')
+        proto = getattr(element, jenis)
+        element_id = getattr(proto, 'id', '')
+        if element_id.startswith('$$ID-'):
+            key = element_id.split('-', 2)[2]
+            self.elements[key] = (jenis, proto)
+        return jenis
+
+    async def rerun(self, step):
+        """Kirim state widget saat ini, tunggu skrip selesai, catat latensinya"""
+        back = BackMsg()
+        back.rerun_script.query_string = ''
+        back.rerun_script.page_script_hash = ''
+        back.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        mulai = time.perf_counter()
+        await self.ws.send(back.SerializeToString())
+        error = None
+        while True:
+            msg = await self._recv()
+            tipe = msg.WhichOneof('type')
+            if tipe == 'new_session':
+                self.session_id = msg.new_session.initialize.session_id
+            elif tipe == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                if self._catat_elemen(msg.delta.new_element) == 'exception':
+                    error = msg.delta.new_element.exception.message
+            elif tipe == 'script_finished':
+                break
+        self.samples.append({
+            'step': step,
+            'kind': 'rerun',
+            'seconds': time.perf_counter() - mulai,
+            'error': error,
+        })
+
+    def _set(self, key, value):
+        if key not in self.elements:
+            raise ScriptError(f"Widget '{key}' tidak ditemukan di halaman")
+        jenis, proto = self.elements[key]
+        state = WidgetState(id=proto.id)
+        setattr(state, FIELD_NILAI[jenis], value)
+        self.widget_states[key] = state
+
+    def options(self, key):
+        return list(self.elements[key][1].options)
+
+    async def select(self, key, value, step=None):
+        self._set(key, value)
+        await self.rerun(step or key)
+
+    async def view(self, bagian_label):
+        label = next(o for o in self.options('view_aktif') if bagian_label in o)
+        await self.select('view_aktif', label, step=f"view:{bagian_label}")
+
+    async def download(self, key):
+        """Klik tombol unduh: minta file lewat backend operation lalu ambil URL-nya"""
+        jenis, proto = self.elements[key]
+        back = BackMsg()
+        request_id = uuid.uuid4().hex
+        back.backend_operation_request.request_id = request_id
+        if self.session_id:
+            back.backend_operation_request.session_id = self.session_id
+        back.backend_operation_request.deferred_file.file_id = proto.deferred_file_id
+        mulai = time.perf_counter()
+        await self.ws.send(back.SerializeToString())
+        while True:
+            msg = await self._recv()
+            if msg.WhichOneof('type') == 'backend_operation_response' \
+                    and msg.backend_operation_response.request_id == request_id:
+                break
+        respon = msg.backend_operation_response
+        error = respon.error_msg or None
+        if error is None:
+            url = self.base_url + respon.deferred_file.url
+            await asyncio.to_thread(lambda: urllib.request.urlopen(url).read())
+        self.samples.append({
+            'step': f"download:{key}",
+            'kind': 'download',
+            'seconds': time.perf_counter() - mulai,
+            'error': error,
+        })
+
+
+async def interaction_script(session, rng, think):
+    """Satu putaran interaksi pengguna yang realistis"""
+    async def jeda():
+        await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+
+    await session.view(VIEW_CLUSTER)
+    for cluster in rng.sample(session.options('cluster_filter_tab1'), 3):
+        await jeda()
+        await session.select('cluster_filter_tab1', cluster)
+
+    await jeda()
+    await session.view(VIEW_PENCARIAN)
+    # text_input mengirim nilai saat Enter/blur; pengguna biasanya memperbaiki kata kuncinya
+    for kata in rng.choice([('ind', 'industri'), ('perdag', 'perdagangan eceran'), ('47', '4711')]):
+        await jeda()
+        await session.select('search_kbli', kata)
+
+    await jeda()
+    await session.view(VIEW_MULTI)
+    await jeda()
+    await session.select('cluster_count_filter', rng.choice(session.options('cluster_count_filter')))
+    await jeda()
+    await session.select('pair_top_n', rng.choice(session.options('pair_top_n')))
+    if 'download_multi' in session.elements:
+        await jeda()
+        await session.download('download_multi')
+
+    await jeda()
+    await session.view(VIEW_SINGLE)
+    await jeda()
+    await session.select('cluster_filter_single', rng.choice(session.options('cluster_filter_single')))
+    await jeda()
+    await session.select('search_single', rng.choice(['', 'industri', 'perdagangan']))
+    if 'download_single' in session.elements:
+        await jeda()
+        await session.download('download_single')
+
+
+async def run_session(base_url, iterations, think, seed):
+    session = await DashboardSession(base_url).connect()
+    rng = random.Random(seed)
+    try:
+        await session.rerun('load')
+        for _ in range(iterations):
+            await interaction_script(session, rng, think)
+    except (ScriptError, websockets.ConnectionClosed, StopIteration, OSError) as e:
+        session.samples.append({'step': 'script', 'kind': 'error', 'seconds': 0.0, 'error': str(e)})
+    finally:
+        await session.close()
+    return session.samples
+
+
+# Pemantauan proses server ----------------------------------------------------
+
+class ProcessMonitor:
+    """Sampel CPU (%) dan RSS (MB) sebuah proses dari /proc/<pid>"""
+
+    def __init__(self, pid, interval=SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._page = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def read(self):
+        """(waktu CPU detik, RSS MB) atau None jika /proc tidak tersedia"""
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                # Nama proses bisa berisi spasi; field setelah ')' dihitung dari field ke-3
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{self.pid}/statm') as f:
+                rss = int(f.read().split()[1]) * self._page
+        except (OSError, IndexError, ValueError):
+            return None
+        cpu = (int(fields[11]) + int(fields[12])) / self._ticks
+        return cpu, rss / 2 ** 20
+
+    def _loop(self):
+        sebelum = self.read()
+        t_sebelum = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            sekarang = self.read()
+            t_sekarang = time.perf_counter()
+            if sekarang is None or sebelum is None:
+                continue
+            cpu_persen = 100 * (sekarang[0] - sebelum[0]) / (t_sekarang - t_sebelum)
+            self.samples.append((cpu_persen, sekarang[1]))
+            sebelum, t_sebelum = sekarang, t_sekarang
+
+    def start(self):
+        self.samples = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if not self.samples:
+            return {'cpu_avg_pct': None, 'cpu_max_pct': None, 'rss_max_mb': None, 'rss_end_mb': None}
+        cpu = np.array([s[0] for s in self.samples])
+        rss = np.array([s[1] for s in self.samples])
+        return {
+            'cpu_avg_pct': float(cpu.mean()),
+            'cpu_max_pct': float(cpu.max()),
+            'rss_max_mb': float(rss.max()),
+            'rss_end_mb': float(rss[-1]),
+        }
+
+
+# Server ----------------------------------------------------------------------
+
+def start_server(port, app_file=APP_FILE):
+    """Jalankan dashboard headless dan tunggu sampai health check berhasil"""
+    cmd = [
+        sys.executable, '-m', 'streamlit', 'run', str(app_file),
+        '--server.headless', 'true',
+        '--server.port', str(port),
+        '--server.fileWatcherType', 'none',
+        '--browser.gatherUsageStats', 'false',
+    ]
+    proses = subprocess.Popen(
+        cmd, cwd=str(Path(app_file).parent), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://localhost:{port}"
+    batas = time.time() + SERVER_START_TIMEOUT
+    while time.time() < batas:
+        if proses.poll() is not None:
+            raise RuntimeError(f"Server berhenti dengan kode {proses.returncode}")
+        try:
+            with urllib.request.urlopen(base_url + '/_stcore/health', timeout=1) as resp:
+                if resp.status == 200:
+                    return proses, base_url
+        except OSError:
+            time.sleep(0.2)
+    proses.terminate()
+    raise RuntimeError("Server tidak siap dalam batas waktu")
+
+
+def summarize(samples, sessions, seconds, monitor_stats, rss_awal):
+    """Ringkasan satu tingkat beban"""
+    rerun = np.array([s['seconds'] for s in samples if s['kind'] == 'rerun'])
+    unduh = np.array([s['seconds'] for s in samples if s['kind'] == 'download'])
+    hasil = {
+        'sessions': sessions,
+        'reruns': int(len(rerun)),
+        'downloads': int(len(unduh)),
+        'errors': sum(1 for s in samples if s['error']),
+        'wall_seconds': seconds,
+        'reruns_per_second': len(rerun) / seconds if seconds else None,
+    }
+    for p in PERSENTIL:
+        hasil[f'p{p}_ms'] = float(np.percentile(rerun, p) * 1000) if len(rerun) else None
+    hasil['max_ms'] = float(rerun.max() * 1000) if len(rerun) else None
+    hasil['download_p95_ms'] = float(np.percentile(unduh, 95) * 1000) if len(unduh) else None
+    hasil.update(monitor_stats)
+    if monitor_stats['rss_max_mb'] is not None and rss_awal is not None:
+        hasil['rss_per_session_mb'] = (monitor_stats['rss_max_mb'] - rss_awal) / sessions
+    else:
+        hasil['rss_per_session_mb'] = None
+    return hasil
+
+
+async def run_level(base_url, sessions, iterations, think, seed):
+    tugas = [run_session(base_url, iterations, think, seed + i) for i in range(sessions)]
+    per_sesi = await asyncio.gather(*tugas)
+    return [sample for samples in per_sesi for sample in samples]
+
+
+def run_load_test(base_url, levels, iterations, think, pid=None, seed=0):
+    monitor = ProcessMonitor(pid) if pid else None
+    # Satu sesi pemanasan agar cache server terisi sebelum pengukuran
+    asyncio.run(run_level(base_url, 1, 1, 0, seed))
+    hasil = []
+    for sessions in levels:
+        bacaan = monitor.read() if monitor else None
+        rss_awal = bacaan[1] if bacaan else None
+        if monitor:
+            monitor.start()
+        mulai = time.perf_counter()
+        samples = asyncio.run(run_level(base_url, sessions, iterations, think, seed))
+        durasi = time.perf_counter() - mulai
+        stats = monitor.stop() if monitor else ProcessMonitor(None).stop()
+        ringkasan = summarize(samples, sessions, durasi, stats, rss_awal)
+        ringkasan['steps'] = step_percentiles(samples)
+        hasil.append(ringkasan)
+        print(format_row(ringkasan), file=sys.stderr)
+    return hasil
+
+
+def step_percentiles(samples):
+    """p50/p95 latensi per langkah skenario"""
+    per_step = {}
+    for s in samples:
+        per_step.setdefault(s['step'], []).append(s['seconds'])
+    return {
+        step: {
+            'count': len(nilai),
+            'p50_ms': float(np.percentile(nilai, 50) * 1000),
+            'p95_ms': float(np.percentile(nilai, 95) * 1000),
+        }
+        for step, nilai in per_step.items()
+    }
+
+
+def _fmt(value, pola='{:.0f}'):
+    return '-' if value is None else pola.format(value)
+
+
+def format_row(r):
+    return (
+        f"sesi={r['sessions']:>3}  rerun={r['reruns']:>5}  error={r['errors']:>3}  "
+        f"p50={_fmt(r['p50_ms'])}ms  p95={_fmt(r['p95_ms'])}ms  p99={_fmt(r['p99_ms'])}ms  "
+        f"rerun/s={_fmt(r['reruns_per_second'], '{:.1f}')}  "
+        f"cpu={_fmt(r['cpu_avg_pct'])}%/{_fmt(r['cpu_max_pct'])}%  "
+        f"rss={_fmt(r['rss_max_mb'])}MB ({_fmt(r['rss_per_session_mb'], '{:.1f}')}MB/sesi)"
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Uji beban dashboard KBLI dengan banyak sesi")
+    parser.add_argument('--sessions', default=','.join(map(str, DEFAULT_SESSIONS)),
+                        help="Jumlah sesi bersamaan per tingkat, dipisah koma")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help="Putaran skenario per sesi")
+    parser.add_argument('--think', type=float, default=DEFAULT_THINK, help="Jeda rata-rata antar interaksi (detik)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port server yang dijalankan")
+    parser.add_argument('--url', help="Pakai server yang sudah berjalan (tanpa menjalankan server baru)")
+    parser.add_argument('--pid', type=int, help="PID server untuk pengukuran CPU/RSS bersama --url")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Tulis hasil JSON ke file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    levels = [int(s) for s in args.sessions.split(',') if s.strip()]
+    proses = None
+    if args.url:
+        base_url, pid = args.url, args.pid
+    else:
+        proses, base_url = start_server(args.port)
+        pid = proses.pid
+    try:
+        hasil = run_load_test(base_url, levels, args.iterations, args.think, pid, args.seed)
+    finally:
+        if proses is not None:
+            proses.terminate()
+            proses.wait()
+
+    laporan = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'iterations': args.iterations,
+        'think_seconds': args.think,
+        'levels': hasil,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(laporan, indent=2, ensure_ascii=False), encoding='utf-8')
+    else:
+        print(json.dumps(laporan, indent=2, ensure_ascii=False))
+    return 1 if any(r['errors'] for r in hasil) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
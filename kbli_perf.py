@@ -0,0 +1,210 @@
+"""
+Pencatatan waktu per rerun dashboard.
+
+Satu RerunTimer aktif per thread (Streamlit menjalankan setiap rerun di
+thread skrip sesinya). Kode lain cukup memanggil span(...) atau mark_miss();
+keduanya tidak melakukan apa pun jika tidak ada timer aktif, sehingga modul
+analitik tetap bisa dipakai di luar dashboard (API, CLI, benchmark).
+
+Setiap span mencatat nama, jenis (load, cache, build, view, ...), waktu mulai
+relatif terhadap awal rerun, durasi dan selisih RSS proses. Jika KBLI_PERF_LOG
+diisi path file, setiap rerun ditambahkan ke file itu sebagai JSON lines.
+"""
+import cProfile
+import functools
+import io
+import json
+import marshal
+import os
+import pstats
+import resource
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+PERF_LOG = os.environ.get('KBLI_PERF_LOG')
+
+KIND_LOAD = 'load'
+KIND_CACHE = 'cache'
+KIND_BUILD = 'build'
+KIND_VIEW = 'view'
+KIND_SECTION = 'section'
+
+STATUS_HIT = 'hit'
+STATUS_MISS = 'miss'
+
+# Jumlah fungsi teratas di ringkasan teks cProfile
+PROFILE_TOP_FUNCTIONS = 40
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_bytes():
+    """RSS proses saat ini (Linux: /proc/self/statm, lainnya: puncak RSS)"""
+    if _PAGE_SIZE is not None:
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            pass
+    # ru_maxrss dalam KB di Linux, byte di macOS; cukup sebagai perkiraan
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RerunTimer:
+    """Span waktu satu rerun, disimpan berurutan sesuai waktu selesai"""
+
+    def __init__(self, label=None, session=None):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.session = session
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._rss0 = rss_bytes()
+        self.records = []
+        self._stack = []
+        self.total_seconds = None
+        self.rss_mb = None
+        self.rss_delta_mb = None
+        self.profile = None
+
+    @contextmanager
+    def span(self, name, kind=KIND_SECTION):
+        record = {
+            'name': name,
+            'kind': kind,
+            'depth': len(self._stack),
+            'status': STATUS_HIT if kind == KIND_CACHE else None,
+        }
+        mulai = time.perf_counter()
+        rss_mulai = rss_bytes()
+        self._stack.append(record)
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            selesai = time.perf_counter()
+            record['start'] = mulai - self._t0
+            record['seconds'] = selesai - mulai
+            record['rss_delta_mb'] = (rss_bytes() - rss_mulai) / 2 ** 20
+            self.records.append(record)
+
+    def mark_miss(self):
+        """Tandai span cache terdalam sebagai miss (dipanggil dari badan fungsi cache)"""
+        for record in reversed(self._stack):
+            if record['kind'] == KIND_CACHE:
+                record['status'] = STATUS_MISS
+                return
+
+    def start_profile(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def finish(self):
+        """Tutup rerun; mengembalikan hasil profil (jika aktif) sebagai dict"""
+        hasil_profil = None
+        if self.profile is not None:
+            self.profile.disable()
+            hasil_profil = profile_outputs(self.profile)
+            self.profile = None
+        self.total_seconds = time.perf_counter() - self._t0
+        self.rss_mb = rss_bytes() / 2 ** 20
+        self.rss_delta_mb = self.rss_mb - self._rss0 / 2 ** 20
+        if PERF_LOG:
+            write_log(self, PERF_LOG)
+        return hasil_profil
+
+    def summary(self):
+        return {
+            'rerun_id': self.rerun_id,
+            'session': self.session,
+            'label': self.label,
+            'at': self.started_at,
+            'total_seconds': self.total_seconds,
+            'rss_mb': self.rss_mb,
+            'total_rss_delta_mb': self.rss_delta_mb,
+        }
+
+    def sorted_records(self):
+        """Span urut waktu mulai (untuk waterfall)"""
+        return sorted(self.records, key=lambda r: (r['start'], r['depth']))
+
+
+def profile_outputs(profile):
+    """File .prof (biner pstats) dan ringkasan teks fungsi terberat"""
+    teks = io.StringIO()
+    stats = pstats.Stats(profile, stream=teks)
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    # Format sama dengan pstats.Stats.dump_stats, tanpa file sementara
+    return {
+        'prof': marshal.dumps(stats.stats),
+        'text': teks.getvalue(),
+    }
+
+
+def write_log(timer, path):
+    """Tambahkan satu baris JSON per span ke file log"""
+    ringkasan = timer.summary()
+    baris = [
+        json.dumps(dict(ringkasan, **{k: v for k, v in record.items() if k != 'depth'}), ensure_ascii=False)
+        for record in timer.sorted_records()
+    ]
+    baris.append(json.dumps(dict(ringkasan, name='rerun', kind='total', seconds=timer.total_seconds)))
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(baris) + '\n')
+
+
+def start_rerun(label=None, session=None):
+    """Mulai timer untuk rerun di thread ini"""
+    timer = RerunTimer(label, session)
+    _local.timer = timer
+    return timer
+
+
+def end_rerun():
+    """Lepaskan timer thread ini; mengembalikan hasil profil jika ada"""
+    timer = getattr(_local, 'timer', None)
+    _local.timer = None
+    return None if timer is None else timer.finish()
+
+
+def current():
+    return getattr(_local, 'timer', None)
+
+
+@contextmanager
+def span(name, kind=KIND_SECTION):
+    """Catat durasi blok di timer aktif; tanpa timer, tidak melakukan apa pun"""
+    timer = current()
+    if timer is None:
+        yield None
+        return
+    with timer.span(name, kind) as record:
+        yield record
+
+
+def mark_miss():
+    timer = current()
+    if timer is not None:
+        timer.mark_miss()
+
+
+def timed_cache(fn):
+    """
+    Catat pemanggilan fungsi ber-cache (mis. st.cache_resource) sebagai span cache.
+
+    Span dianggap hit kecuali badan fungsi memanggil mark_miss().
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(getattr(fn, '__name__', 'cache'), KIND_CACHE):
+            return fn(*args, **kwargs)
+    return wrapper
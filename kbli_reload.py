@@ -0,0 +1,121 @@
+"""
+Reload otomatis workbook sumber.
+
+SnapshotStore memegang DatasetSnapshot yang aktif. Saat workbook di DATA_DIR
+berubah (atau workbook bertanggal yang lebih baru diletakkan di sana),
+DataWatcher memicu reload: snapshot baru dibangun di thread latar, mewarisi
+tabel turunan yang sumbernya tidak berubah, lalu ditukar dengan satu
+penugasan referensi. Pembaca yang sudah memegang snapshot lama tetap
+memakainya sampai mengambil snapshot berikutnya.
+"""
+import threading
+import time
+from pathlib import Path
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from kbli_data import CACHE_DIR, DATA_DIR, data_version
+from kbli_snapshot import DatasetSnapshot
+
+# Tunggu sampai tidak ada perubahan file selama sekian detik sebelum reload,
+# agar workbook yang masih disalin tidak terbaca setengah jadi
+DEBOUNCE_SECONDS = 2.0
+
+
+class SnapshotStore:
+    """Snapshot aktif beserta reload yang aman dipanggil dari thread mana pun"""
+
+    def __init__(self, cache_dir=CACHE_DIR, data_dir=DATA_DIR, warm=()):
+        self.cache_dir = cache_dir
+        self.data_dir = data_dir
+        self.warm = tuple(warm)
+        self._reload_lock = threading.Lock()
+        self._snapshot = DatasetSnapshot.load(cache_dir=cache_dir, data_dir=data_dir).warm(*self.warm)
+        self.last_reload = None
+        self.last_error = None
+
+    def current(self):
+        """Snapshot yang berlaku saat ini"""
+        return self._snapshot
+
+    def reload(self, force=False):
+        """
+        Muat ulang jika versi data berubah. Mengembalikan True jika snapshot ditukar.
+
+        Gagal memuat (mis. workbook rusak) tidak mengganti snapshot aktif;
+        errornya disimpan di last_error.
+        """
+        with self._reload_lock:
+            lama = self._snapshot
+            try:
+                version = data_version(cache_dir=self.cache_dir, data_dir=self.data_dir)
+                if version == lama.version and not force:
+                    return False
+                mulai = time.perf_counter()
+                baru = DatasetSnapshot.load(version, self.cache_dir, self.data_dir)
+                info = baru.inherit(lama)
+                # Hitung di sini turunan yang sudah dipakai di snapshot lama,
+                # supaya pembaca tidak menanggungnya setelah pertukaran
+                baru.warm(*self.warm, *lama.computed())
+            except Exception as e:
+                self.last_error = e
+                return False
+            self._snapshot = baru
+            self.last_error = None
+            self.last_reload = dict(
+                info,
+                version=version,
+                previous_version=lama.version,
+                seconds=time.perf_counter() - mulai,
+                at=time.time(),
+            )
+            return True
+
+
+class _WorkbookHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')):
+            nama = Path(str(path)).name
+            # Abaikan file kunci Excel (~$...) dan file sementara
+            if nama.lower().endswith('.xlsx') and not nama.startswith('~$'):
+                self.watcher.schedule_reload()
+                return
+
+
+class DataWatcher:
+    """Pantau DATA_DIR dan panggil store.reload setelah perubahan mereda"""
+
+    def __init__(self, store, data_dir=None, debounce=DEBOUNCE_SECONDS):
+        self.store = store
+        self.data_dir = Path(data_dir if data_dir is not None else store.data_dir)
+        self.debounce = debounce
+        self._observer = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def schedule_reload(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.store.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def start(self):
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(_WorkbookHandler(self), str(self.data_dir), recursive=False)
+        self._observer.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
@@ -0,0 +1,165 @@
+"""
+Indeks pencarian teks penuh (inverted index) untuk katalog KBLI.
+
+Teks dinormalisasi (huruf kecil, aksen dihapus, tanda baca menjadi spasi)
+lalu dipecah menjadi token. Posting list setiap field disimpan berurutan
+menurut kosakata yang tersortir, sehingga pencarian prefix cukup berupa
+satu potongan array yang bersebelahan.
+"""
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kbli_index import normalize_kode
+
+# Bobot ranking: kecocokan kode > judul > deskripsi
+BOBOT_FIELD = {'kode': 4.0, 'judul': 2.0, 'deskripsi': 1.0}
+SEMUA_FIELD = tuple(BOBOT_FIELD)
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_OPERATOR_OR = re.compile(r'\s+(?:OR|ATAU)\s+|\s*\|\s*')
+
+
+def fold_text(text):
+    """Huruf kecil, hapus aksen (é -> e) dan ganti tanda baca dengan spasi"""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ''
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def fold_text_series(series):
+    """Versi vektor dari fold_text untuk satu kolom teks"""
+    teks = series.astype(object).where(series.notna(), '').astype(str)
+    return (
+        teks.str.normalize('NFKD')
+        .str.replace('[\u0300-\u036f]', '', regex=True)
+        .str.lower()
+        .str.replace(r'[^0-9a-z]+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def tokenize(text):
+    return fold_text(text).split()
+
+
+def parse_query(query):
+    """
+    Pecah query menjadi grup OR berisi term AND.
+
+    'kopi susu OR teh' -> [['kopi', 'susu'], ['teh']]. Setiap term dicocokkan
+    sebagai prefix token; tanda '*' di akhir term boleh dipakai dan diabaikan.
+    """
+    groups = []
+    for part in _OPERATOR_OR.split(query.strip()):
+        terms = tokenize(part.replace('*', ' '))
+        if terms:
+            groups.append(terms)
+    return groups
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    # Posisi baris katalog, urut dari skor tertinggi
+    positions: np.ndarray
+    scores: np.ndarray
+
+    @property
+    def total(self):
+        return len(self.positions)
+
+
+class KbliSearchIndex:
+    """Inverted index atas kode, judul dan deskripsi KBLI"""
+
+    def __init__(self, n_docs, vocab, postings):
+        self.n_docs = n_docs
+        # Kosakata tersortir, dipakai bersama oleh semua field
+        self._vocab = vocab
+        # field -> (indptr, doc_ids); posting token i = doc_ids[indptr[i]:indptr[i + 1]]
+        self._postings = postings
+
+    @classmethod
+    def from_frame(cls, df, kode_col='KODE KBLI', judul_col='JUDUL KBLI', deskripsi_col='DESKRIPSI KBLI'):
+        """Bangun indeks; posisi dokumen sama dengan posisi baris df"""
+        tokens = {
+            'kode': [_kode_tokens(v) for v in df[kode_col]],
+            'judul': [tokenize(v) for v in df[judul_col]],
+            'deskripsi': [tokenize(v) for v in df[deskripsi_col]] if deskripsi_col else [[] for _ in range(len(df))],
+        }
+
+        pasangan = {}
+        for field, per_doc in tokens.items():
+            pairs = pd.DataFrame(
+                [(tok, doc) for doc, toks in enumerate(per_doc) for tok in toks],
+                columns=['token', 'doc'],
+            )
+            pasangan[field] = pairs.drop_duplicates().sort_values(['token', 'doc'], kind='stable')
+
+        vocab = sorted(set().union(*(set(p['token']) for p in pasangan.values())))
+        vocab_arr = np.array(vocab, dtype=object)
+
+        postings = {}
+        for field, pairs in pasangan.items():
+            token_id = np.searchsorted(vocab_arr, pairs['token'].to_numpy(dtype=object))
+            jumlah = np.bincount(token_id, minlength=len(vocab)) if len(token_id) else np.zeros(len(vocab), dtype=np.int64)
+            indptr = np.concatenate(([0], np.cumsum(jumlah)))
+            postings[field] = (indptr, pairs['doc'].to_numpy(dtype=np.int32))
+        return cls(len(df), vocab, postings)
+
+    def _prefix_range(self, term):
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = bisect.bisect_left(self._vocab, term + '\uffff', lo)
+        return lo, hi
+
+    def _term_scores(self, term, fields):
+        """Skor per dokumen untuk satu term prefix (0 jika tidak cocok)"""
+        lo, hi = self._prefix_range(term)
+        scores = np.zeros(self.n_docs)
+        if lo == hi:
+            return scores
+        for field in fields:
+            indptr, doc_ids = self._postings[field]
+            docs = doc_ids[indptr[lo]:indptr[hi]]
+            if len(docs):
+                hit = np.zeros(self.n_docs, dtype=bool)
+                hit[docs] = True
+                scores += hit * BOBOT_FIELD[field]
+        return scores
+
+    def search(self, query, fields=SEMUA_FIELD):
+        """
+        Cari dokumen yang cocok dengan query.
+
+        Dalam satu grup semua term harus cocok (AND); antar grup digabung OR.
+        Hasil diurutkan menurut skor, lalu menurut posisi baris.
+        """
+        total = np.zeros(self.n_docs)
+        cocok = np.zeros(self.n_docs, dtype=bool)
+        for terms in parse_query(query):
+            grup_skor = np.zeros(self.n_docs)
+            grup_cocok = np.ones(self.n_docs, dtype=bool)
+            for term in terms:
+                skor = self._term_scores(term, fields)
+                grup_cocok &= skor > 0
+                grup_skor += skor
+            cocok |= grup_cocok
+            total = np.maximum(total, np.where(grup_cocok, grup_skor, 0))
+
+        positions = np.flatnonzero(cocok)
+        urutan = np.argsort(-total[positions], kind='stable')
+        return SearchResult(positions[urutan], total[positions][urutan])
+
+
+def _kode_tokens(value):
+    """Token kode: bentuk 5 digit dan bentuk tanpa nol di depan (mis. 01111 dan 1111)"""
+    kode = normalize_kode(value)
+    if kode is None:
+        return tokenize(value)
+    return list({kode, kode.lstrip('0') or kode})
@@ -0,0 +1,346 @@
+"""
+Inti analitik dashboard tanpa Streamlit.
+
+DatasetSnapshot membungkus satu versi data (lihat kbli_data.data_version).
+Setiap tabel turunan dihitung saat pertama kali diakses lalu disimpan di
+snapshot, sehingga interaksi widget hanya membayar pekerjaan untuk tampilan
+yang sedang dibuka. Snapshot dipakai read-only dan aman dibagikan antar sesi.
+"""
+import hashlib
+from functools import cached_property
+
+import pandas as pd
+
+from kbli_analysis import (
+    ClusterCooccurrence,
+    changed_assignments,
+    cluster_assignments,
+    cluster_count_distribution,
+    multi_cluster_kbli,
+    single_cluster_kbli,
+)
+from kbli_bitmap import BitmapIndex, cluster_count_bucket
+from kbli_data import CACHE_DIR, DATA_DIR, compact_tables, data_version, load_all
+from kbli_fuzzy import JobMatcher
+from kbli_index import KbliHierarchy, KbliIndex, normalize_kode_series
+from kbli_perf import KIND_BUILD, span
+from kbli_search import KbliSearchIndex
+from kbli_sql import SqlEngine
+from kbli_validation import validate_tables
+
+TIDAK_DITEMUKAN = 'Tidak Ditemukan'
+CLUSTER_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+
+
+# Sheet sumber di KbliTables
+SOURCE_TABLES = ('kbli_cluster', 'kbli_full', 'tidak_terklasifikasi', 'cluster_pekerjaan')
+_INDEKS = ('kbli_cluster', 'kbli_full')
+_CLUSTER = ('kbli_cluster',)
+_PEKERJAAN = ('cluster_pekerjaan',)
+_HASIL = ('tidak_terklasifikasi',)
+
+# Tabel turunan -> sheet sumber yang menentukan isinya. Saat reload, turunan
+# yang semua sumbernya tidak berubah dipakai ulang dari snapshot sebelumnya.
+DEPENDENCIES = {
+    'kbli_index': _INDEKS,
+    'katalog': _INDEKS,
+    'search_index': _INDEKS,
+    'hierarchy': _INDEKS,
+    'assignments': _CLUSTER,
+    'multi_cluster': _CLUSTER,
+    'single_cluster': _CLUSTER,
+    'multi_cluster_distribution': _CLUSTER,
+    'cooccurrence': _CLUSTER,
+    'clusters': _CLUSTER,
+    'cluster_members': _CLUSTER,
+    'debug_stats': _CLUSTER,
+    'clean_filters': _CLUSTER,
+    'multi_cluster_filters': _CLUSTER,
+    'single_cluster_filters': _CLUSTER,
+    'summary': ('kbli_cluster', 'kbli_full', 'cluster_pekerjaan'),
+    'pekerjaan_clusters': _PEKERJAAN,
+    'pekerjaan_filters': _PEKERJAAN,
+    'job_matcher': ('kbli_cluster', 'cluster_pekerjaan', 'tidak_terklasifikasi'),
+    'jumlah_pekerjaan_tidak_terklasifikasi': _PEKERJAAN,
+    '_hasil_ditemukan_mask': _HASIL,
+    'hasil_ditemukan': _HASIL,
+    'hasil_tidak_ditemukan': _HASIL,
+    'validation': SOURCE_TABLES,
+    'sql_engine': SOURCE_TABLES,
+}
+
+
+def frame_fingerprint(df):
+    """Hash isi DataFrame (kolom + nilai), tidak bergantung pada file asalnya"""
+    h = hashlib.sha256()
+    h.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class derived_table(cached_property):
+    """cached_property yang mencatat waktu pembangunan tabel ke timer rerun aktif"""
+
+    def __get__(self, instance, owner=None):
+        # Setelah dihitung, nilai dibaca langsung dari instance.__dict__ dan
+        # __get__ ini tidak dipanggil lagi
+        if instance is None:
+            return self
+        with span(self.attrname, KIND_BUILD):
+            return super().__get__(instance, owner)
+
+
+class DatasetSnapshot:
+    """Satu versi data beserta tabel turunan yang dihitung secara malas"""
+
+    def __init__(self, version, tables):
+        self.version = version
+        self.tables = tables
+
+    @classmethod
+    def load(cls, version=None, cache_dir=CACHE_DIR, data_dir=DATA_DIR):
+        """Muat snapshot dari workbook (lewat cache Parquet)"""
+        if version is None:
+            version = data_version(cache_dir=cache_dir, data_dir=data_dir)
+        return cls(version, compact_tables(*load_all(cache_dir, data_dir)))
+
+    @classmethod
+    def from_workbooks(cls, workbook_utama, workbook_klasifikasi, cache_dir=CACHE_DIR):
+        """Snapshot dari pasangan workbook tertentu, mis. versi lama untuk dibandingkan"""
+        workbooks = (workbook_utama, workbook_klasifikasi)
+        version = data_version(paths=workbooks, cache_dir=cache_dir)
+        return cls(version, compact_tables(*load_all(cache_dir, workbooks=workbooks)))
+
+    @derived_table
+    def fingerprints(self):
+        """Sidik jari isi setiap sheet sumber"""
+        return {name: frame_fingerprint(getattr(self.tables, name)) for name in SOURCE_TABLES}
+
+    def computed(self):
+        """Nama tabel turunan yang sudah dihitung di snapshot ini"""
+        return [name for name in DEPENDENCIES if name in self.__dict__]
+
+    def inherit(self, previous):
+        """
+        Pakai ulang tabel turunan dari snapshot sebelumnya.
+
+        Turunan yang sumbernya tidak berubah disalin apa adanya. Jika hanya
+        sebagian assignment cluster berubah, matriks pasangan cluster diperbarui
+        secara inkremental dari KBLI yang berubah saja. Mengembalikan dict
+        berisi sheet yang berubah, turunan yang dipakai ulang dan jumlah KBLI
+        yang berubah assignment-nya (None jika tidak dihitung).
+        """
+        changed = [name for name in SOURCE_TABLES if self.fingerprints[name] != previous.fingerprints[name]]
+        reused = []
+        for name in previous.computed():
+            if not set(DEPENDENCIES[name]) & set(changed):
+                self.__dict__[name] = previous.__dict__[name]
+                reused.append(name)
+
+        kode_berubah = None
+        if 'kbli_cluster' in changed and 'cooccurrence' in previous.__dict__:
+            kode_berubah = changed_assignments(previous.assignments, self.assignments)
+            lama = previous.clean[previous.clean['KODE_KBLI'].isin(kode_berubah)]
+            baru = self.clean[self.clean['KODE_KBLI'].isin(kode_berubah)]
+            self.__dict__['cooccurrence'] = previous.cooccurrence.updated(lama, baru, self.clean)
+        return {
+            'changed_tables': changed,
+            'reused': reused,
+            'changed_codes': None if kode_berubah is None else len(kode_berubah),
+        }
+
+    def warm(self, *names):
+        """Hitung tabel turunan lebih awal, mis. sebelum server menerima permintaan"""
+        for name in names:
+            getattr(self, name)
+        return self
+
+    # Sheet sumber --------------------------------------------------------
+
+    @property
+    def kbli_cluster(self):
+        return self.tables.kbli_cluster
+
+    @property
+    def kbli_full(self):
+        return self.tables.kbli_full
+
+    @property
+    def tidak_terklasifikasi(self):
+        return self.tables.tidak_terklasifikasi
+
+    @property
+    def cluster_pekerjaan(self):
+        return self.tables.cluster_pekerjaan
+
+    @property
+    def clean(self):
+        return self.tables.clean
+
+    # Indeks --------------------------------------------------------------
+
+    @derived_table
+    def kbli_index(self):
+        return KbliIndex.from_frames(self.kbli_full, self.kbli_cluster)
+
+    @derived_table
+    def katalog(self):
+        """Katalog KBLI gabungan (kolom seperti sheet 'KBLI', kode 5 digit)"""
+        return self.kbli_index.to_frame()
+
+    @derived_table
+    def search_index(self):
+        return KbliSearchIndex.from_frame(self.katalog)
+
+    @derived_table
+    def hierarchy(self):
+        return KbliHierarchy.from_index(self.kbli_index)
+
+    # Analisis cluster ----------------------------------------------------
+
+    @derived_table
+    def assignments(self):
+        return cluster_assignments(self.clean)
+
+    @derived_table
+    def multi_cluster(self):
+        return multi_cluster_kbli(self.assignments)
+
+    @derived_table
+    def single_cluster(self):
+        return single_cluster_kbli(self.assignments)
+
+    @derived_table
+    def multi_cluster_distribution(self):
+        """Jumlah KBLI multi-cluster per jumlah cluster, untuk chart distribusi"""
+        return cluster_count_distribution(self.multi_cluster)
+
+    @derived_table
+    def cooccurrence(self):
+        return ClusterCooccurrence.from_frame(self.clean)
+
+    @derived_table
+    def clusters(self):
+        """Cluster di 'KBLI berdasarkan Cluster', urut kemunculan"""
+        return self.clean['CLUSTER'].dropna().unique().tolist()
+
+    @derived_table
+    def cluster_members(self):
+        """Cluster -> daftar kode KBLI 5 digit (unik, urut kemunculan)"""
+        data = self.clean.dropna(subset=['CLUSTER'])
+        kode = normalize_kode_series(data['KODE_KBLI'])
+        pasangan = data.assign(_KODE=kode).dropna(subset=['_KODE']).drop_duplicates(['CLUSTER', '_KODE'])
+        return {
+            str(cluster): grup['_KODE'].tolist()
+            for cluster, grup in pasangan.groupby('CLUSTER', sort=False, observed=True)
+        }
+
+    @derived_table
+    def summary(self):
+        """Metrik header dashboard"""
+        return {
+            'total_kbli_cluster': int(self.clean['KODE_KBLI'].nunique()),
+            'total_kbli_lengkap': len(self.kbli_full),
+            'total_pekerjaan': len(self.cluster_pekerjaan),
+            'single_cluster': len(self.single_cluster),
+            'multi_cluster': len(self.multi_cluster),
+        }
+
+    @derived_table
+    def debug_stats(self):
+        """Statistik untuk panel Debug Info"""
+        kode = self.kbli_cluster['KODE_KBLI']
+        counts = kode.value_counts()
+        return {
+            'rows': len(self.kbli_cluster),
+            'unique': int(kode.nunique()),
+            'nulls': int(kode.isnull().sum()),
+            'duplicates': counts[counts > 1],
+            'columns': list(self.kbli_cluster.columns),
+            'sample': self.kbli_cluster[['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']].head(),
+        }
+
+    # Indeks filter (bitmap) ----------------------------------------------
+
+    @derived_table
+    def clean_filters(self):
+        return BitmapIndex.from_frame(self.clean, {'cluster': 'CLUSTER'})
+
+    @derived_table
+    def multi_cluster_filters(self):
+        """Facet: jumlah cluster, kelompok jumlah cluster, dan setiap cluster anggota"""
+        df = self.multi_cluster
+        index = BitmapIndex.from_frame(df, {'jumlah': 'JUMLAH_CLUSTER', 'cluster': 'CLUSTERS'}, multi=('cluster',))
+        index.add_facet('bucket', cluster_count_bucket(df['JUMLAH_CLUSTER']))
+        return index
+
+    @derived_table
+    def single_cluster_filters(self):
+        return BitmapIndex.from_frame(self.single_cluster, {'cluster': 'CLUSTER'})
+
+    @derived_table
+    def pekerjaan_filters(self):
+        return BitmapIndex.from_frame(self.cluster_pekerjaan, {'cluster': 'CLUSTER'})
+
+    # Pekerjaan UMKM ------------------------------------------------------
+
+    @derived_table
+    def pekerjaan_clusters(self):
+        """Cluster di sheet 'Cluster Pekerjaan', urut kemunculan"""
+        return self.cluster_pekerjaan['CLUSTER'].dropna().unique().tolist()
+
+    @derived_table
+    def jumlah_pekerjaan_tidak_terklasifikasi(self):
+        return int((self.cluster_pekerjaan['CLUSTER'] == CLUSTER_TIDAK_TERKLASIFIKASI).sum())
+
+    def pekerjaan_by_cluster(self, cluster):
+        index = self.pekerjaan_filters
+        return index.take(self.cluster_pekerjaan, index.bitmap('cluster', cluster))
+
+    @derived_table
+    def job_matcher(self):
+        """Indeks pencarian nama pekerjaan toleran salah ketik (lihat kbli_fuzzy)"""
+        return JobMatcher.from_tables(self.cluster_pekerjaan, self.tidak_terklasifikasi, self.cluster_members)
+
+    # Hasil klasifikasi ---------------------------------------------------
+
+    @derived_table
+    def _hasil_ditemukan_mask(self):
+        return (self.tidak_terklasifikasi['KODE KBLI'] != TIDAK_DITEMUKAN).to_numpy()
+
+    @derived_table
+    def hasil_ditemukan(self):
+        return self.tidak_terklasifikasi[self._hasil_ditemukan_mask]
+
+    @derived_table
+    def hasil_tidak_ditemukan(self):
+        return self.tidak_terklasifikasi[~self._hasil_ditemukan_mask]
+
+    # Validasi ------------------------------------------------------------
+
+    @derived_table
+    def validation(self):
+        """Laporan kualitas data (lihat kbli_validation)"""
+        return validate_tables(self.tables, self.version)
+
+    # SQL -----------------------------------------------------------------
+
+    @derived_table
+    def sql_engine(self):
+        """Koneksi DuckDB berisi sheet snapshot (lihat kbli_sql)"""
+        return SqlEngine.from_snapshot(self)
+
+    # Filter --------------------------------------------------------------
+
+    def search_codes(self, query):
+        """Kode KBLI 5 digit yang kode atau judulnya cocok dengan query"""
+        hasil = self.search_index.search(query, fields=('kode', 'judul'))
+        return self.katalog['KODE KBLI'].to_numpy()[hasil.positions]
+
+    def filter_by_search(self, df, query):
+        """Saring baris df (kolom KODE_KBLI) yang kode atau judulnya cocok dengan query"""
+        return df[normalize_kode_series(df['KODE_KBLI']).isin(self.search_codes(query))]
+
+    def search_bitmap(self, index, query):
+        """Bitset baris indeks filter yang cocok dengan query pencarian"""
+        return index.keys_bitmap(self.search_codes(query))
@@ -0,0 +1,253 @@
+"""
+Query SQL ad-hoc atas data yang sedang dimuat (DuckDB in-process).
+
+Sheet snapshot didaftarkan sebagai tabel Arrow di satu koneksi DuckDB per
+versi data. Kolom string pandas sudah berbasis Arrow sehingga pendaftaran
+tidak menyalin isi teks; join dan agregasi dijalankan mesin kolumnar DuckDB
+secara multi-thread.
+
+Tabel:
+    kbli               katalog KBLI (KODE_KBLI 5 digit, JUDUL_KBLI, DESKRIPSI_KBLI)
+    kbli_cluster       pasangan KBLI - cluster dari 'KBLI berdasarkan Cluster'
+    pekerjaan          'Cluster Pekerjaan' (PEKERJAAN, CLUSTER)
+    hasil_klasifikasi  'Hasil Klasifikasi' (PEKERJAAN, CLUSTER, KODE_KBLI, ...)
+
+Hanya satu pernyataan SELECT per query; akses file dari SQL dimatikan.
+Hasil dibatasi jumlah barisnya, query dihentikan setelah batas waktu, dan
+hasil di-cache per (versi data, teks query, batas baris).
+
+Contoh:
+    python kbli_sql.py "SELECT CLUSTER, COUNT(*) AS n FROM pekerjaan GROUP BY 1 ORDER BY n DESC"
+    python kbli_sql.py --file query.sql --limit 5000 --output hasil.csv
+"""
+import argparse
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from kbli_index import normalize_kode_series
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 100000
+# Detik sebelum query dihentikan
+DEFAULT_TIMEOUT = 10.0
+# Jumlah hasil query yang disimpan (LRU)
+RESULT_CACHE_SIZE = 64
+
+# DuckDB melaporkan PRAGMA, SHOW, DESCRIBE dan SUMMARIZE sebagai SELECT, jadi
+# kata pertama teks query (setelah komentar dan kurung buka) juga diperiksa
+KATA_AWAL_QUERY = {'SELECT', 'WITH', 'FROM', 'VALUES'}
+POLA_KATA_AWAL = re.compile(r'(?:\s+|--[^\n]*|/\*.*?\*/|\()*(\w+)', re.S)
+
+CONTOH_QUERY = """SELECT p.CLUSTER,
+       COUNT(DISTINCT p.PEKERJAAN) AS JUMLAH_PEKERJAAN,
+       COUNT(DISTINCT kc.KODE_KBLI) AS JUMLAH_KBLI
+FROM pekerjaan p
+LEFT JOIN kbli_cluster kc ON kc.CLUSTER = p.CLUSTER
+GROUP BY p.CLUSTER
+ORDER BY JUMLAH_PEKERJAAN DESC"""
+
+
+class QueryError(ValueError):
+    """Query ditolak, gagal dijalankan atau melewati batas waktu"""
+
+
+def sql_tables(snapshot):
+    """Nama tabel SQL -> DataFrame dengan nama kolom tanpa spasi"""
+    clean = snapshot.clean
+    hasil = snapshot.tidak_terklasifikasi
+    return {
+        'kbli': snapshot.katalog.rename(columns={
+            'KODE KBLI': 'KODE_KBLI', 'JUDUL KBLI': 'JUDUL_KBLI', 'DESKRIPSI KBLI': 'DESKRIPSI_KBLI',
+        }),
+        'kbli_cluster': clean.assign(KODE_KBLI=normalize_kode_series(clean['KODE_KBLI']))[
+            ['KODE_KBLI', 'JUDUL_KBLI', 'CLUSTER']
+        ],
+        'pekerjaan': snapshot.cluster_pekerjaan.rename(columns={'List Pekerjaan UMKM': 'PEKERJAAN'}),
+        'hasil_klasifikasi': hasil.rename(columns={
+            'List Pekerjaan UMKM': 'PEKERJAAN', 'KODE KBLI': 'KODE_KBLI',
+            'JUDUL KBLI': 'JUDUL_KBLI', 'DESKRIPSI KBLI': 'DESKRIPSI_KBLI',
+        }),
+    }
+
+
+def normalize_query(sql):
+    """Teks query tanpa spasi di tepi dan titik koma penutup (kunci cache)"""
+    return sql.strip().rstrip(';').strip()
+
+
+@dataclass
+class QueryResult:
+    sql: str
+    version: str
+    frame: pd.DataFrame
+    # True jika hasil lebih banyak dari batas baris
+    truncated: bool
+    seconds: float
+    cached: bool = False
+
+
+class SqlEngine:
+    """Koneksi DuckDB read-only berisi tabel satu snapshot"""
+
+    def __init__(self, tables):
+        self.arrow_tables = {
+            name: pa.Table.from_pandas(df, preserve_index=False) for name, df in tables.items()
+        }
+        self.schemas = {
+            name: [(field.name, str(field.type)) for field in tabel.schema]
+            for name, tabel in self.arrow_tables.items()
+        }
+        # SQL tidak bisa membaca/menulis file dan konfigurasi tidak bisa diubah dari query
+        self.connection = duckdb.connect()
+        self.connection.execute("SET enable_external_access = false")
+        self.connection.execute("SET lock_configuration = true")
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(sql_tables(snapshot))
+
+    def schema_frame(self):
+        """Daftar tabel dan kolom untuk ditampilkan"""
+        return pd.DataFrame(
+            [(tabel, kolom, tipe) for tabel, kolom_tabel in self.schemas.items() for kolom, tipe in kolom_tabel],
+            columns=['TABEL', 'KOLOM', 'TIPE'],
+        )
+
+    def _validate(self, sql):
+        try:
+            pernyataan = self.connection.extract_statements(sql)
+        except duckdb.Error as e:
+            raise QueryError(str(e))
+        if len(pernyataan) != 1:
+            raise QueryError("Tulis tepat satu pernyataan SQL")
+        kata_awal = POLA_KATA_AWAL.match(sql)
+        if (pernyataan[0].type != duckdb.StatementType.SELECT
+                or kata_awal is None or kata_awal.group(1).upper() not in KATA_AWAL_QUERY):
+            raise QueryError("Hanya query SELECT yang diizinkan")
+
+    def execute(self, sql, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT):
+        """Jalankan satu SELECT; mengembalikan (DataFrame, terpotong)"""
+        self._validate(sql)
+        # Cursor terpisah per query agar aman dipakai banyak sesi sekaligus.
+        # Tabel terdaftar hanya terlihat di koneksi tempat ia didaftarkan, jadi
+        # didaftarkan ulang per cursor (hanya referensi, tanpa menyalin data)
+        cursor = self.connection.cursor()
+        for name, tabel in self.arrow_tables.items():
+            cursor.register(name, tabel)
+        timer = threading.Timer(timeout, cursor.interrupt)
+        timer.start()
+        try:
+            frame = cursor.sql(sql).limit(limit + 1).df()
+        except duckdb.InterruptException:
+            raise QueryError(f"Query dihentikan setelah {timeout:g} detik")
+        except duckdb.Error as e:
+            raise QueryError(str(e))
+        finally:
+            timer.cancel()
+            cursor.close()
+        return frame.iloc[:limit], len(frame) > limit
+
+
+class ResultCache:
+    """Cache LRU hasil query, kunci (versi data, teks query, batas baris)"""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hasil = self._data.get(key)
+            if hasil is not None:
+                self._data.move_to_end(key)
+            return hasil
+
+    def put(self, key, hasil):
+        with self._lock:
+            self._data[key] = hasil
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_result_cache = ResultCache()
+
+
+def run_query(snapshot, sql, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT, cache=_result_cache):
+    """
+    Jalankan query SQL atas snapshot.
+
+    Hasil yang sama (versi, query, limit) diambil dari cache tanpa menjalankan
+    ulang query. Melempar QueryError jika query ditolak, gagal atau timeout.
+    """
+    sql = normalize_query(sql)
+    if not sql:
+        raise QueryError("Query kosong")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"Batas baris harus antara 1 dan {MAX_LIMIT}")
+    key = (snapshot.version, sql, limit)
+    if cache is not None:
+        hasil = cache.get(key)
+        if hasil is not None:
+            return QueryResult(hasil.sql, hasil.version, hasil.frame, hasil.truncated, hasil.seconds, cached=True)
+
+    mulai = time.perf_counter()
+    frame, terpotong = snapshot.sql_engine.execute(sql, limit, timeout)
+    hasil = QueryResult(sql, snapshot.version, frame, terpotong, time.perf_counter() - mulai)
+    if cache is not None:
+        cache.put(key, hasil)
+    return hasil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query SQL atas data cluster KBLI")
+    parser.add_argument('query', nargs='?', help="Teks query SELECT")
+    parser.add_argument('--file', help="Baca query dari file")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help=f"Batas baris (default {DEFAULT_LIMIT})")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Batas waktu query (detik)")
+    parser.add_argument('--output', help="Simpan hasil ke file CSV")
+    parser.add_argument('--tables', action='store_true', help="Tampilkan daftar tabel dan kolom")
+    args = parser.parse_args(argv)
+
+    from kbli_snapshot import DatasetSnapshot
+    snapshot = DatasetSnapshot.load()
+
+    if args.tables:
+        print(snapshot.sql_engine.schema_frame().to_string(index=False))
+        return 0
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            sql = f.read()
+    elif args.query:
+        sql = args.query
+    else:
+        parser.error("Berikan query atau --file")
+
+    try:
+        hasil = run_query(snapshot, sql, args.limit, args.timeout, cache=None)
+    except ValueError as e:
+        # QueryError dari engine snapshot adalah kelas modul kbli_sql, bukan __main__
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        hasil.frame.to_csv(args.output, index=False)
+        print(f"{len(hasil.frame)} baris disimpan ke {args.output}")
+    else:
+        print(hasil.frame.to_string(index=False))
+    keterangan = f" (dipotong pada {args.limit} baris)" if hasil.truncated else ""
+    print(f"{len(hasil.frame)} baris dalam {hasil.seconds * 1000:.1f} ms{keterangan}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Komponen tampilan Streamlit yang dipakai bersama oleh beberapa tab.
+"""
+import math
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+import kbli_perf as perf
+from kbli_charts import rerun_waterfall_figure
+from kbli_export import FORMAT_EKSPOR, export_file
+
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+# Di atas jumlah ini, mode tabel ringkas aktif secara default
+COMPACT_THRESHOLD = 500
+# Nilai tombol (st.button, download_button dll.) dan seleksi chart tidak boleh
+# di-set lewat session state, jadi key-nya diberi awalan 'button_', 'download_'
+# atau 'chart_'
+NON_STATE_PREFIXES = ('button_', 'download_', 'chart_', 'FormSubmitter:')
+
+# Session state panel performa
+PERF_SESSION_KEY = "perf_session"
+PERF_HISTORY_KEY = "perf_history"
+PROFILE_PENDING_KEY = "perf_profile_pending"
+PROFILE_RESULT_KEY = "perf_profile_result"
+PERF_HISTORY_SIZE = 20
+
+
+def keep_widget_state(exclude=()):
+    """
+    Pertahankan state widget yang tidak dirender pada rerun ini.
+
+    Streamlit membuang state widget yang tidak muncul di sebuah run, sehingga
+    filter di view yang tidak aktif akan hilang. Menulis ulang nilainya ke
+    session state di awal run membuatnya bertahan sampai widget muncul lagi.
+    """
+    for key in list(st.session_state.keys()):
+        if key in exclude or key.startswith(NON_STATE_PREFIXES):
+            continue
+        st.session_state[key] = st.session_state[key]
+
+
+def chart_selection(key, field='x'):
+    """
+    Nilai field dari titik/batang yang diklik di st.plotly_chart dengan key ini.
+
+    Seleksi dibaca dari session state di awal rerun, jadi filter bisa dihitung
+    sebelum chart-nya dirender. List kosong jika tidak ada yang dipilih.
+    """
+    state = st.session_state.get(key)
+    if not state:
+        return []
+    points = state.get('selection', {}).get('points', [])
+    return list(dict.fromkeys(p[field] for p in points if field in p))
+
+
+def paginated_list(df, key, render_item, compact_columns=None, page_size_options=PAGE_SIZE_OPTIONS):
+    """
+    Tampilkan baris DataFrame per halaman.
+
+    Hanya baris di halaman aktif yang diteruskan ke render_item (sebagai dict),
+    sehingga widget dan lookup deskripsi hanya dibuat untuk baris yang terlihat.
+    Jika compact_columns diberikan, pengguna bisa beralih ke tampilan st.dataframe.
+    """
+    total = len(df)
+    if total == 0:
+        return
+
+    col_size, col_page, col_mode = st.columns([1, 1, 2])
+
+    with col_mode:
+        compact = False
+        if compact_columns is not None:
+            compact_key = f"{key}_compact"
+            # Default diset lewat session state agar pilihan pengguna tetap dipakai
+            # ketika state widget dipertahankan antar view (lihat keep_widget_state)
+            if compact_key not in st.session_state:
+                st.session_state[compact_key] = total > COMPACT_THRESHOLD
+            compact = st.checkbox("Mode tabel ringkas", key=compact_key)
+
+    if compact:
+        st.dataframe(df[compact_columns], use_container_width=True, height=400)
+        st.caption(f"Menampilkan {total} baris")
+        return
+
+    with col_size:
+        page_size = st.selectbox(
+            "Baris per halaman:",
+            options=page_size_options,
+            index=0,
+            key=f"{key}_page_size"
+        )
+
+    n_pages = max(1, math.ceil(total / page_size))
+    page_key = f"{key}_page"
+    # Jaga agar halaman tetap valid ketika filter mengurangi jumlah baris
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+
+    with col_page:
+        page = st.number_input(
+            f"Halaman (dari {n_pages}):",
+            min_value=1,
+            max_value=n_pages,
+            step=1,
+            key=page_key
+        )
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    for row in df.iloc[start:end].to_dict('records'):
+        render_item(row)
+
+    st.caption(f"Menampilkan {start + 1}–{end} dari {total}")
+
+
+def export_button(label, name, build, fmt, version, filter_key=None, key=None):
+    """
+    Tombol unduh yang baru menulis file saat diklik.
+
+    build mengembalikan DataFrame (atau dict sheet untuk XLSX); file hasil
+    disimpan per versi data dan filter, sehingga klik berikutnya langsung
+    memakai file yang sudah ada. Klik tidak memicu rerun halaman.
+    """
+    ext, mime = FORMAT_EKSPOR[fmt]
+    st.download_button(
+        label=label,
+        data=lambda: export_file(name, build, fmt, version, filter_key).read_bytes(),
+        file_name=name + ext,
+        mime=mime,
+        key=key,
+        on_click="ignore"
+    )
+
+
+def perf_session_id():
+    """ID pendek sesi ini untuk log timing"""
+    if PERF_SESSION_KEY not in st.session_state:
+        st.session_state[PERF_SESSION_KEY] = uuid.uuid4().hex[:8]
+    return st.session_state[PERF_SESSION_KEY]
+
+
+def _request_profile():
+    # Callback dijalankan sebelum rerun berikutnya, jadi rerun itulah yang diprofil
+    st.session_state[PROFILE_PENDING_KEY] = True
+
+
+def perf_panel(timer, profil, debug):
+    """
+    Panel performa di sidebar untuk rerun yang baru selesai.
+
+    timer adalah kbli_perf.RerunTimer yang sudah ditutup, profil hasil
+    cProfile (atau None) dan debug statistik data dari snapshot.debug_stats.
+    """
+    riwayat = st.session_state.get(PERF_HISTORY_KEY, [])
+    riwayat = (riwayat + [{
+        'Tampilan': timer.label,
+        'Total (ms)': round(timer.total_seconds * 1000, 1),
+        'RSS (MB)': round(timer.rss_mb, 1),
+    }])[-PERF_HISTORY_SIZE:]
+    st.session_state[PERF_HISTORY_KEY] = riwayat
+    if profil is not None:
+        st.session_state[PROFILE_RESULT_KEY] = profil
+
+    with st.expander("⏱️ Performa", expanded=False):
+        col_total, col_rss = st.columns(2)
+        with col_total:
+            st.metric("Rerun terakhir", f"{timer.total_seconds * 1000:.0f} ms")
+        with col_rss:
+            st.metric("RSS", f"{timer.rss_mb:.0f} MB", delta=f"{timer.rss_delta_mb:+.1f} MB", delta_color="off")
+
+        records = pd.DataFrame(timer.sorted_records())
+        if len(records) > 0:
+            cache = records[records['kind'] == perf.KIND_CACHE]
+            st.caption(
+                f"Cache: {int((cache['status'] == perf.STATUS_HIT).sum())} hit, "
+                f"{int((cache['status'] == perf.STATUS_MISS).sum())} miss · "
+                f"Tabel dibangun: {int((records['kind'] == perf.KIND_BUILD).sum())}"
+            )
+            st.plotly_chart(rerun_waterfall_figure(records), use_container_width=True)
+            tabel = pd.DataFrame({
+                'Span': records['name'],
+                'Jenis': records['kind'],
+                'Cache': records['status'].fillna(''),
+                'Mulai (ms)': (records['start'] * 1000).round(1),
+                'Durasi (ms)': (records['seconds'] * 1000).round(1),
+                'ΔRSS (MB)': records['rss_delta_mb'].round(1),
+            })
+            st.dataframe(tabel, use_container_width=True, hide_index=True)
+
+        st.write("**Riwayat rerun sesi ini:**")
+        st.dataframe(pd.DataFrame(riwayat[::-1]), use_container_width=True, hide_index=True)
+
+        st.write("**Profil cProfile:**")
+        st.button(
+            "Profil rerun berikutnya",
+            key="button_perf_profile",
+            on_click=_request_profile,
+            help="Rerun yang dipicu tombol ini direkam dengan cProfile"
+        )
+        hasil = st.session_state.get(PROFILE_RESULT_KEY)
+        if hasil is not None:
+            st.download_button(
+                "Download profil (.prof)",
+                data=hasil['prof'],
+                file_name="kbli_rerun.prof",
+                mime="application/octet-stream",
+                key="download_perf_prof",
+                on_click="ignore"
+            )
+            st.download_button(
+                "Download ringkasan profil (.txt)",
+                data=hasil['text'],
+                file_name="kbli_rerun_profile.txt",
+                mime="text/plain",
+                key="download_perf_text",
+                on_click="ignore"
+            )
+            st.caption("Buka file .prof dengan `python -m pstats` atau snakeviz")
+        if perf.PERF_LOG:
+            st.caption(f"Log timing ditulis ke `{perf.PERF_LOG}`")
+        else:
+            st.caption("Set KBLI_PERF_LOG=path untuk mencatat timing setiap rerun ke file JSON lines")
+
+        st.write("**Data:**")
+        st.write(f"Baris 'KBLI berdasarkan Cluster': {debug['rows']} · "
+                 f"kode unik: {debug['unique']} · kode kosong: {debug['nulls']}")
+        duplicates = debug['duplicates']
+        if len(duplicates) > 0:
+            st.write(f"KBLI dengan duplikat: {len(duplicates)} "
+                     f"(mis. {', '.join(f'{k} ×{v}' for k, v in duplicates.head(5).items())})")
@@ -0,0 +1,307 @@
+"""
+Validasi kualitas data di semua sheet sumber.
+
+Setiap cek bekerja per kolom (operasi vektor pandas, tanpa loop per baris)
+dan menghasilkan satu baris temuan per masalah dengan kolom KOLOM_TEMUAN.
+Temuan bertingkat 'error' (data tidak bisa dipakai dengan benar) atau
+'peringatan' (perlu diperiksa). Laporan dihitung sekali per versi data
+lewat DatasetSnapshot.validation.
+
+Contoh:
+    python kbli_validation.py
+    python kbli_validation.py 20251105.xlsx --output validasi.xlsx --strict
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kbli_data import (
+    CACHE_DIR,
+    DATA_DIR,
+    SHEET_CLUSTER_PEKERJAAN,
+    SHEET_HASIL_KLASIFIKASI,
+    SHEET_KBLI,
+    SHEET_KBLI_CLUSTER,
+    WORKBOOK_KLASIFIKASI,
+)
+from kbli_export import format_from_suffix, write_frames
+from kbli_index import KATEGORI_KBLI, PANJANG_KODE, normalize_kode_series
+
+TINGKAT_ERROR = 'error'
+TINGKAT_PERINGATAN = 'peringatan'
+
+CEK_KODE_KOSONG = 'Kode kosong'
+CEK_KODE_TIDAK_VALID = 'Kode tidak valid'
+CEK_KODE_TIDAK_DI_KATALOG = 'Kode tidak ada di sheet KBLI'
+CEK_PASANGAN_DUPLIKAT = 'Pasangan kode-cluster duplikat'
+CEK_CLUSTER_TANPA_KBLI = 'Cluster tanpa KBLI'
+CEK_HASIL_TIDAK_DI_KATALOG = 'Kode hasil klasifikasi tidak ada di katalog'
+CEK_VARIAN_CLUSTER = 'Varian nama cluster'
+
+TINGKAT_CEK = {
+    CEK_KODE_KOSONG: TINGKAT_ERROR,
+    CEK_KODE_TIDAK_VALID: TINGKAT_ERROR,
+    CEK_KODE_TIDAK_DI_KATALOG: TINGKAT_ERROR,
+    CEK_PASANGAN_DUPLIKAT: TINGKAT_PERINGATAN,
+    CEK_CLUSTER_TANPA_KBLI: TINGKAT_PERINGATAN,
+    CEK_HASIL_TIDAK_DI_KATALOG: TINGKAT_ERROR,
+    CEK_VARIAN_CLUSTER: TINGKAT_PERINGATAN,
+}
+
+KOLOM_TEMUAN = ['CEK', 'TINGKAT', 'SHEET', 'BARIS', 'KOLOM', 'NILAI', 'KETERANGAN']
+
+TIDAK_DITEMUKAN = 'Tidak Ditemukan'
+CLUSTER_TIDAK_TERKLASIFIKASI = 'Tidak Terklasifikasi'
+
+# Golongan pokok (2 digit awal) yang ada di KBLI 2020
+GOLONGAN_POKOK_VALID = {
+    f"{gp:02d}" for _, awal, akhir, _ in KATEGORI_KBLI for gp in range(awal, akhir + 1)
+}
+
+
+def _baris_excel(index):
+    """Nomor baris di Excel (header di baris 1) dari posisi baris DataFrame"""
+    return np.asarray(index) + 2
+
+
+def _temuan(cek, sheet, kolom, baris, nilai, keterangan):
+    n = len(baris)
+    nilai = pd.Series(nilai, dtype=object)
+    return pd.DataFrame({
+        'CEK': [cek] * n,
+        'TINGKAT': [TINGKAT_CEK[cek]] * n,
+        'SHEET': [sheet] * n,
+        'BARIS': np.asarray(baris, dtype=np.int64),
+        'KOLOM': [kolom] * n,
+        'NILAI': nilai.where(nilai.notna(), '').astype(str).to_numpy(),
+        'KETERANGAN': keterangan if not np.isscalar(keterangan) else [keterangan] * n,
+    })
+
+
+def kode_valid(series):
+    """
+    (kode 5 digit ternormalisasi, mask kosong, mask tidak valid) untuk satu kolom kode.
+
+    Kode angka dari Excel kehilangan nol di depan, jadi 1111 berarti 01111;
+    kode dianggap tidak valid jika bukan angka, lebih dari 5 digit, atau
+    golongan pokoknya (2 digit awal) tidak ada di KBLI.
+    """
+    kosong = series.isna().to_numpy() | (series.astype(str).str.strip() == '').to_numpy()
+    kode = normalize_kode_series(series)
+    golongan_ok = kode.str[:2].isin(GOLONGAN_POKOK_VALID).to_numpy()
+    tidak_valid = ~kosong & ~golongan_ok
+    return kode.where(golongan_ok), kosong, tidak_valid
+
+
+def _cek_kode(df, sheet, kolom, abaikan=()):
+    nilai = df[kolom].astype(object)
+    # Nilai khusus seperti 'Tidak Ditemukan' bukan kode dan tidak dicek
+    dikecualikan = nilai.isin(abaikan).to_numpy()
+    kode, kosong, tidak_valid = kode_valid(nilai.where(~dikecualikan))
+    kosong &= ~dikecualikan
+    nilai = nilai.to_numpy()
+    posisi_kosong = np.flatnonzero(kosong)
+    posisi_salah = np.flatnonzero(tidak_valid)
+    temuan = [
+        _temuan(CEK_KODE_KOSONG, sheet, kolom, _baris_excel(posisi_kosong), nilai[posisi_kosong], "Kode KBLI kosong"),
+        _temuan(CEK_KODE_TIDAK_VALID, sheet, kolom, _baris_excel(posisi_salah), nilai[posisi_salah],
+                f"Bukan kode KBLI {PANJANG_KODE} digit yang valid"),
+    ]
+    return kode, temuan
+
+
+def _cek_tidak_di_katalog(kode, katalog, cek, sheet, kolom, nilai):
+    # isin pada dtype object memakai hashtable; isin string Arrow membuat skalar per nilai katalog
+    kode = kode.astype(object)
+    hilang = (kode.notna() & ~kode.isin(katalog)).to_numpy()
+    posisi = np.flatnonzero(hilang)
+    return _temuan(cek, sheet, kolom, _baris_excel(posisi), nilai[posisi],
+                   "Kode tidak ditemukan di sheet 'KBLI'")
+
+
+def _cek_duplikat(kode, cluster):
+    pasangan = pd.DataFrame({'KODE': kode.to_numpy(), 'CLUSTER': cluster.astype(object).to_numpy()})
+    pasangan = pasangan[pasangan['KODE'].notna()]
+    duplikat = pasangan.duplicated(['KODE', 'CLUSTER'], keep='first')
+    if not duplikat.any():
+        return _temuan(CEK_PASANGAN_DUPLIKAT, SHEET_KBLI_CLUSTER, 'KODE_KBLI', [], [], [])
+    pertama = pasangan[~pasangan.duplicated(['KODE', 'CLUSTER'], keep='first')]
+    pertama = pertama.assign(_BARIS=_baris_excel(pertama.index)).set_index(['KODE', 'CLUSTER'])['_BARIS']
+    ulang = pasangan[duplikat]
+    baris_pertama = pertama.reindex(pd.MultiIndex.from_frame(ulang[['KODE', 'CLUSTER']])).to_numpy()
+    return _temuan(
+        CEK_PASANGAN_DUPLIKAT, SHEET_KBLI_CLUSTER, 'KODE_KBLI',
+        _baris_excel(ulang.index), (ulang['KODE'] + ' / ' + ulang['CLUSTER'].astype(str)).to_numpy(),
+        [f"Duplikat dari baris {b}" for b in baris_pertama],
+    )
+
+
+def _cek_cluster_tanpa_kbli(pekerjaan, cluster_kbli):
+    cluster = pekerjaan['CLUSTER'].astype(object)
+    tanpa = cluster.notna() & (cluster != CLUSTER_TIDAK_TERKLASIFIKASI) & ~cluster.isin(cluster_kbli)
+    data = pd.DataFrame({'CLUSTER': cluster[tanpa].to_numpy(), 'POSISI': np.flatnonzero(tanpa.to_numpy())})
+    rekap = data.groupby('CLUSTER', sort=False)['POSISI'].agg(['first', 'size'])
+    return _temuan(
+        CEK_CLUSTER_TANPA_KBLI, SHEET_CLUSTER_PEKERJAAN, 'CLUSTER',
+        _baris_excel(rekap['first'].to_numpy()), rekap.index.to_numpy(),
+        [f"Dipakai {n} pekerjaan, tidak ada KBLI di 'KBLI berdasarkan Cluster'" for n in rekap['size']],
+    )
+
+
+def _cek_varian_cluster(kolom_cluster):
+    """
+    Nama cluster yang hanya berbeda spasi atau huruf besar/kecil.
+
+    kolom_cluster: list (sheet, Series CLUSTER). Varian yang paling sering
+    dipakai dianggap nama baku; varian lain dilaporkan sekali per sheet.
+    """
+    bagian = []
+    for sheet, series in kolom_cluster:
+        nilai = series.astype(object)
+        ada = nilai.notna().to_numpy()
+        bagian.append(pd.DataFrame({
+            'SHEET': sheet,
+            'POSISI': np.flatnonzero(ada),
+            'NAMA': nilai[ada].astype(str).to_numpy(),
+        }))
+    semua = pd.concat(bagian, ignore_index=True)
+    semua['KUNCI'] = semua['NAMA'].str.strip().str.replace(r'\s+', ' ', regex=True).str.casefold()
+    jumlah = semua.groupby(['KUNCI', 'NAMA'], sort=False).size().rename('N').reset_index()
+    jumlah_varian = jumlah.groupby('KUNCI')['NAMA'].transform('size')
+    jumlah = jumlah[jumlah_varian > 1]
+    if len(jumlah) == 0:
+        return _temuan(CEK_VARIAN_CLUSTER, '', 'CLUSTER', [], [], [])
+    baku = jumlah.sort_values(['KUNCI', 'N'], ascending=[True, False]).drop_duplicates('KUNCI')
+    baku = baku.set_index('KUNCI')['NAMA']
+    varian = semua.merge(jumlah[['KUNCI', 'NAMA']], on=['KUNCI', 'NAMA'])
+    varian = varian[varian['NAMA'].to_numpy() != varian['KUNCI'].map(baku).to_numpy()]
+    per_sheet = varian.groupby(['SHEET', 'NAMA'], sort=False).agg(
+        POSISI=('POSISI', 'first'), KUNCI=('KUNCI', 'first'), N=('POSISI', 'size')
+    ).reset_index()
+    hasil = []
+    for sheet, grup in per_sheet.groupby('SHEET', sort=False):
+        hasil.append(_temuan(
+            CEK_VARIAN_CLUSTER, sheet, 'CLUSTER', _baris_excel(grup['POSISI'].to_numpy()),
+            grup['NAMA'].map(repr).to_numpy(),
+            [f"Varian dari '{baku[k]}' ({n} baris)" for k, n in zip(grup['KUNCI'], grup['N'])],
+        ))
+    return pd.concat(hasil, ignore_index=True)
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    version: str
+    issues: pd.DataFrame
+
+    @property
+    def errors(self):
+        return self.issues[self.issues['TINGKAT'] == TINGKAT_ERROR]
+
+    @property
+    def warnings(self):
+        return self.issues[self.issues['TINGKAT'] == TINGKAT_PERINGATAN]
+
+    @property
+    def has_errors(self):
+        return len(self.errors) > 0
+
+    def summary(self):
+        """Jumlah temuan per cek (semua cek tercantum, termasuk yang nol)"""
+        jumlah = self.issues.groupby('CEK', sort=False).size()
+        return pd.DataFrame({
+            'Cek': list(TINGKAT_CEK),
+            'Tingkat': list(TINGKAT_CEK.values()),
+            'Jumlah': [int(jumlah.get(cek, 0)) for cek in TINGKAT_CEK],
+        })
+
+    def exit_code(self, strict=False):
+        """0 jika lolos; 1 jika ada error (atau peringatan bila strict)"""
+        if self.has_errors or (strict and len(self.issues) > 0):
+            return 1
+        return 0
+
+    def sheets(self):
+        return {'Ringkasan': self.summary(), 'Temuan': self.issues}
+
+
+def validate_tables(tables, version=None):
+    """Jalankan semua cek atas KbliTables"""
+    kbli_cluster = tables.kbli_cluster.reset_index(drop=True)
+    kbli_full = tables.kbli_full.reset_index(drop=True)
+    pekerjaan = tables.cluster_pekerjaan.reset_index(drop=True)
+    hasil = tables.tidak_terklasifikasi.reset_index(drop=True)
+
+    kode_katalog, temuan_katalog = _cek_kode(kbli_full, SHEET_KBLI, 'KODE KBLI')
+    kode_cluster, temuan_cluster = _cek_kode(kbli_cluster, SHEET_KBLI_CLUSTER, 'KODE_KBLI')
+    kode_hasil, temuan_hasil = _cek_kode(hasil, SHEET_HASIL_KLASIFIKASI, 'KODE KBLI', abaikan=(TIDAK_DITEMUKAN,))
+    katalog = kode_katalog.dropna().unique().to_numpy(dtype=object)
+
+    temuan = temuan_katalog + temuan_cluster + temuan_hasil + [
+        _cek_tidak_di_katalog(
+            kode_cluster, katalog, CEK_KODE_TIDAK_DI_KATALOG, SHEET_KBLI_CLUSTER, 'KODE_KBLI',
+            kbli_cluster['KODE_KBLI'].astype(object).to_numpy(),
+        ),
+        _cek_tidak_di_katalog(
+            kode_hasil, katalog, CEK_HASIL_TIDAK_DI_KATALOG, SHEET_HASIL_KLASIFIKASI, 'KODE KBLI',
+            hasil['KODE KBLI'].astype(object).to_numpy(),
+        ),
+        _cek_duplikat(kode_cluster, kbli_cluster['CLUSTER']),
+        _cek_cluster_tanpa_kbli(pekerjaan, kbli_cluster['CLUSTER'].dropna().astype(object).unique()),
+        _cek_varian_cluster([
+            (SHEET_KBLI_CLUSTER, kbli_cluster['CLUSTER']),
+            (SHEET_CLUSTER_PEKERJAAN, pekerjaan['CLUSTER']),
+            (SHEET_HASIL_KLASIFIKASI, hasil['CLUSTER']),
+        ]),
+    ]
+    issues = pd.concat([t for t in temuan if len(t) > 0] or [temuan[0]], ignore_index=True)
+    return ValidationReport(version=version, issues=issues[KOLOM_TEMUAN])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Validasi kualitas data workbook KBLI")
+    parser.add_argument('workbook', nargs='?', help="Workbook utama (default: yang aktif di direktori data)")
+    parser.add_argument('--klasifikasi', help="Workbook hasil klasifikasi")
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help="Direktori data jika workbook tidak diberikan")
+    parser.add_argument('--output', help="Tulis temuan (.xlsx dengan ringkasan, atau .csv/.parquet)")
+    parser.add_argument('--json', action='store_true', help="Cetak ringkasan sebagai JSON")
+    parser.add_argument('--strict', action='store_true', help="Peringatan juga membuat kode keluar 1")
+    return parser
+
+
+def main(argv=None):
+    from kbli_snapshot import DatasetSnapshot
+
+    args = build_parser().parse_args(argv)
+    if args.workbook:
+        klasifikasi = args.klasifikasi or Path(args.workbook).parent / WORKBOOK_KLASIFIKASI
+        snapshot = DatasetSnapshot.from_workbooks(args.workbook, klasifikasi, CACHE_DIR)
+    else:
+        snapshot = DatasetSnapshot.load(data_dir=Path(args.data_dir))
+    report = snapshot.validation
+    ringkasan = report.summary()
+
+    if args.json:
+        print(json.dumps({
+            'versi': report.version,
+            'error': int(len(report.errors)),
+            'peringatan': int(len(report.warnings)),
+            'cek': dict(zip(ringkasan['Cek'], ringkasan['Jumlah'].astype(int).tolist())),
+        }, ensure_ascii=False, indent=2))
+    else:
+        print(f"Versi {report.version}: {len(report.errors)} error, {len(report.warnings)} peringatan")
+        for cek, tingkat, jumlah in ringkasan.itertuples(index=False):
+            print(f"[{tingkat}] {cek}: {jumlah}")
+
+    if args.output:
+        fmt = format_from_suffix(args.output)
+        write_frames(report.sheets() if fmt == 'XLSX' else report.issues, Path(args.output), fmt)
+    return report.exit_code(args.strict)
+
+
+if __name__ == '__main__':
+    sys.exit(main())